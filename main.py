@@ -1,10 +1,65 @@
-from typing import List, Dict, Any
+import asyncio
+import functools
+import json
+from typing import List, Dict, Any, Callable, Optional, Tuple, Union, cast
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+from pydantic import BaseModel, Field, ValidationError, parse_obj_as
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import MissingError
 
-from optimizer.contract import Contract
-from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.contract import Contract, ContractTemplate
+from optimizer.contract_analysis import ContractAnalysis
+from optimizer.contract_columns import ContractColumns
+from optimizer.contract_optimizer import ContractOptimizer, ContractOptimizerFast
+from optimizer.contract_optimizer_numpy import ContractOptimizerNumpy
+from optimizer.dominance import ContractOptimizerPruned
+from optimizer.fleet_optimizer import ContractFleetOptimizer
+from optimizer.recurrence import ContractOptimizerRecurring, count_occurrences
+from optimizer.stopwatch import Stopwatch
+from optimizer.time_axis_optimizer import (
+    ContractOptimizerTimeAxis,
+    select_columns_optimizer,
+    select_optimizer,
+)
+from optimizer.top_k_optimizer import ContractOptimizerTopK
+from service.analyses import AnalysisNotFoundError, AnalysisStore
+from service.batch import chunk_sets, optimize_chunk
+from service.cache import ResultCache, canonical_order, contracts_key, payload_key
+from service.columnar import (
+    COLUMNS_MEDIA_TYPE,
+    PATH_MEDIA_TYPE,
+    ColumnarFormatError,
+    decode_columns,
+    encode_path,
+)
+from service.executor import (
+    ExecutorOverloadedError,
+    ExecutorTimeoutError,
+    OptimizationExecutor,
+    measure_analysis,
+    measure_optimizer,
+)
+from service.jobs import JobLimitError, JobNotDoneError, JobNotFoundError, JobQueue
+from service.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    size_bucket,
+)
+from service.ndjson import (
+    ContractParseError,
+    NdjsonContractReader,
+    PayloadTooLargeError,
+)
+from service.profiling import PROFILE_TOKEN_HEADER, ProfileRecorder, profile_optimizer
+from service.sessions import SessionLimitError, SessionNotFoundError, SessionStore
+from service.settings import Settings
 
 app = FastAPI(
     title="Spaceship Rental API",
@@ -12,6 +67,237 @@ app = FastAPI(
     version="1.0",
 )
 
+settings = Settings()
+
+# optimization engine used by the API, selected with the SPACESHIP_OPTIMIZER environment variable
+OPTIMIZER_CLASSES: Dict[str, Callable[[List[Contract]], ContractOptimizer]] = {
+    "fast": ContractOptimizerFast,
+    "numpy": ContractOptimizerNumpy,
+    "time_axis": ContractOptimizerTimeAxis,
+    "auto": select_optimizer,
+}
+optimizer_class = OPTIMIZER_CLASSES[settings.optimizer]
+
+# same engines on contracts in columns, building no Contract (numpy runs the algorithm of fast)
+COLUMNS_OPTIMIZERS: Dict[Any, Callable[[ContractColumns], ContractOptimizer]] = {
+    ContractOptimizerFast: ContractOptimizerNumpy.from_columns,
+    ContractOptimizerNumpy: ContractOptimizerNumpy.from_columns,
+    ContractOptimizerTimeAxis: ContractOptimizerTimeAxis.from_columns,
+    select_optimizer: select_columns_optimizer,
+}
+
+executor = OptimizationExecutor(
+    settings.executor,
+    max_workers=settings.max_workers,
+    inline_threshold=settings.inline_threshold,
+    max_pending=settings.max_pending,
+    timeout=settings.timeout,
+)
+
+# jobs run in their own pool, so that they never delay synchronous optimizations
+job_executor = OptimizationExecutor(
+    settings.executor,
+    max_workers=settings.job_workers,
+    inline_threshold=settings.inline_threshold,
+    max_pending=settings.job_workers,
+    timeout=settings.job_timeout,
+)
+jobs = JobQueue(
+    max_running=job_executor.workers, max_jobs=settings.max_jobs, ttl=settings.job_ttl
+)
+
+sessions = SessionStore(max_sessions=settings.max_sessions)
+
+analyses = AnalysisStore(max_analyses=settings.max_analyses)
+
+# streamed bodies are parsed off the event loop by blocks of this size at least
+STREAM_PARSE_BYTES = 2**20
+
+# rough size of a contract in a request body, to schedule jobs before parsing their contracts
+JOB_BYTES_PER_CONTRACT = 64
+
+cache = ResultCache(
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    directory=settings.cache_dir,
+    max_files=settings.cache_max_files,
+)
+
+profiles = ProfileRecorder(
+    token=settings.profile_token,
+    sample_rate=settings.profile_sample_rate,
+    directory=settings.profile_dir,
+    max_files=settings.profile_max_files,
+)
+
+metrics = MetricsRegistry()
+app.add_middleware(MetricsMiddleware, registry=metrics)
+phase_seconds = metrics.register(
+    Histogram(
+        "spaceship_phase_seconds",
+        "Duration of the phases of the requests, by endpoint, phase and payload size in contracts.",
+        ["handler", "phase", "size"],
+    )
+)
+request_contracts = metrics.register(
+    Histogram(
+        "spaceship_request_contracts",
+        "Number of contracts per request, by endpoint.",
+        ["handler"],
+        buckets=[10**i for i in range(1, 8)],
+    )
+)
+pruned_contracts = metrics.register(
+    Counter(
+        "spaceship_pruned_contracts_total",
+        "Contracts removed by dominance pruning before optimization, by endpoint.",
+        ["handler"],
+    )
+)
+metrics.register(
+    Gauge(
+        "spaceship_executor_pending",
+        "Optimizations queued or running in the pool.",
+        function=lambda: executor.pending,
+    )
+)
+metrics.register(
+    Gauge(
+        "spaceship_cache_entries",
+        "Optimization results cached in memory.",
+        function=lambda: cache.stats()["entries"],
+    )
+)
+metrics.register(
+    Gauge(
+        "spaceship_jobs_pending",
+        "Jobs queued or running.",
+        function=lambda: jobs.pending,
+    )
+)
+metrics.register(
+    Gauge(
+        "spaceship_sessions",
+        "Sessions kept in memory.",
+        function=lambda: len(sessions),
+    )
+)
+metrics.register(
+    Gauge(
+        "spaceship_analyses",
+        "Contract analyses kept in memory.",
+        function=lambda: len(analyses),
+    )
+)
+
+
+def record_phases(
+    handler: str, nb_contracts: int, phases: Dict[str, float], pruned: int = 0
+) -> None:
+    """
+    Records the durations of the phases of a request in the metrics.
+    :param handler: name of the endpoint.
+    :param nb_contracts: number of contracts of the request, labeled by size bucket.
+    :param phases: durations of the phases, by name.
+    :param pruned: number of contracts removed by dominance pruning (defaults to 0).
+    """
+    size = size_bucket(nb_contracts)
+    for phase, seconds in phases.items():
+        phase_seconds.observe(seconds, handler=handler, phase=phase, size=size)
+    if pruned:
+        pruned_contracts.inc(pruned, handler=handler)
+
+
+@app.on_event("shutdown")
+def shutdown_executor() -> None:
+    executor.shutdown()
+    job_executor.shutdown()
+
+
+@app.exception_handler(ExecutorOverloadedError)
+async def executor_overloaded_handler(
+    request: Request, exc: ExecutorOverloadedError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(ExecutorTimeoutError)
+async def executor_timeout_handler(
+    request: Request, exc: ExecutorTimeoutError
+) -> JSONResponse:
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(PayloadTooLargeError)
+async def payload_too_large_error_handler(
+    request: Request, exc: PayloadTooLargeError
+) -> JSONResponse:
+    return JSONResponse(status_code=413, content={"detail": exc.message})
+
+
+@app.exception_handler(ContractParseError)
+async def contract_parse_error_handler(
+    request: Request, exc: ContractParseError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=422,
+        content={
+            "detail": [
+                {"loc": ["body", exc.line], "msg": exc.message, "type": "value_error"}
+            ]
+        },
+    )
+
+
+@app.exception_handler(ColumnarFormatError)
+async def columnar_format_error_handler(
+    request: Request, exc: ColumnarFormatError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=422,
+        content={"detail": [{"loc": ["body"], "msg": str(exc), "type": "value_error"}]},
+    )
+
+
+@app.exception_handler(SessionNotFoundError)
+async def session_not_found_handler(
+    request: Request, exc: SessionNotFoundError
+) -> JSONResponse:
+    return JSONResponse(status_code=404, content={"detail": "Session not found"})
+
+
+@app.exception_handler(AnalysisNotFoundError)
+async def analysis_not_found_handler(
+    request: Request, exc: AnalysisNotFoundError
+) -> JSONResponse:
+    return JSONResponse(status_code=404, content={"detail": "Analysis not found"})
+
+
+@app.exception_handler(SessionLimitError)
+async def session_limit_handler(
+    request: Request, exc: SessionLimitError
+) -> JSONResponse:
+    return JSONResponse(status_code=429, content={"detail": str(exc)})
+
+
+@app.exception_handler(JobNotFoundError)
+async def job_not_found_handler(
+    request: Request, exc: JobNotFoundError
+) -> JSONResponse:
+    return JSONResponse(status_code=404, content={"detail": "Job not found"})
+
+
+@app.exception_handler(JobLimitError)
+async def job_limit_handler(request: Request, exc: JobLimitError) -> JSONResponse:
+    return JSONResponse(status_code=429, content={"detail": str(exc)})
+
+
+@app.exception_handler(JobNotDoneError)
+async def job_not_done_handler(request: Request, exc: JobNotDoneError) -> JSONResponse:
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
 
 class ContractModel(BaseModel):
     name: str
@@ -19,14 +305,645 @@ class ContractModel(BaseModel):
     duration: int
     price: int
 
+    def to_contract(self) -> Contract:
+        return Contract(
+            name=self.name, start=self.start, duration=self.duration, price=self.price
+        )
+
+
+class ContractTemplateModel(BaseModel):
+    name: str
+    start: int
+    duration: int
+    price: int
+    period: int = Field(..., ge=1)
+    count: int = Field(..., ge=1)
+
+    def to_template(self) -> ContractTemplate:
+        return ContractTemplate(
+            name=self.name,
+            start=self.start,
+            duration=self.duration,
+            price=self.price,
+            period=self.period,
+            repetitions=self.count,
+        )
+
+
+class RecurringContractsModel(BaseModel):
+    contracts: List[ContractModel] = []
+    templates: List[ContractTemplateModel] = []
+
+
+# fields validating a JSON body of contracts like a typed body, for endpoints reading the raw body
+CONTRACTS_FIELD = create_response_field("contracts_model", List[ContractModel])
+RECURRING_CONTRACTS_FIELD = create_response_field(
+    "recurring_contracts_model", RecurringContractsModel
+)
+
+# JSON body of the optimization endpoints: a list of contracts, or contracts with recurring templates
+CONTRACTS_BODY_SCHEMA = {
+    "oneOf": [
+        {"type": "array", "items": ContractModel.schema()},
+        {
+            "type": "object",
+            "properties": {
+                "contracts": {"type": "array", "items": ContractModel.schema()},
+                "templates": {"type": "array", "items": ContractTemplateModel.schema()},
+            },
+        },
+    ]
+}
+
+
+def parse_contract_models(
+    body: bytes,
+) -> Tuple[List[ContractModel], List[ContractTemplateModel]]:
+    """
+    Parses and validates a JSON list of contracts, or an object with a list of contracts
+    and a list of recurring templates, reporting errors as FastAPI does for a typed body.
+    :param body: raw body of the request.
+    :return: the lists of validated contracts and templates.
+    :raises RequestValidationError if the body is not a valid list of contracts.
+    """
+    if not body:
+        raise RequestValidationError([ErrorWrapper(MissingError(), ("body",))])
+    try:
+        items = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise RequestValidationError([ErrorWrapper(e, ("body", e.pos))], body=e.doc)
+    if isinstance(items, dict):
+        value, errors = RECURRING_CONTRACTS_FIELD.validate(items, {}, loc=("body",))
+        if errors:
+            raise RequestValidationError([errors], body=items)
+        recurring = cast(RecurringContractsModel, value)
+        return recurring.contracts, recurring.templates
+    value, errors = CONTRACTS_FIELD.validate(items, {}, loc=("body",))
+    if errors:
+        raise RequestValidationError([errors], body=items)
+    return cast(List[ContractModel], value), []
+
+
+def optimizer_factory(
+    ships: int, k: int
+) -> Callable[[List[Contract]], ContractOptimizer]:
+    """
+    Returns the function creating the optimizer of a request from its contracts,
+    picklable to be sent to worker processes.
+    :param ships: number of ships available.
+    :param k: number of best schedules requested.
+    :return: the fleet optimizer with several ships, the top k optimizer with several schedules,
+    the optimizer selected by the settings otherwise, after dominance pruning if enabled.
+    """
+    if ships > 1:
+        return functools.partial(ContractFleetOptimizer, ships=ships)
+    if k > 1:
+        return functools.partial(ContractOptimizerTopK, k=k)
+    if settings.prune:
+        return functools.partial(
+            ContractOptimizerPruned, optimizer_class=optimizer_class
+        )
+    return optimizer_class
+
+
+def create_optimizer(
+    contracts: List[Contract], ships: int, k: int
+) -> ContractOptimizer:
+    """
+    Returns the optimizer of a request, see optimizer_factory.
+    :param contracts: contracts to be optimized.
+    :param ships: number of ships available.
+    :param k: number of best schedules requested.
+    """
+    return optimizer_factory(ships, k)(contracts)
+
+
+def columns_optimizer(
+    columns: ContractColumns, ships: int, k: int
+) -> ContractOptimizer:
+    """
+    Returns the optimizer of a request from contracts in columns, see optimizer_factory.
+    A single schedule of a single ship is optimized directly on the columns, after dominance pruning
+    if enabled, without building any Contract. Contracts are built for the other optimizers.
+    :param columns: contracts to be optimized.
+    :param ships: number of ships available.
+    :param k: number of best schedules requested.
+    """
+    columns_optimizer_class = COLUMNS_OPTIMIZERS.get(optimizer_class)
+    if ships > 1 or k > 1 or columns_optimizer_class is None:
+        return optimizer_factory(ships, k)(columns.to_contracts())
+    if settings.prune:
+        return ContractOptimizerPruned.from_columns(columns, columns_optimizer_class)
+    return columns_optimizer_class(columns)
+
+
+def read_optimizer(
+    body: bytes, content_type: str, ships: int, k: int, stopwatch: Stopwatch
+) -> Tuple[ContractOptimizer, int, str]:
+    """
+    Parses contracts sent as JSON or in binary columns, and returns the optimizer of a request.
+    Recurring templates sent as JSON are expanded by the optimizer only, when optimizing.
+    :param body: raw body of the request.
+    :param content_type: media type of the body.
+    :param ships: number of ships available.
+    :param k: number of best schedules requested.
+    :param stopwatch: stopwatch recording the parse, convert and hash phases.
+    :return: the optimizer, the number of contracts and occurrences, and the cache key of the contracts.
+    :raises RequestValidationError or ColumnarFormatError if the body is invalid.
+    :raises HTTPException if templates have more occurrences than allowed by the settings.
+    """
+    optimizer: ContractOptimizer
+    if content_type == COLUMNS_MEDIA_TYPE:
+        # columns are views of the body
+        columns = decode_columns(body)
+        stopwatch.lap("parse")
+        optimizer = columns_optimizer(columns, ships, k)
+        stopwatch.lap("convert")
+        size, key = len(columns), payload_key(body)
+    else:
+        contracts_model, templates_model = parse_contract_models(body)
+        stopwatch.lap("parse")
+        # optimized in canonical order, so that results cached do not depend on the order of the payload
+        contracts = [c.to_contract() for c in contracts_model]
+        contracts = [contracts[i] for i in canonical_order(contracts)]
+        templates = sorted(t.to_template() for t in templates_model)
+        occurrences = count_occurrences(templates)
+        if occurrences > settings.max_occurrences:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Templates have more than {settings.max_occurrences} occurrences",
+            )
+        if templates:
+            optimizer = ContractOptimizerRecurring(
+                contracts, templates, optimizer_factory(ships, k)
+            )
+        else:
+            optimizer = create_optimizer(contracts, ships, k)
+        stopwatch.lap("convert")
+        size, key = len(contracts) + occurrences, contracts_key(contracts, templates)
+    stopwatch.lap("hash")
+    return optimizer, size, key
+
 
 @app.post(
     "/spaceship/optimize",
     summary="Returns the sublist of non-overlapping contracts maximizing the income.",
+    description="With several ships, returns one sublist of contracts per ship in 'paths'. "
+    "With k > 1, returns the k best schedules in decreasing income order in 'schedules'. "
+    f"Contracts are sent as JSON, or in binary columns with 'Content-Type: {COLUMNS_MEDIA_TYPE}'. "
+    "Recurring contracts are sent as templates, in a JSON object with 'contracts' and 'templates': "
+    "occurrence i of a template is named 'name#i' in the path. "
+    f"With a single ship, the result is returned in binary with 'Accept: {PATH_MEDIA_TYPE}'. "
+    "With 'profile', the optimization runs under cProfile and tracemalloc, bypassing the cache, "
+    f"and its profile is returned in 'profile': it requires the '{PROFILE_TOKEN_HEADER}' header.",
+    response_model=None,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": CONTRACTS_BODY_SCHEMA},
+                COLUMNS_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            },
+        },
+        "responses": {
+            "200": {
+                "content": {
+                    PATH_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}
+                }
+            }
+        },
+    },
 )
-async def optimize_contracts(contracts_model: List[ContractModel]) -> Dict[str, Any]:
-    contracts = [
-        Contract(name=c.name, start=c.start, duration=c.duration, price=c.price)
-        for c in contracts_model
-    ]
-    return ContractOptimizerFast(contracts).optimize()
+async def optimize_contracts(
+    request: Request,
+    ships: int = Query(1, ge=1, description="Number of ships available."),
+    k: int = Query(
+        1,
+        ge=1,
+        le=settings.max_schedules,
+        description="Number of best schedules returned, for a single ship.",
+    ),
+    profile: bool = Query(
+        False,
+        description="Returns the profile of the optimization, for authorized callers.",
+    ),
+) -> Union[Dict[str, Any], Response]:
+    if ships > 1 and k > 1:
+        raise HTTPException(
+            status_code=422,
+            detail="Several schedules are only computed for a single ship",
+        )
+    compact = PATH_MEDIA_TYPE in request.headers.get("accept", "")
+    if compact and (ships > 1 or k > 1 or profile):
+        raise HTTPException(
+            status_code=406, detail="Binary result only holds a single path"
+        )
+    if profile and not profiles.authorized(request.headers.get(PROFILE_TOKEN_HEADER)):
+        raise HTTPException(status_code=403, detail="Profiling is not allowed")
+
+    stopwatch = Stopwatch()
+    body = await request.body()
+    stopwatch.lap("receive")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    optimizer, size, key = read_optimizer(body, content_type, ships, k, stopwatch)
+
+    async def optimize_profiled() -> Dict[str, Any]:
+        # phases slowed down by the profilers are not recorded in the metrics
+        result, _, optimization_profile = await executor.run(
+            profile_optimizer, optimizer, size=size * ships
+        )
+        await asyncio.to_thread(
+            profiles.save, "optimize_contracts", optimization_profile
+        )
+        return {**result, "profile": optimization_profile}
+
+    async def optimize() -> Dict[str, Any]:
+        if profiles.sample():
+            # the profile is stored, not returned nor cached
+            result = await optimize_profiled()
+            del result["profile"]
+            return result
+        result, phases, pruned = await executor.run(
+            measure_optimizer, optimizer, size=size * ships
+        )
+        record_phases("optimize_contracts", size, phases, pruned)
+        return result
+
+    # includes the time waiting for a worker, or for the same optimization in the cache
+    if profile:
+        result = await optimize_profiled()
+    elif not cache.enabled:
+        result = await optimize()
+    else:
+        result = await cache.get_or_compute(f"{key}:{ships}:{k}", optimize)
+    stopwatch.lap("optimize")
+
+    response: Response
+    if compact:
+        response = Response(content=encode_path(result), media_type=PATH_MEDIA_TYPE)
+    else:
+        response = JSONResponse(content=result)
+    stopwatch.lap("serialize")
+
+    record_phases("optimize_contracts", size, stopwatch.phases)
+    request_contracts.observe(size, handler="optimize_contracts")
+    return response
+
+
+@app.post(
+    "/spaceship/optimize/batch",
+    summary="Returns the sublist of non-overlapping contracts maximizing the income "
+    "of each independent set of contracts.",
+    description="Sets are optimized in parallel, a set failing validation or optimization "
+    "gets an 'error' instead of a result without impacting the other sets.",
+)
+async def optimize_contracts_batch(
+    # sets are validated one by one, so that a set that is not a list only fails itself
+    contract_sets_model: Dict[str, Any] = Body(
+        ...,
+        example={
+            "region1": [{"name": "Contract1", "start": 0, "duration": 5, "price": 10}]
+        },
+    ),
+) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    contract_sets = []
+    for set_id, items in contract_sets_model.items():
+        try:
+            contracts_model = parse_obj_as(List[ContractModel], items)
+        except ValidationError as e:
+            results[set_id] = {"error": f"ValidationError: {e}"}
+            continue
+        contract_sets.append((set_id, [c.to_contract() for c in contracts_model]))
+
+    # about 4 chunks per worker, balancing load while amortizing the cost of dispatch
+    total_contracts = sum(len(contracts) for _, contracts in contract_sets)
+    chunks = chunk_sets(
+        contract_sets, max(1, total_contracts // (4 * executor.workers))
+    )
+    chunk_results = await executor.run_all(
+        optimize_chunk,
+        [(optimizer_factory(1, 1), chunk) for chunk in chunks],
+        size=total_contracts,
+    )
+
+    for chunk, chunk_result in zip(chunks, chunk_results):
+        if isinstance(chunk_result, BaseException):
+            error = {"error": f"{chunk_result.__class__.__name__}: {chunk_result}"}
+            chunk_result = {set_id: error for set_id, _ in chunk}
+        results.update(chunk_result)
+    return {set_id: results[set_id] for set_id in contract_sets_model}
+
+
+# pages of an analysis, in the query parameters of both analysis endpoints
+ANALYSIS_OFFSET = Query(0, ge=0, description="Position of the first contract returned.")
+ANALYSIS_LIMIT = Query(
+    100, ge=1, le=1000, description="Maximum number of contracts returned."
+)
+
+
+@app.post(
+    "/spaceship/analyze",
+    summary="Returns for each contract the best income with it forced in and forced out.",
+    description="The marginal value of a contract is the income lost by rejecting it. "
+    "Contracts are returned in input order, one page at a time: the whole analysis is kept "
+    "under the returned 'analysis_id', whose next pages are read from "
+    "/spaceship/analyze/{analysis_id} without sending the contracts again.",
+)
+async def analyze_contracts(
+    contracts_model: List[ContractModel],
+    offset: int = ANALYSIS_OFFSET,
+    limit: int = ANALYSIS_LIMIT,
+) -> Dict[str, Any]:
+    contracts = [c.to_contract() for c in contracts_model]
+    # analyzed in canonical order, so that the analysis cached does not depend on the order of the payload
+    order = canonical_order(contracts)
+    sorted_contracts = [contracts[i] for i in order]
+
+    async def analyze() -> Dict[str, Any]:
+        result, phases = await executor.run(
+            measure_analysis,
+            ContractAnalysis(sorted_contracts),
+            size=len(contracts),
+        )
+        record_phases("analyze_contracts", len(contracts), phases)
+        return result
+
+    if not cache.enabled:
+        result = await analyze()
+    else:
+        result = await cache.get_or_compute(
+            f"{contracts_key(contracts)}:analysis", analyze
+        )
+
+    # contracts are kept in input order
+    analysis: List[Dict[str, Any]] = [{}] * len(order)
+    for position, i in enumerate(order):
+        analysis[i] = result["contracts"][position]
+    analysis_id = analyses.add(result["income"], analysis)
+    request_contracts.observe(len(contracts), handler="analyze_contracts")
+    return analyses.page(analysis_id, offset, limit)
+
+
+@app.get(
+    "/spaceship/analyze/{analysis_id}",
+    summary="Returns a page of an analysis, kept while it is among the last SPACESHIP_MAX_ANALYSES ones used.",
+)
+async def get_analysis(
+    analysis_id: str,
+    offset: int = ANALYSIS_OFFSET,
+    limit: int = ANALYSIS_LIMIT,
+) -> Dict[str, Any]:
+    return analyses.page(analysis_id, offset, limit)
+
+
+@app.get(
+    "/spaceship/cache/stats",
+    summary="Returns the counters of the cache of optimization results.",
+)
+async def cache_stats() -> Dict[str, int]:
+    return cache.stats()
+
+
+@app.get(
+    "/metrics",
+    summary="Returns the metrics of the API in Prometheus text format.",
+    response_class=Response,
+)
+async def get_metrics() -> Response:
+    return Response(content=metrics.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
+
+@app.post(
+    "/spaceship/optimize/stream",
+    summary="Returns the sublist of non-overlapping contracts maximizing the income, "
+    "from contracts streamed as newline-delimited JSON.",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": ContractModel.schema()},
+            },
+            "description": "One contract per line, "
+            "optionally compressed with 'Content-Encoding: gzip'.",
+        }
+    },
+)
+async def optimize_contracts_stream(request: Request) -> Response:
+    # contracts are parsed in a thread while the body is received, both are measured together
+    stopwatch = Stopwatch()
+    reader = NdjsonContractReader(
+        gzipped=request.headers.get("content-encoding", "").lower() == "gzip",
+        max_size=settings.max_stream_bytes,
+    )
+    buffer = bytearray()
+    async for chunk in request.stream():
+        buffer += chunk
+        if len(buffer) >= STREAM_PARSE_BYTES:
+            await asyncio.to_thread(reader.feed, bytes(buffer))
+            buffer.clear()
+    await asyncio.to_thread(reader.feed, bytes(buffer))
+    columns = await asyncio.to_thread(reader.close)
+    stopwatch.lap("parse")
+    optimizer = await asyncio.to_thread(columns_optimizer, columns, 1, 1)
+    stopwatch.lap("convert")
+
+    result, phases, pruned = await executor.run(
+        measure_optimizer, optimizer, size=len(columns)
+    )
+    stopwatch.lap("optimize")
+    response = JSONResponse(content=result)
+    stopwatch.lap("serialize")
+
+    record_phases("optimize_contracts_stream", len(columns), phases, pruned)
+    record_phases("optimize_contracts_stream", len(columns), stopwatch.phases)
+    request_contracts.observe(len(columns), handler="optimize_contracts_stream")
+    return response
+
+
+@app.post(
+    "/spaceship/sessions",
+    status_code=201,
+    summary="Creates a session holding a book of contracts, uniquely identified by name.",
+)
+async def create_session(contracts_model: List[ContractModel]) -> Dict[str, Any]:
+    try:
+        session_id = sessions.create(c.to_contract() for c in contracts_model)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"session_id": session_id, "contracts": len(sessions.get(session_id))}
+
+
+@app.delete(
+    "/spaceship/sessions/{session_id}",
+    status_code=204,
+    summary="Deletes a session and its book of contracts.",
+)
+async def delete_session(session_id: str) -> Response:
+    sessions.delete(session_id)
+    return Response(status_code=204)
+
+
+@app.put(
+    "/spaceship/sessions/{session_id}/contracts",
+    summary="Adds contracts to the book of a session, replacing contracts with the same name.",
+)
+async def update_session_contracts(
+    session_id: str, contracts_model: List[ContractModel]
+) -> Dict[str, Any]:
+    book = sessions.get(session_id)
+    async with sessions.lock(session_id):
+        for c in contracts_model:
+            book.update(c.to_contract())
+    return {"session_id": session_id, "contracts": len(book)}
+
+
+@app.delete(
+    "/spaceship/sessions/{session_id}/contracts/{name}",
+    summary="Removes a contract from the book of a session.",
+)
+async def remove_session_contract(session_id: str, name: str) -> Dict[str, Any]:
+    book = sessions.get(session_id)
+    async with sessions.lock(session_id):
+        try:
+            book.remove(name)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Contract {name} not found")
+    return {"session_id": session_id, "contracts": len(book)}
+
+
+@app.get(
+    "/spaceship/sessions/{session_id}/optimize",
+    summary="Returns the sublist of non-overlapping contracts of the session maximizing the income, "
+    "only recomputing the part of the book changed since the previous call.",
+)
+async def optimize_session(session_id: str) -> Dict[str, Any]:
+    book = sessions.get(session_id)
+    # the book is updated in place by the optimization, it cannot be sent to a worker process
+    async with sessions.lock(session_id):
+        return await asyncio.to_thread(book.optimize)
+
+
+@app.get(
+    "/spaceship/sessions/{session_id}/window",
+    summary="Returns the sublist of non-overlapping contracts of the session maximizing the income, "
+    "among the contracts starting at or after start and ending at or before end.",
+    description="Windows are answered from an index over the book, built on the first query "
+    "and rebuilt after the book changes.",
+)
+async def optimize_session_window(
+    session_id: str,
+    start: int = Query(..., description="Start of the window."),
+    end: int = Query(..., description="End of the window."),
+) -> Dict[str, Any]:
+    book = sessions.get(session_id)
+    try:
+        async with sessions.lock(session_id):
+            return await asyncio.to_thread(book.optimize_window, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.post(
+    "/spaceship/jobs",
+    status_code=202,
+    summary="Submits an optimization run in the background, returns its job id and status.",
+    description="Contracts are sent as for /spaceship/optimize, or taken from a session "
+    "with the 'session_id' query parameter. The job is returned as soon as the body is received: "
+    "contracts are parsed when it starts, and an invalid body makes it fail. Jobs are started "
+    "by ascending submission time plus estimated duration, so that small jobs are not stuck "
+    "behind huge ones.",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": CONTRACTS_BODY_SCHEMA},
+                COLUMNS_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            },
+        },
+    },
+)
+async def submit_job(
+    request: Request,
+    ships: int = Query(1, ge=1, description="Number of ships available."),
+    k: int = Query(
+        1,
+        ge=1,
+        le=settings.max_schedules,
+        description="Number of best schedules returned, for a single ship.",
+    ),
+    session_id: Optional[str] = Query(
+        None, description="Session whose contracts are optimized, instead of the body."
+    ),
+) -> Dict[str, Any]:
+    if ships > 1 and k > 1:
+        raise HTTPException(
+            status_code=422,
+            detail="Several schedules are only computed for a single ship",
+        )
+
+    stopwatch = Stopwatch()
+    read: Callable[[], Tuple[ContractOptimizer, int, str]]
+    if session_id is not None:
+        book = sessions.get(session_id).contracts
+        estimated_size = len(book)
+
+        def read() -> Tuple[ContractOptimizer, int, str]:
+            contracts = [book[i] for i in canonical_order(book)]
+            optimizer = create_optimizer(contracts, ships, k)
+            stopwatch.lap("convert")
+            key = contracts_key(contracts)
+            stopwatch.lap("hash")
+            return optimizer, len(contracts), key
+
+    else:
+        body = await request.body()
+        stopwatch.lap("receive")
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        estimated_size = len(body) // JOB_BYTES_PER_CONTRACT
+
+        def read() -> Tuple[ContractOptimizer, int, str]:
+            return read_optimizer(body, content_type, ships, k, stopwatch)
+
+    async def run_job() -> Dict[str, Any]:
+        # contracts are parsed, converted and hashed once the job starts, off the event loop
+        optimizer, size, key = await asyncio.to_thread(read)
+        record_phases("submit_job", size, stopwatch.phases)
+        request_contracts.observe(size, handler="submit_job")
+
+        async def optimize() -> Dict[str, Any]:
+            result, phases, pruned = await job_executor.run(
+                measure_optimizer, optimizer, size=size * ships
+            )
+            record_phases("submit_job", size, phases, pruned)
+            return result
+
+        if not cache.enabled:
+            return await optimize()
+        return await cache.get_or_compute(f"{key}:{ships}:{k}", optimize)
+
+    return jobs.status(jobs.submit(run_job, estimated_size * ships))
+
+
+@app.get(
+    "/spaceship/jobs/{job_id}",
+    summary="Returns the status of a job: queued with its position, running, done, failed or cancelled.",
+)
+async def get_job(job_id: str) -> Dict[str, Any]:
+    return jobs.status(job_id)
+
+
+@app.get(
+    "/spaceship/jobs/{job_id}/result",
+    summary="Returns the result of a job once done, kept for SPACESHIP_JOB_TTL seconds.",
+)
+async def get_job_result(job_id: str) -> Dict[str, Any]:
+    return jobs.result(job_id)
+
+
+@app.delete(
+    "/spaceship/jobs/{job_id}",
+    summary="Cancels a job queued or running, returns its status.",
+)
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    return jobs.cancel(job_id)
@@ -1,4 +1,4 @@
-from typing import NamedTuple, List
+from typing import Iterator, NamedTuple, List
 
 
 class Contract(NamedTuple):
@@ -31,6 +31,31 @@ class Contract(NamedTuple):
         return self.start <= other.start < self.end or other.start <= self.start < other.end
 
 
+class ContractTemplate(NamedTuple):
+    """Recurring contract, repeated at a fixed period.
+
+    Attributes:
+        name        Label of the template, occurrence i is labelled name#i (numbered from 0).
+        start       Beginning of the period of validity of the first occurrence.
+        duration    Length of the period of validity of each occurrence.
+        price       Weight of each occurrence.
+        period      Time between the beginnings of two consecutive occurrences.
+        repetitions Number of occurrences.
+    """
+    name: str
+    start: int
+    duration: int
+    price: int
+    period: int
+    repetitions: int
+
+    def occurrences(self) -> Iterator[Contract]:
+        """Yields the occurrences of the template lazily, by ascending start if the period is not negative."""
+        name, start, duration, price, period, repetitions = self
+        for i in range(repetitions):
+            yield Contract(f"{name}#{i}", start + i * period, duration, price)
+
+
 class ContractPath(NamedTuple):
     """Ordered set of Contracts.
 
@@ -0,0 +1,155 @@
+import bisect
+import heapq
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from optimizer.contract import Contract
+from optimizer.stopwatch import Stopwatch
+
+
+def range_max(
+    values: npt.NDArray[Any],
+    lefts: npt.NDArray[np.int64],
+    rights: npt.NDArray[np.int64],
+) -> npt.NDArray[Any]:
+    """
+    Returns the maximum of values over each range [lefts[i], rights[i]), all at once with a sparse table.
+    NOTE: ranges must not be empty.
+    :param values: values to search in.
+    :param lefts: first positions of the ranges.
+    :param rights: positions after the last ones of the ranges.
+    :return: the maximum of each range.
+    """
+    lengths = rights - lefts
+    levels = np.zeros(len(lengths), dtype=np.int64)
+    if len(lengths):
+        levels = np.floor(np.log2(lengths)).astype(np.int64)
+
+    # table[k][i] is the maximum of values[i:i + 2**k]
+    table = [values]
+    while 2 ** len(table) <= len(values):
+        previous, half = table[-1], 2 ** (len(table) - 1)
+        table.append(np.maximum(previous[:-half], previous[half:]))
+
+    result = np.empty(len(lengths), dtype=values.dtype)
+    for k in np.unique(levels).tolist():
+        selected = levels == k
+        left, right = lefts[selected], rights[selected] - 2**k
+        result[selected] = np.maximum(table[k][left], table[k][right])
+    return result
+
+
+class ContractAnalysis:
+    """
+    Sensitivity analysis of a set of contracts.
+
+    For each contract c, with contracts sorted by ascending start then duration:
+    - forced in: best income of a schedule containing c, the best income before c (forward DP)
+    plus the price of c plus the best income from its nearest successor (backward DP);
+    - forced out: best income of a schedule without c. Such a schedule either remains valid with c,
+    at most forced_in(c) - price(c), or contains a contract d overlapping c, at most forced_in(d).
+    Contracts overlapping c are the ones starting before c and ending after its start, found by a sweep
+    with a heap, and the ones starting between c and its nearest successor, found by a range maximum;
+    - marginal value: income lost by rejecting c, i.e. best income - forced out.
+    Contracts are compared as in ContractOptimizerFast, so that best incomes match.
+    Time complexity: O(n*log(n)) with n the number of contracts.
+    """
+
+    def __init__(self, contracts: Sequence[Contract]):
+        """
+        :param contracts: contracts to be analyzed.
+        """
+        self.contracts = contracts
+        self.phases: Dict[str, float] = {}
+
+    def analyze(self) -> Dict[str, Any]:
+        """
+        Computes the best incomes with and without each contract.
+        :return: a dictionary with the best income, and for each contract in input order,
+        its name, best incomes with it forced in and forced out, and its marginal value.
+        """
+        stopwatch = Stopwatch()
+        n = len(self.contracts)
+        order = sorted(
+            range(n),
+            key=lambda i: (self.contracts[i].start, self.contracts[i].duration),
+        )
+        starts = [self.contracts[i].start for i in order]
+        prices = [self.contracts[i].price for i in order]
+        successors = [
+            bisect.bisect_left(
+                starts, starts[i] + self.contracts[order[i]].duration, i + 1
+            )
+            for i in range(n)
+        ]
+        stopwatch.lap("sort")
+
+        # backward: best income from each position onwards
+        best_incomes = [0] * (n + 1)
+        for i in reversed(range(n)):
+            best_incomes[i] = max(
+                best_incomes[i + 1], prices[i] + best_incomes[successors[i]]
+            )
+
+        # forward: best income of a schedule ending with each contract, contracts ending before
+        # position i being grouped in linked lists by nearest successor
+        ending_incomes = [0] * n
+        heads = [-1] * (n + 1)
+        next_ending = [-1] * n
+        best_before = 0
+        for i in range(n):
+            j = heads[i]
+            while j != -1:
+                best_before = max(best_before, ending_incomes[j])
+                j = next_ending[j]
+            ending_incomes[i] = best_before + prices[i]
+            next_ending[i] = heads[successors[i]]
+            heads[successors[i]] = i
+
+        forced_in = [ending_incomes[i] + best_incomes[successors[i]] for i in range(n)]
+        stopwatch.lap("dp")
+
+        # best forced in income of the contracts starting before each contract and overlapping it
+        overlapping_before: List[Optional[int]] = [None] * n
+        reaching: List[Tuple[int, int]] = []
+        for i in range(n):
+            while reaching and reaching[0][1] <= i:
+                heapq.heappop(reaching)
+            if reaching:
+                overlapping_before[i] = -reaching[0][0]
+            heapq.heappush(reaching, (-forced_in[i], successors[i]))
+
+        # best forced in income of the contracts starting between each contract and its successor
+        overlapping_after: List[Optional[int]] = [None] * n
+        positions = np.arange(n, dtype=np.int64)
+        successors_array = np.array(successors, dtype=np.int64)
+        overlapped = np.flatnonzero(successors_array > positions + 1)
+        if len(overlapped):
+            maximums = range_max(
+                np.array(forced_in),
+                overlapped + 1,
+                successors_array[overlapped],
+            ).tolist()
+            for i, maximum in zip(overlapped.tolist(), maximums):
+                overlapping_after[i] = maximum
+        stopwatch.lap("overlaps")
+
+        best_income = best_incomes[0]
+        analysis: List[Dict[str, Any]] = [{}] * n
+        for i in range(n):
+            forced_out = forced_in[i] - prices[i]
+            for candidate in (overlapping_before[i], overlapping_after[i]):
+                if candidate is not None and candidate > forced_out:
+                    forced_out = candidate
+            analysis[order[i]] = {
+                "name": self.contracts[order[i]].name,
+                "forced_in": forced_in[i],
+                "forced_out": forced_out,
+                "marginal_value": best_income - forced_out,
+            }
+        stopwatch.lap("merge")
+
+        self.phases = stopwatch.phases
+        return {"income": best_income, "contracts": analysis}
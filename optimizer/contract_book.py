@@ -0,0 +1,173 @@
+import bisect
+from typing import Any, Dict, Iterable, List, Optional
+
+from optimizer.contract import Contract, ContractPath
+from optimizer.stopwatch import Stopwatch
+from optimizer.window_index import ContractWindowIndex
+
+
+class ContractBook:
+    """
+    Mutable set of contracts, uniquely identified by name, with an incrementally maintained optimum.
+
+    Contracts are kept sorted by ascending start then duration, and the best income from each position onwards
+    is stored as in ContractOptimizerFast. Since the best income from a position only depends on
+    contracts starting later, adding or removing a contract starting at t only invalidates positions
+    of contracts starting at or before t: only those are recomputed, lazily on the next query.
+    Time complexity of a query: O(k*log(n)) with k the number of positions invalidated since
+    the previous query and n the number of contracts.
+    Durations of the phases of the last query are available in the phases attribute.
+    Queries restricted to a time window use a ContractWindowIndex, built on the first one
+    and rebuilt after the book changes.
+    """
+
+    def __init__(self, contracts: Iterable[Contract] = ()):
+        """
+        Initializes the book with a first set of contracts.
+        :param contracts: initial contracts of the book.
+        :raises ValueError if several contracts have the same name.
+        """
+        self._contracts: Dict[str, Contract] = {}
+        for contract in contracts:
+            if contract.name in self._contracts:
+                raise ValueError(f"Duplicate contract {contract.name}")
+            self._contracts[contract.name] = contract
+
+        ordered = sorted(self._contracts.values(), key=lambda c: (c.start, c.duration))
+        self._starts = [c.start for c in ordered]
+        self._ends = [c.start + c.duration for c in ordered]
+        self._prices = [c.price for c in ordered]
+        self._names = [c.name for c in ordered]
+
+        # best income from each position onwards, and whether the contract is taken
+        self._best_incomes = [0] * (len(ordered) + 1)
+        self._taken = bytearray(len(ordered))
+        # all positions lower than or equal to this one must be recomputed
+        self._dirty = len(ordered) - 1
+        self.recomputed = 0
+        self.phases: Dict[str, float] = {}
+        self._window_index: Optional[ContractWindowIndex] = None
+
+    def __len__(self) -> int:
+        return len(self._contracts)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._contracts
+
+    @property
+    def contracts(self) -> List[Contract]:
+        """Returns the contracts of the book, sorted by ascending start then duration."""
+        return [self._contracts[name] for name in self._names]
+
+    def add(self, contract: Contract) -> None:
+        """
+        Adds a contract to the book.
+        :param contract: contract to be added.
+        :raises ValueError if a contract with the same name already exists.
+        """
+        if contract.name in self._contracts:
+            raise ValueError(f"Duplicate contract {contract.name}")
+
+        self._contracts[contract.name] = contract
+        end = contract.start + contract.duration
+        # among contracts with the same start, ends are sorted as durations
+        position = bisect.bisect_right(
+            self._ends,
+            end,
+            bisect.bisect_left(self._starts, contract.start),
+            bisect.bisect_right(self._starts, contract.start),
+        )
+        self._starts.insert(position, contract.start)
+        self._ends.insert(position, end)
+        self._prices.insert(position, contract.price)
+        self._names.insert(position, contract.name)
+        self._best_incomes.insert(position, 0)
+        self._taken.insert(position, 0)
+
+        self._window_index = None
+        self._dirty = max(self._dirty + (self._dirty >= position), position)
+
+    def remove(self, name: str) -> Contract:
+        """
+        Removes a contract from the book.
+        :param name: name of the contract to be removed.
+        :return: the contract removed.
+        :raises KeyError if no contract has this name.
+        """
+        contract = self._contracts.pop(name)
+        position = bisect.bisect_left(
+            self._ends,
+            contract.start + contract.duration,
+            bisect.bisect_left(self._starts, contract.start),
+            bisect.bisect_right(self._starts, contract.start),
+        )
+        while self._names[position] != name:
+            position += 1
+
+        del self._starts[position]
+        del self._ends[position]
+        del self._prices[position]
+        del self._names[position]
+        del self._best_incomes[position]
+        del self._taken[position]
+
+        self._window_index = None
+        self._dirty = max(self._dirty - (self._dirty >= position), position - 1)
+        return contract
+
+    def update(self, contract: Contract) -> None:
+        """
+        Adds a contract to the book or replaces the contract with the same name.
+        :param contract: contract to be added or replaced.
+        """
+        if contract.name in self._contracts:
+            self.remove(contract.name)
+        self.add(contract)
+
+    def optimize(self) -> Dict[str, Any]:
+        """
+        Recomputes invalidated positions and returns the path maximizing the total price.
+        :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
+        """
+        stopwatch = Stopwatch()
+        self._recompute()
+        stopwatch.lap("dp")
+
+        path: List[str] = []
+        i = self._taken.find(1)
+        while i != -1:
+            path.append(self._names[i])
+            i = self._taken.find(1, self._nearest_successor(i))
+        stopwatch.lap("path")
+
+        self.phases = stopwatch.phases
+        return ContractPath(income=self._best_incomes[0], path=path)._asdict()
+
+    def optimize_window(self, start: int, end: int) -> Dict[str, Any]:
+        """
+        Returns the path maximizing the total price among the contracts within a time window.
+        :param start: start of the window.
+        :param end: end of the window.
+        :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
+        :raises ValueError if the window ends before its start.
+        """
+        if self._window_index is None:
+            self._window_index = ContractWindowIndex(list(self._contracts.values()))
+        return self._window_index.query(start, end)
+
+    def _nearest_successor(self, index: int) -> int:
+        return bisect.bisect_left(self._starts, self._ends[index], index + 1)
+
+    def _recompute(self) -> None:
+        best_incomes, taken, prices = self._best_incomes, self._taken, self._prices
+        for i in range(self._dirty, -1, -1):
+            income = prices[i] + best_incomes[self._nearest_successor(i)]
+            if income > best_incomes[i + 1]:
+                best_incomes[i] = income
+                taken[i] = 1
+            else:
+                best_incomes[i] = best_incomes[i + 1]
+                taken[i] = 0
+
+        self.recomputed += self._dirty + 1
+        self._dirty = -1
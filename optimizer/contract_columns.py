@@ -0,0 +1,113 @@
+from typing import Iterator, List, Sequence, Union, overload
+
+import numpy as np
+import numpy.typing as npt
+
+from optimizer.contract import Contract
+
+
+class TakenNames(Sequence[str]):
+    """Names of a subset of contracts, read from the names of all contracts on access only."""
+
+    def __init__(self, names: Sequence[str], positions: npt.NDArray[np.int64]):
+        """
+        :param names: names of all contracts.
+        :param positions: positions of the contracts of the subset among all contracts.
+        """
+        self._names = names
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._names[int(self._positions[index])]
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class ContractColumns:
+    """Columnar representation of a set of contracts.
+
+    Attributes:
+        names       Labels of the contracts.
+        start       Beginnings of the contracts periods of validity (int64 array).
+        duration    Lengths of the contracts periods of validity (int64 array).
+        price       Weights of the contracts (int64 array).
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        start: npt.ArrayLike,
+        duration: npt.ArrayLike,
+        price: npt.ArrayLike,
+    ):
+        """
+        Builds the columns, arrays are converted to int64 without copy when possible.
+        :raises ValueError if columns do not have the same length.
+        """
+        self.names = names
+        self.start: npt.NDArray[np.int64] = np.asarray(start, dtype=np.int64)
+        self.duration: npt.NDArray[np.int64] = np.asarray(duration, dtype=np.int64)
+        self.price: npt.NDArray[np.int64] = np.asarray(price, dtype=np.int64)
+
+        n = len(self.names)
+        if not (len(self.start) == len(self.duration) == len(self.price) == n):
+            raise ValueError("Contract columns must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def end(self) -> npt.NDArray[np.int64]:
+        """Returns the ends of the contracts periods of validity."""
+        return self.start + self.duration
+
+    @classmethod
+    def from_contracts(cls, contracts: Sequence[Contract]) -> "ContractColumns":
+        """
+        Returns the columnar representation of a list of contracts.
+        :param contracts: list of contracts to be converted.
+        """
+        if not contracts:
+            return cls([], [], [], [])
+
+        names, starts, durations, prices = zip(*contracts)
+        return cls(list(names), starts, durations, prices)
+
+    def take(self, positions: npt.NDArray[np.int64]) -> "ContractColumns":
+        """
+        Returns a subset of the contracts, without decoding nor copying their names.
+        :param positions: positions of the contracts of the subset.
+        """
+        return ContractColumns(
+            TakenNames(self.names, positions),
+            self.start[positions],
+            self.duration[positions],
+            self.price[positions],
+        )
+
+    def to_contracts(self) -> List[Contract]:
+        """Returns the list of contracts represented by the columns."""
+        return [
+            Contract(name=name, start=start, duration=duration, price=price)
+            for name, start, duration, price in zip(
+                self.names,
+                self.start.tolist(),
+                self.duration.tolist(),
+                self.price.tolist(),
+            )
+        ]
@@ -1,7 +1,16 @@
 import math
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Protocol
 
 from optimizer.contract import Contract, ContractPath
+from optimizer.stopwatch import Stopwatch
+
+
+class ContractOptimizer(Protocol):
+    """Interface shared by all contract optimizers."""
+
+    def optimize(self) -> Dict[str, Any]:
+        """Returns a dictionary with the best path of contracts and its income."""
+        ...
 
 
 class ContractOptimizerNaive:
@@ -130,19 +139,25 @@ class ContractOptimizerFast:
     """
     Entry class for contract optimization.
 
-    Iterates over the list of contracts sorted by ascending start.
-    For each contract, find the closest successor and store the best path found SO FAR:
-    - if no closest successor found: best path with current contract is the sublist of contract itself;
-    - if closest successor found: best path with current contract is the sublist of contract +
-    best path of the closest successor.
-    - if best path with contract has a lower income than best path without contract,
-    store previous best path for the current contract instead.
-    Result is the best path with the maximum income.
+    Iterates over the list of contracts sorted by ascending start, then ascending duration:
+    contracts with zero duration come before the others starting at their time,
+    so that they are compatible with all contracts ending or starting at their time, in any input order.
+    For each contract, find the closest successor and store the best income found SO FAR:
+    - if no closest successor found: best income with current contract is the price of contract itself;
+    - if closest successor found: best income with current contract is the price of contract +
+    best income of the closest successor.
+    - if best income with contract is lower than best income without contract,
+    store previous best income for the current contract instead.
+    Only the decision to take the contract or not is stored for each position:
+    the best path is rebuilt once at the end by following the closest successors of taken contracts.
+    Durations of the phases of the last optimization are available in the phases attribute.
     Time complexity: O(n*log(n)) with n the number of contracts.
+    Space complexity: O(n).
     """
 
     def __init__(self, contracts: List[Contract]):
         self.contracts = contracts
+        self.phases: Dict[str, float] = {}
 
     @staticmethod
     def find_nearest_successor(contracts: List[Contract], index: int) -> int:
@@ -175,45 +190,47 @@ class ContractOptimizerFast:
         Iterates over current contracts to find the path maximizing the total price.
         :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
         """
+        stopwatch = Stopwatch()
         n = len(self.contracts)
-        self.contracts = sorted(self.contracts, key=lambda c: c.start)
+        self.contracts = sorted(self.contracts, key=lambda c: (c.start, c.duration))
+        stopwatch.lap("sort")
 
-        # keeps track of intermediate results:
-        # best path for contract c[i] is the path with maximum income among:
-        # - best path with c[i] = c[i] + best path of nearest successor of c[i]
-        # - best path without c[i] = best path of last known contract c[i+1]
-        best_path_by_contract: Dict[str, ContractPath] = {}
+        # keeps track of intermediate results by position:
+        # best income from c[i] is the maximum income among:
+        # - best income with c[i] = c[i] + best income of nearest successor of c[i]
+        # - best income without c[i] = best income of next contract c[i+1]
+        best_incomes = [0] * (n + 1)
+        nearest_successors = [n] * n
+        taken = [False] * n
 
         # for each contract ci, find best successor cj
         for i in reversed(range(n)):
-            ci = self.contracts[i]
-            current_income, current_path = ci.price, [ci.name]
-
-            # best path of last known contract c[i+1]
-            best_contract_path = (
-                best_path_by_contract[self.contracts[i + 1].name] if i < n - 1 else None
-            )
-            best_income = best_contract_path.income if best_contract_path else 0
+            current_income = self.contracts[i].price
 
             # find closest successor of ci to form the best possible path with ci
             nearest_successor_id = self.find_nearest_successor(self.contracts, i)
             if nearest_successor_id != -1:
-                nearest_successor = best_path_by_contract[
-                    self.contracts[nearest_successor_id].name
-                ]
-                current_income += nearest_successor.income
-                current_path += nearest_successor.path
-
-            # compare best possible path with ci & best path without ci
-            if current_income > best_income:
-                best_contract_path = ContractPath(
-                    income=current_income, path=current_path
-                )
+                nearest_successors[i] = nearest_successor_id
+                current_income += best_incomes[nearest_successor_id]
 
-            # store best price & path for ci
-            best_path_by_contract[ci.name] = best_contract_path     # type: ignore
+            # compare best possible income with ci & best income without ci
+            if current_income > best_incomes[i + 1]:
+                best_incomes[i] = current_income
+                taken[i] = True
+            else:
+                best_incomes[i] = best_incomes[i + 1]
+        stopwatch.lap("dp")
+
+        # rebuild best path from the first contract
+        path: List[str] = []
+        i = 0
+        while i < n:
+            if taken[i]:
+                path.append(self.contracts[i].name)
+                i = nearest_successors[i]
+            else:
+                i += 1
+        stopwatch.lap("path")
 
-        best_contract = max(
-            best_path_by_contract, key=lambda c: best_path_by_contract[c].income
-        )
-        return best_path_by_contract[best_contract]._asdict()
+        self.phases = stopwatch.phases
+        return ContractPath(income=best_incomes[0], path=path)._asdict()
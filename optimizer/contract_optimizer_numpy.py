@@ -0,0 +1,97 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from optimizer.contract import Contract, ContractPath
+from optimizer.contract_columns import ContractColumns
+from optimizer.stopwatch import Stopwatch
+
+
+def find_nearest_successors(
+    start: npt.NDArray[np.int64], end: npt.NDArray[np.int64]
+) -> npt.NDArray[np.int64]:
+    """
+    Returns, for every contract, the position of its closest successor, len(start) if not found.
+    Vectorized equivalent of ContractOptimizerFast.find_nearest_successor.
+    NOTE: contracts should be properly sorted by ascending start.
+    :param start: beginnings of the contracts.
+    :param end: ends of the contracts.
+    :return: positions of the next non-overlapping contracts.
+    """
+    n = len(start)
+    successors = np.searchsorted(start, end, side="left").astype(np.int64)
+    # a successor is always searched after the current contract (matters for empty durations)
+    return np.maximum(successors, np.arange(1, n + 1, dtype=np.int64))
+
+
+class ContractOptimizerNumpy:
+    """
+    Entry class for contract optimization on columnar data.
+
+    Same algorithm as ContractOptimizerFast, working on int64 arrays instead of Contract objects:
+    - contracts are ordered by ascending start then duration with a stable sort;
+    - nearest successors of all contracts are found with a single vectorized binary search;
+    - best incomes are computed backwards, only keeping for each position whether
+    the contract is taken or not, the best path is rebuilt once at the end.
+    Durations of the phases of the last optimization are available in the phases attribute.
+    Time complexity: O(n*log(n)) with n the number of contracts.
+    """
+
+    def __init__(self, contracts: Sequence[Contract]):
+        self.columns = ContractColumns.from_contracts(contracts)
+        self.phases: Dict[str, float] = {}
+
+    @classmethod
+    def from_columns(cls, columns: ContractColumns) -> "ContractOptimizerNumpy":
+        """
+        Returns an optimizer working directly on columnar contracts, without building any Contract.
+        :param columns: contracts to be optimized.
+        """
+        optimizer = cls.__new__(cls)
+        optimizer.columns = columns
+        optimizer.phases = {}
+        return optimizer
+
+    def optimize(self) -> Dict[str, Any]:
+        """
+        Iterates over current contracts to find the path maximizing the total price.
+        :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
+        """
+        stopwatch = Stopwatch()
+        n = len(self.columns)
+        order = np.lexsort((self.columns.duration, self.columns.start))
+        start = self.columns.start[order]
+        end = start + self.columns.duration[order]
+        stopwatch.lap("sort")
+
+        successors = find_nearest_successors(start, end).tolist()
+        prices = self.columns.price[order].tolist()
+        stopwatch.lap("successors")
+
+        # best[i] is the maximum income using contracts from position i onwards,
+        # taken[i] tells whether contract i belongs to the best path from position i
+        best = [0] * (n + 1)
+        taken = bytearray(n)
+        for i in reversed(range(n)):
+            income = prices[i] + best[successors[i]]
+            if income > best[i + 1]:
+                best[i] = income
+                taken[i] = 1
+            else:
+                best[i] = best[i + 1]
+        stopwatch.lap("dp")
+
+        path: List[str] = []
+        indexes = order.tolist()
+        i = 0
+        while i < n:
+            if taken[i]:
+                path.append(self.columns.names[indexes[i]])
+                i = successors[i]
+            else:
+                i += 1
+        stopwatch.lap("path")
+
+        self.phases = stopwatch.phases
+        return ContractPath(income=best[0], path=path)._asdict()
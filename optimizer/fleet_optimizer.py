@@ -0,0 +1,196 @@
+import bisect
+import heapq
+from typing import Any, Dict, List, Sequence
+
+from optimizer.contract import Contract
+from optimizer.stopwatch import Stopwatch
+
+
+class ContractFleetOptimizer:
+    """
+    Entry class for contract optimization on a fleet of identical ships.
+
+    Solved as a min-cost flow over the compressed time points of the contracts:
+    - consecutive time points are linked by an idle edge of capacity k (number of ships) and cost 0;
+    - each contract links its start to its end with an edge of capacity 1 and cost -price;
+    - contracts with zero duration are compatible with all contracts ending or starting at their time,
+      so all of them with a positive price are collected by any ship at their time point: it is split
+      in two nodes, linked by an edge of capacity 1 and cost -(sum of their prices) and another one
+      of capacity k and cost 0;
+    - k units of flow, one per ship, are sent from the first to the last time point.
+    Units are sent one by one along the shortest path of the residual graph (Dijkstra with potentials,
+    initialized by a linear pass since the graph is acyclic), stopping early when no path is profitable.
+    Contracts carrying flow are then assigned to ships by a greedy interval partitioning.
+    Contracts with a negative duration or a non-positive price are never scheduled.
+    Durations of the phases of the last optimization are available in the phases attribute.
+    Time complexity: O(k*n*log(n)) with n the number of contracts and k the number of ships.
+    """
+
+    def __init__(self, contracts: Sequence[Contract], ships: int):
+        """
+        :param contracts: contracts to be scheduled.
+        :param ships: number of ships available.
+        :raises ValueError if the number of ships is not positive.
+        """
+        if ships < 1:
+            raise ValueError(f"Number of ships must be positive, got {ships}")
+
+        self.contracts = contracts
+        self.ships = ships
+        self.phases: Dict[str, float] = {}
+
+    def optimize(self) -> Dict[str, Any]:
+        """
+        Finds the non-overlapping paths of contracts, one per ship, maximizing the total price.
+        :return: a dictionary with the sublists of optimized contracts and the maximum total income.
+        """
+        stopwatch = Stopwatch()
+        contracts = [c for c in self.contracts if c.duration >= 0 and c.price > 0]
+        times = sorted({c.start for c in contracts} | {c.end for c in contracts})
+        bonuses = [0] * len(times)
+        for contract in contracts:
+            if contract.duration == 0:
+                bonuses[bisect.bisect_left(times, contract.start)] += contract.price
+
+        # nodes entering and leaving each time point, the same one without bonus
+        nodes_in, nodes_out = [], []
+        nb_nodes = 0
+        for bonus in bonuses:
+            nodes_in.append(nb_nodes)
+            nb_nodes += 1 if bonus else 0
+            nodes_out.append(nb_nodes)
+            nb_nodes += 1
+
+        # residual graph as flat edge lists, edge e ^ 1 is the reverse of edge e
+        heads: List[int] = []
+        capacities: List[int] = []
+        costs: List[int] = []
+        adjacency: List[List[int]] = [[] for _ in range(nb_nodes)]
+
+        def add_edge(tail: int, head: int, capacity: int, cost: int) -> None:
+            adjacency[tail].append(len(heads))
+            heads.append(head)
+            capacities.append(capacity)
+            costs.append(cost)
+            adjacency[head].append(len(heads))
+            heads.append(tail)
+            capacities.append(0)
+            costs.append(-cost)
+
+        bonus_edges = {}
+        for i, bonus in enumerate(bonuses):
+            if bonus:
+                bonus_edges[times[i]] = len(heads)
+                add_edge(nodes_in[i], nodes_out[i], 1, -bonus)
+                add_edge(nodes_in[i], nodes_out[i], self.ships, 0)
+            if i + 1 < len(times):
+                add_edge(nodes_out[i], nodes_in[i + 1], self.ships, 0)
+        contract_edges = []
+        for contract in contracts:
+            if contract.duration == 0:
+                contract_edges.append(bonus_edges[contract.start])
+                continue
+            contract_edges.append(len(heads))
+            add_edge(
+                nodes_out[bisect.bisect_left(times, contract.start)],
+                nodes_in[bisect.bisect_left(times, contract.end)],
+                1,
+                -contract.price,
+            )
+
+        stopwatch.lap("graph")
+
+        income = 0
+        if nb_nodes:
+            income = self._send_flow(heads, capacities, costs, adjacency)
+        stopwatch.lap("flow")
+
+        chosen = [c for c, e in zip(contracts, contract_edges) if capacities[e] == 0]
+        paths = self._assign_ships(chosen)
+        stopwatch.lap("assign")
+
+        self.phases = stopwatch.phases
+        return {"income": income, "paths": paths}
+
+    def _send_flow(
+        self,
+        heads: List[int],
+        capacities: List[int],
+        costs: List[int],
+        adjacency: List[List[int]],
+    ) -> int:
+        nb_nodes = len(adjacency)
+        source, sink = 0, nb_nodes - 1
+
+        # initial potentials: shortest distances in the acyclic graph, nodes being in time order
+        potentials = [0] * nb_nodes
+        for node in range(nb_nodes):
+            for e in adjacency[node]:
+                if (
+                    capacities[e] > 0
+                    and potentials[node] + costs[e] < potentials[heads[e]]
+                ):
+                    potentials[heads[e]] = potentials[node] + costs[e]
+
+        total_cost = 0
+        for _ in range(self.ships):
+            # Dijkstra on reduced costs, stopped as soon as the sink is reached
+            distances = [-1] * nb_nodes
+            tentative = {source: 0}
+            parents = [-1] * nb_nodes
+            queue = [(0, source)]
+            while queue:
+                distance, node = heapq.heappop(queue)
+                if distances[node] != -1:
+                    continue
+                distances[node] = distance
+                if node == sink:
+                    break
+                node_potential = potentials[node]
+                for e in adjacency[node]:
+                    if capacities[e] <= 0:
+                        continue
+                    head = heads[e]
+                    if distances[head] != -1:
+                        continue
+                    candidate = distance + costs[e] + node_potential - potentials[head]
+                    if candidate < tentative.get(head, candidate + 1):
+                        tentative[head] = candidate
+                        parents[head] = e
+                        heapq.heappush(queue, (candidate, head))
+
+            sink_distance = distances[sink]
+            path_cost = sink_distance + potentials[sink] - potentials[source]
+            if sink_distance == -1 or path_cost >= 0:
+                break
+
+            # nodes not settled are at least as far as the sink: keeps reduced costs non-negative
+            for node in range(nb_nodes):
+                distance = distances[node]
+                potentials[node] += (
+                    distance
+                    if distance != -1 and distance < sink_distance
+                    else sink_distance
+                )
+
+            node = sink
+            while node != source:
+                e = parents[node]
+                capacities[e] -= 1
+                capacities[e ^ 1] += 1
+                node = heads[e ^ 1]
+            total_cost += path_cost
+
+        return -total_cost
+
+    def _assign_ships(self, contracts: List[Contract]) -> List[List[str]]:
+        # at most k chosen contracts overlap at any time, and less than k cross the time
+        # of a chosen contract with zero duration, so a free ship is always found
+        paths: List[List[str]] = [[] for _ in range(self.ships)]
+        free_ships = [(-1 << 63, ship) for ship in range(self.ships)]
+        for contract in sorted(contracts, key=lambda c: (c.start, c.duration)):
+            free_time, ship = heapq.heappop(free_ships)
+            assert free_time <= contract.start
+            paths[ship].append(contract.name)
+            heapq.heappush(free_ships, (contract.end, ship))
+        return paths
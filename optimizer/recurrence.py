@@ -0,0 +1,84 @@
+import heapq
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+from optimizer.contract import Contract, ContractTemplate
+from optimizer.contract_optimizer import ContractOptimizer, ContractOptimizerFast
+from optimizer.stopwatch import Stopwatch
+
+
+def merge_occurrences(
+    contracts: Sequence[Contract], templates: Sequence[ContractTemplate]
+) -> Iterator[Contract]:
+    """
+    Yields contracts and the occurrences of recurring templates by ascending start, then duration.
+    Occurrences of a template are already sorted: they are expanded lazily and merged with the sorted
+    contracts by a k-way merge, instead of being materialized then sorted together.
+    On equal starts and durations, contracts come first, then occurrences in template order.
+    NOTE: periods of the templates must not be negative.
+    Time complexity: O(n*log(n) + m*log(t)) with n the number of contracts,
+    m the number of occurrences and t the number of templates.
+    :param contracts: contracts, in any order.
+    :param templates: recurring templates.
+    :return: an iterator over all contracts, sorted by start then duration.
+    """
+    key = attrgetter("start", "duration")
+    return heapq.merge(
+        sorted(contracts, key=key), *(t.occurrences() for t in templates), key=key
+    )
+
+
+def count_occurrences(templates: Sequence[ContractTemplate]) -> int:
+    """Returns the total number of occurrences of recurring templates."""
+    return sum(max(0, t.repetitions) for t in templates)
+
+
+class ContractOptimizerRecurring:
+    """
+    Entry class for contract optimization with recurring templates.
+
+    Templates are only expanded at optimization, in the worker running it: contracts and occurrences
+    are merged by ascending start by merge_occurrences, then optimized by another optimizer.
+    Occurrences are named name#i in the path, i being their number from 0.
+    Optimizers sorting their input by start then duration, like ContractOptimizerFast, only check the order
+    of the merged contracts in linear time.
+    After optimization, durations of the phases, the ones of the other optimizer included,
+    are available in the phases attribute, and the number of contracts pruned by the other optimizer,
+    if it prunes them, in the pruned attribute.
+    Time complexity: O(n*log(n) + m*log(t)) with n the number of contracts, m the number of occurrences
+    and t the number of templates, plus the optimization of the merged contracts.
+    """
+
+    def __init__(
+        self,
+        contracts: Sequence[Contract],
+        templates: Sequence[ContractTemplate],
+        optimizer_class: Callable[
+            [List[Contract]], ContractOptimizer
+        ] = ContractOptimizerFast,
+    ):
+        """
+        :param contracts: contracts to be optimized.
+        :param templates: recurring templates whose occurrences are optimized with the contracts.
+        :param optimizer_class: optimizer of the merged contracts (defaults to ContractOptimizerFast).
+        """
+        self.contracts = contracts
+        self.templates = templates
+        self.optimizer_class = optimizer_class
+        self.pruned = 0
+        self.phases: Dict[str, float] = {}
+
+    def optimize(self) -> Dict[str, Any]:
+        """
+        Merges the contracts with the occurrences of the templates, then optimizes them.
+        :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
+        """
+        stopwatch = Stopwatch()
+        contracts = list(merge_occurrences(self.contracts, self.templates))
+        stopwatch.lap("merge")
+
+        optimizer = self.optimizer_class(contracts)
+        result = optimizer.optimize()
+        self.pruned = getattr(optimizer, "pruned", 0)
+        self.phases = {**stopwatch.phases, **getattr(optimizer, "phases", {})}
+        return result
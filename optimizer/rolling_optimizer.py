@@ -0,0 +1,199 @@
+import heapq
+import itertools
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from optimizer.contract import Contract, ContractPath
+from optimizer.stopwatch import Stopwatch
+
+# node of a best path, linked to the previous one and shared by the paths extending it:
+# [name of the contract, previous node, number of nodes, income of the path],
+# name and previous node being both None once the node is committed
+_Node = List[Any]
+
+
+def _path_names(node: Optional[_Node]) -> List[str]:
+    names = []
+    while node is not None:
+        if node[0] is not None:
+            names.append(node[0])
+        node = node[1]
+    names.reverse()
+    return names
+
+
+def _common_ancestor(heads: List[Optional[_Node]]) -> Optional[_Node]:
+    # last node shared by all paths, None if there is none
+    if not heads or any(head is None for head in heads):
+        return None
+    depth = min(head[2] for head in heads if head is not None)
+    nodes: Dict[int, _Node] = {}
+    for head in heads:
+        node = head
+        while node is not None and node[2] > depth:
+            node = node[1]
+        if node is None:
+            return None
+        nodes[id(node)] = node
+    while len(nodes) > 1:
+        parents = [node[1] for node in nodes.values()]
+        if any(parent is None for parent in parents):
+            return None
+        nodes = {id(parent): parent for parent in parents}
+    return next(iter(nodes.values()))
+
+
+class ContractOptimizerRolling:
+    """
+    Entry class for online contract optimization of a feed of contracts ordered by start.
+
+    Contracts are pushed one at a time by ascending start, and the DP runs forwards along time:
+    - the best income up to the current time is the best one among the contracts ended so far;
+    - a contract gets its best income when it starts: its price added to the best income up to its start.
+    Contracts started but not ended yet are pending in a heap by end, until the time passes their end.
+    Contracts with zero duration are compatible with all contracts ending or starting at their time,
+    so all of them with a positive price are added to the best income at their time.
+    Best paths are linked lists shared by the pending contracts. Every path found later extends
+    the best path up to the current time or the one of a pending contract, so their common prefix
+    can no longer change: it is committed, returned by push, and its nodes are freed.
+    It is the whole best path at points in time that no pending contract crosses, and is otherwise
+    searched once every CHECK_INTERVAL contracts, plus the number of pending ones.
+    Memory depends on the pending contracts and the ones since their paths diverged,
+    not on the length of the feed.
+    NOTE: contracts starting at the current time are only settled when a later start is pushed,
+    or when the feed is closed.
+    After optimization, the income of the committed path is available in the committed_income attribute,
+    the maximum number of contracts pending at once in the max_pending attribute,
+    and the durations of the phases in the phases attribute.
+    Time complexity: O(n*log(p)) with n the number of contracts and p the maximum number of pending contracts,
+    when paths diverge over less than CHECK_INTERVAL contracts.
+    """
+
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, contracts: Iterable[Contract] = ()):
+        """
+        :param contracts: contracts optimized by optimize, ordered by ascending start (defaults to none).
+        """
+        self.contracts = contracts
+        self.committed_income = 0
+        self.max_pending = 0
+        self.phases: Dict[str, float] = {}
+        self._time: Optional[int] = None
+        self._group: List[Contract] = []
+        self._income = 0
+        self._best_income = 0
+        self._path: Optional[_Node] = None
+        # (end, arrival order, node of the contract on its best path)
+        self._pending: List[Tuple[int, int, _Node]] = []
+        self._order = itertools.count()
+        self._unchecked = 0
+
+    @property
+    def best_income(self) -> int:
+        """Returns the best income of the contracts settled so far, the pending ones included."""
+        return self._best_income
+
+    def push(self, contract: Contract) -> List[str]:
+        """
+        Adds the next contract of the feed.
+        :param contract: contract starting at or after the previous one.
+        :return: the names of the contracts of the best path committed by this contract, often none.
+        :raises ValueError if the contract starts before the previous one.
+        """
+        if self._time is not None and contract.start < self._time:
+            raise ValueError(
+                f"Contract {contract.name} starts before the previous one ({contract.start} < {self._time})"
+            )
+        committed = []
+        if contract.start != self._time:
+            committed = self._settle()
+            self._time = contract.start
+        self._group.append(contract)
+        return committed
+
+    def close(self) -> List[str]:
+        """
+        Ends the feed: all pending contracts are settled, and the optimizer is reset for another feed.
+        :return: the names of the contracts of the best path not committed yet.
+        """
+        committed = self._settle()
+        income, path = self._income, self._path
+        while self._pending:
+            node = heapq.heappop(self._pending)[2]
+            if node[3] > income:
+                income, path = node[3], node
+        committed += self._commit(path)
+        self.committed_income = income
+
+        self._time = None
+        self._income = self._best_income = 0
+        self._path = None
+        self._unchecked = 0
+        return committed
+
+    def _commit(self, node: Optional[_Node]) -> List[str]:
+        # names of the path up to the node not committed yet, the node is kept as the new first one
+        if node is None:
+            return []
+        names = _path_names(node)
+        self.committed_income = node[3]
+        node[0] = node[1] = None
+        return names
+
+    def _settle(self) -> List[str]:
+        # moves the best income up to the current time, then adds the contracts starting at it
+        if self._time is None:
+            return []
+        time, pending = self._time, self._pending
+        income, path = self._income, self._path
+        while pending and pending[0][0] <= time:
+            node = heapq.heappop(pending)[2]
+            if node[3] > income:
+                income, path = node[3], node
+        for contract in self._group:
+            if contract.duration == 0 and contract.price > 0:
+                income += contract.price
+                path = [contract.name, path, 1 + (path[2] if path else 0), income]
+
+        committed = []
+        if not pending:
+            # no contract crosses the current time
+            committed = self._commit(path)
+            self._unchecked = 0
+
+        best_income = max(self._best_income, income)
+        depth = 1 + (path[2] if path else 0)
+        for contract in self._group:
+            if contract.duration > 0 and contract.price > 0:
+                candidate = income + contract.price
+                node = [contract.name, path, depth, candidate]
+                heapq.heappush(pending, (contract.end, next(self._order), node))
+                best_income = max(best_income, candidate)
+        self.max_pending = max(self.max_pending, len(pending))
+
+        self._unchecked += len(self._group)
+        if self._unchecked >= self.CHECK_INTERVAL + len(pending):
+            self._unchecked = 0
+            ancestor = _common_ancestor([path] + [entry[2] for entry in pending])
+            if ancestor is not None and ancestor[0] is not None:
+                committed += self._commit(ancestor)
+
+        self._group = []
+        self._income, self._path, self._best_income = income, path, best_income
+        return committed
+
+    def optimize(self) -> Dict[str, Any]:
+        """
+        Pushes all contracts, then closes the feed to find the path maximizing the total price.
+        :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
+        :raises ValueError if contracts are not ordered by ascending start.
+        """
+        stopwatch = Stopwatch()
+        path = []
+        for contract in self.contracts:
+            path += self.push(contract)
+        path += self.close()
+        stopwatch.lap("dp")
+
+        self.phases = stopwatch.phases
+        return ContractPath(income=self.committed_income, path=path)._asdict()
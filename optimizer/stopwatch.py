@@ -0,0 +1,47 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# listener of the phases ended by the stopwatches of each thread, e.g. a profiler
+_listeners = threading.local()
+
+
+class Stopwatch:
+    """
+    Measures the duration of consecutive phases of a computation, reading the clock once per phase.
+    Durations of phases with the same name are added up.
+    """
+
+    def __init__(self) -> None:
+        """Starts the first phase."""
+        self.phases: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    @staticmethod
+    def listener() -> Optional[Callable[[str], None]]:
+        """Returns the listener of the phases ended in the current thread, None if unset."""
+        listener: Optional[Callable[[str], None]] = getattr(_listeners, "on_lap", None)
+        return listener
+
+    @staticmethod
+    def set_listener(listener: Optional[Callable[[str], None]]) -> None:
+        """
+        Sets the function called with the name of each phase ended by any stopwatch of the current thread,
+        so that computations of other threads are never reported to it.
+        :param listener: function called after each lap, None to remove it.
+        """
+        _listeners.on_lap = listener
+
+    def lap(self, phase: str) -> None:
+        """
+        Ends the current phase, and starts the next one.
+        :param phase: name of the phase being ended.
+        """
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+        listener = getattr(_listeners, "on_lap", None)
+        if listener is not None:
+            listener(phase)
+            # the listener is not part of the next phase
+            self._last = time.perf_counter()
@@ -0,0 +1,210 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from optimizer.contract import Contract, ContractPath
+from optimizer.contract_columns import ContractColumns
+from optimizer.contract_optimizer import ContractOptimizer, ContractOptimizerFast
+from optimizer.contract_optimizer_numpy import ContractOptimizerNumpy
+from optimizer.stopwatch import Stopwatch
+
+# contracts spanning at most this many time units per contract are optimized along the time axis,
+# when they are enough to amortize the numpy overhead
+MAX_SPAN_PER_CONTRACT = 16
+MIN_TIME_AXIS_CONTRACTS = 100
+
+
+def counting_argsort(
+    keys: npt.NDArray[np.integer[Any]], nb_keys: int
+) -> npt.NDArray[np.int64]:
+    """
+    Returns the stable argsort of integer keys in [0, nb_keys), in O(n*log(nb_keys)/16) time
+    with n the number of keys: keys are sorted by digits of 16 bits, from the least significant one,
+    each pass being a counting sort (numpy sorts 16-bit integers with a radix sort).
+    :param keys: keys to be sorted.
+    :param nb_keys: upper bound of the keys.
+    :return: positions of the keys in ascending order, equal keys keeping their order.
+    """
+    order = np.arange(len(keys), dtype=np.int64)
+    shift = 0
+    while shift == 0 or (nb_keys - 1) >> shift:
+        digits = ((keys[order] >> shift) & 0xFFFF).astype(np.uint16)
+        order = order[np.argsort(digits, kind="stable")]
+        shift += 16
+    return order
+
+
+class ContractOptimizerTimeAxis:
+    """
+    Entry class for contract optimization on bounded integer timelines.
+
+    Instead of sorting contracts and searching the successor of each one, the DP runs along the time axis:
+    - distinct time points are compressed with a presence array over the time span, each contract
+    getting the ranks of its start and end;
+    - contracts are bucketed by end rank with a counting sort;
+    - best[r] is the maximum income of contracts ending at or before time point r: the best income
+    up to r - 1, or of a contract ending at r added to the best income up to its start.
+    Contracts with zero duration are compatible with all contracts ending or starting at their time,
+    so all of them with a positive price are added to the best income at their time point.
+    The contract taken at each time point is kept as a backpointer, the path is rebuilt once at the end.
+    Durations of the phases of the last optimization are available in the phases attribute.
+    Contracts in columns are optimized without building any Contract, see from_columns.
+    NOTE: contracts with a negative duration, or spanning more than MAX_SPAN_PER_CONTRACT time units
+    per contract, are optimized by ContractOptimizerFast instead (ContractOptimizerNumpy for columns),
+    see select_optimizer.
+    Time complexity: O(n + T) with n the number of contracts and T the time span,
+    at most MAX_SPAN_PER_CONTRACT * n.
+    """
+
+    def __init__(self, contracts: Sequence[Contract]):
+        """
+        :param contracts: contracts to be optimized.
+        """
+        self.contracts = contracts
+        self.columns: Optional[ContractColumns] = None
+        self.phases: Dict[str, float] = {}
+
+    @classmethod
+    def from_columns(cls, columns: ContractColumns) -> "ContractOptimizerTimeAxis":
+        """
+        Returns an optimizer working directly on columnar contracts, without building any Contract.
+        :param columns: contracts to be optimized.
+        """
+        optimizer = cls([])
+        optimizer.columns = columns
+        return optimizer
+
+    def _name(self, index: int) -> str:
+        if self.columns is None:
+            return self.contracts[index].name
+        return self.columns.names[index]
+
+    def optimize(self) -> Dict[str, Any]:
+        """
+        Runs the DP over the time points to find the path maximizing the total price.
+        :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
+        """
+        stopwatch = Stopwatch()
+        columns = self.columns
+        n = len(self.contracts) if columns is None else len(columns)
+        if n == 0:
+            return ContractPath(income=0, path=[])._asdict()
+
+        if columns is None:
+            starts = np.fromiter((c.start for c in self.contracts), np.int64, n)
+            durations = np.fromiter((c.duration for c in self.contracts), np.int64, n)
+        else:
+            starts, durations = columns.start, columns.duration
+        ends = starts + durations
+        origin = int(starts.min())
+        # the time axis can neither be walked backwards nor allocated over any span
+        if (
+            int(durations.min()) < 0
+            or int(ends.max()) - origin > MAX_SPAN_PER_CONTRACT * n
+        ):
+            fallback: ContractOptimizer
+            if columns is None:
+                fallback = ContractOptimizerFast(list(self.contracts))
+            else:
+                fallback = ContractOptimizerNumpy.from_columns(columns)
+            result = fallback.optimize()
+            self.phases = getattr(fallback, "phases", {})
+            return result
+        present = np.zeros(int(ends.max()) - origin + 1, dtype=np.bool_)
+        present[starts - origin] = True
+        present[ends - origin] = True
+        # 5 bytes per time unit, ranks are lower than 2n
+        ranks = np.cumsum(present, dtype=np.int32) - 1
+        start_ranks = ranks[starts - origin]
+        end_ranks = ranks[ends - origin]
+        nb_points = int(ranks[-1]) + 1
+        stopwatch.lap("compress")
+
+        # contracts of zero duration are bonuses, the others are sorted by end rank
+        if columns is None:
+            prices = [c.price for c in self.contracts]
+        else:
+            prices = columns.price.tolist()
+        bonuses = [0] * nb_points
+        zero_durations: Dict[int, List[int]] = {}
+        for i in np.flatnonzero(start_ranks == end_ranks).tolist():
+            if prices[i] > 0:
+                rank = int(end_ranks[i])
+                bonuses[rank] += prices[i]
+                zero_durations.setdefault(rank, []).append(i)
+
+        timed = np.flatnonzero(start_ranks != end_ranks)
+        order_array = timed[counting_argsort(end_ranks[timed], nb_points)]
+        bounds = np.searchsorted(
+            end_ranks[order_array], np.arange(nb_points + 1), side="left"
+        ).tolist()
+        order = order_array.tolist()
+        ordered_start_ranks = start_ranks[order_array].tolist()
+        ordered_prices = [prices[i] for i in order]
+        stopwatch.lap("sort")
+
+        # best[r] is the maximum income of contracts ending at or before time point r,
+        # taken[r] the contract ending at r on the best path up to r, -1 if none
+        best = [0] * nb_points
+        taken = [-1] * nb_points
+        income = 0
+        k = 0
+        for r in range(nb_points):
+            bound = bounds[r + 1]
+            while k < bound:
+                candidate = best[ordered_start_ranks[k]] + ordered_prices[k]
+                if candidate > income:
+                    income = candidate
+                    taken[r] = order[k]
+                k += 1
+            income += bonuses[r]
+            best[r] = income
+        stopwatch.lap("dp")
+
+        # walks the time points backwards, a contract ends before the ones of zero duration at its end
+        reversed_path: List[str] = []
+        r = nb_points - 1
+        while r >= 0:
+            for i in reversed(zero_durations.get(r, ())):
+                reversed_path.append(self._name(i))
+            i = taken[r]
+            if i == -1:
+                r -= 1
+            else:
+                reversed_path.append(self._name(i))
+                r = int(start_ranks[i])
+        stopwatch.lap("path")
+
+        self.phases = stopwatch.phases
+        return ContractPath(income=best[-1], path=reversed_path[::-1])._asdict()
+
+
+def select_columns_optimizer(columns: ContractColumns) -> ContractOptimizer:
+    """
+    Returns the optimizer best suited to contracts in columns, like select_optimizer,
+    ContractOptimizerNumpy instead of ContractOptimizerFast, without building any Contract.
+    :param columns: contracts to be optimized.
+    """
+    n = len(columns)
+    if n >= MIN_TIME_AXIS_CONTRACTS and int(columns.duration.min()) >= 0:
+        span = int(columns.end.max()) - int(columns.start.min())
+        if span <= MAX_SPAN_PER_CONTRACT * n:
+            return ContractOptimizerTimeAxis.from_columns(columns)
+    return ContractOptimizerNumpy.from_columns(columns)
+
+
+def select_optimizer(contracts: List[Contract]) -> ContractOptimizer:
+    """
+    Returns the optimizer best suited to a list of contracts: ContractOptimizerTimeAxis if their
+    time span is small relative to their number, ContractOptimizerFast otherwise,
+    or if any contract has a negative duration.
+    :param contracts: contracts to be optimized.
+    """
+    if len(contracts) >= MIN_TIME_AXIS_CONTRACTS and all(
+        c.duration >= 0 for c in contracts
+    ):
+        span = max(c.end for c in contracts) - min(c.start for c in contracts)
+        if span <= MAX_SPAN_PER_CONTRACT * len(contracts):
+            return ContractOptimizerTimeAxis(contracts)
+    return ContractOptimizerFast(contracts)
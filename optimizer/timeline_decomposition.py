@@ -0,0 +1,118 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from optimizer.contract import Contract, ContractPath
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.stopwatch import Stopwatch
+
+
+def split_timeline(contracts: Sequence[Contract]) -> List[List[Contract]]:
+    """
+    Splits contracts into segments of time that no contract crosses.
+    Contracts are swept by ascending start while tracking the latest end seen so far:
+    a contract starting at or after this end starts a new segment.
+    :param contracts: contracts to be split.
+    :return: the segments in chronological order, each one with its contracts sorted by ascending start.
+    """
+    segments: List[List[Contract]] = []
+    latest_end = 0
+    for contract in sorted(contracts, key=lambda c: c.start):
+        if not segments or contract.start >= latest_end:
+            segments.append([])
+            latest_end = contract.end
+        segments[-1].append(contract)
+        latest_end = max(latest_end, contract.end)
+    return segments
+
+
+def _optimize_segments(
+    segments: List[List[Contract]],
+) -> List[Tuple[Dict[str, Any], float]]:
+    # defined at the module level to be sent to worker processes
+    results = []
+    for segment in segments:
+        start_time = time.perf_counter()
+        result = ContractOptimizerFast(segment).optimize()
+        results.append((result, time.perf_counter() - start_time))
+    return results
+
+
+class ContractOptimizerDecomposed:
+    """
+    Entry class for contract optimization of timelines with natural cut points.
+
+    At a point in time that no contract crosses, the best path is the concatenation
+    of the best paths on each side. The timeline is split at all such points, segments are
+    optimized independently with ContractOptimizerFast, in parallel in a process pool,
+    and their paths are concatenated.
+    Consecutive segments are grouped in chunks of about the same number of contracts,
+    to amortize the cost of dispatching small segments.
+    After optimization, timings of each segment are available in the segments attribute,
+    and durations of the phases in the phases attribute.
+    Time complexity: O(n*log(n)) with n the number of contracts, divided by the number of workers
+    when segments are balanced.
+    """
+
+    CHUNKS_PER_WORKER = 4
+
+    def __init__(
+        self, contracts: Sequence[Contract], max_workers: Optional[int] = None
+    ):
+        """
+        :param contracts: contracts to be optimized.
+        :param max_workers: number of worker processes (defaults to the number of cores),
+        segments are optimized inline with 1 worker.
+        """
+        self.contracts = contracts
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.segments: List[Dict[str, Any]] = []
+        self.phases: Dict[str, float] = {}
+
+    def optimize(self) -> Dict[str, Any]:
+        """
+        Splits the timeline, then optimizes all segments to find the path maximizing the total price.
+        :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
+        """
+        stopwatch = Stopwatch()
+        segments = split_timeline(self.contracts)
+
+        # consecutive segments grouped in chunks of about the same number of contracts
+        chunk_size = len(self.contracts) / (self.CHUNKS_PER_WORKER * self.max_workers)
+        chunks: List[List[List[Contract]]] = []
+        chunk_contracts = 0
+        for segment in segments:
+            if not chunks or chunk_contracts >= chunk_size:
+                chunks.append([])
+                chunk_contracts = 0
+            chunks[-1].append(segment)
+            chunk_contracts += len(segment)
+        stopwatch.lap("split")
+
+        if self.max_workers == 1 or len(chunks) <= 1:
+            chunk_results = [_optimize_segments(chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                chunk_results = list(pool.map(_optimize_segments, chunks))
+        stopwatch.lap("segments")
+
+        income, path = 0, []
+        self.segments = []
+        segment_results = (r for results in chunk_results for r in results)
+        for segment, (result, duration) in zip(segments, segment_results):
+            income += result["income"]
+            path += result["path"]
+            self.segments.append(
+                {
+                    "start": segment[0].start,
+                    "end": max(c.end for c in segment),
+                    "contracts": len(segment),
+                    "income": result["income"],
+                    "seconds": duration,
+                }
+            )
+        stopwatch.lap("merge")
+
+        self.phases = stopwatch.phases
+        return ContractPath(income=income, path=path)._asdict()
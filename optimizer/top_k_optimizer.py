@@ -0,0 +1,192 @@
+import heapq
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from optimizer.contract import Contract, ContractPath
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.stopwatch import Stopwatch
+
+# node of a persistent leftist heap: (loss, position of the sidetrack, rank, left, right)
+HeapNode = Tuple[int, int, int, Optional["HeapNode"], Optional["HeapNode"]]
+# sidetracks of a schedule, from the last one to the first one: (position, previous sidetracks)
+Sidetracks = Optional[Tuple[int, "Sidetracks"]]
+
+
+def _rank(heap: Optional[HeapNode]) -> int:
+    return heap[2] if heap is not None else 0
+
+
+def _merge(a: Optional[HeapNode], b: Optional[HeapNode]) -> Optional[HeapNode]:
+    # persistent merge: nodes of the right spines are copied, the input heaps are left untouched
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if b[:2] < a[:2]:
+        a, b = b, a
+    left, right = a[3], _merge(a[4], b)
+    if _rank(left) < _rank(right):
+        left, right = right, left
+    return a[0], a[1], _rank(right) + 1, left, right
+
+
+class ContractOptimizerTopK:
+    """
+    Entry class for the enumeration of the k best schedules of contracts.
+
+    Positions of the contracts sorted by ascending start then duration form a graph, where position i leads
+    to i + 1 by skipping contract i, or to its nearest successor by taking it. The best incomes
+    are computed as in ContractOptimizerFast: the decision taken at each position forms a tree
+    of best paths, and any other schedule deviates from it by a sequence of sidetracks,
+    the decisions not taken, each losing some income. Schedules are enumerated in decreasing
+    income order as in Eppstein's k shortest paths: for each position, the sidetracks along its
+    best path are kept in a persistent leftist heap, sharing its nodes with the heap of the next
+    position, and built lazily, only for the positions reached by the enumeration.
+    Contracts with a non-positive price are never part of a schedule.
+    Time complexity: O(n*log(n) + k*log(k)) with n the number of contracts and k the number of schedules,
+    plus the size of the schedules.
+    """
+
+    def __init__(self, contracts: Sequence[Contract], k: int):
+        """
+        :param contracts: contracts to be scheduled.
+        :param k: maximum number of schedules returned by optimize.
+        :raises ValueError if k is not positive.
+        """
+        if k < 1:
+            raise ValueError(f"Number of schedules must be positive, got {k}")
+
+        self.contracts = contracts
+        self.k = k
+        self.phases: Dict[str, float] = {}
+
+    def optimize(self) -> Dict[str, Any]:
+        """
+        Finds the k schedules of non-overlapping contracts with the highest total price.
+        :return: a dictionary with the schedules in decreasing income order,
+        fewer than k if there are not enough schedules.
+        """
+        stopwatch = Stopwatch()
+        schedules = []
+        for schedule in self.schedules():
+            schedules.append(schedule)
+            if len(schedules) == self.k:
+                break
+        stopwatch.lap("enumerate")
+
+        # sort and dp phases are recorded by the generator, before the first schedule
+        enumerate_time = stopwatch.phases["enumerate"] - sum(self.phases.values())
+        self.phases["enumerate"] = enumerate_time
+        return {"schedules": schedules}
+
+    def schedules(self) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily generates all schedules of non-overlapping contracts, in decreasing income order.
+        The first one is the path found by ContractOptimizerFast.
+        :return: an iterator of dictionaries with the sublist of contracts and the income of each schedule.
+        """
+        stopwatch = Stopwatch()
+        contracts = sorted(self.contracts, key=lambda c: (c.start, c.duration))
+        n = len(contracts)
+        stopwatch.lap("sort")
+
+        successors = [n] * n
+        best_incomes = [0] * (n + 1)
+        taken = bytearray(n)
+        for i in reversed(range(n)):
+            successor = ContractOptimizerFast.find_nearest_successor(contracts, i)
+            if successor != -1:
+                successors[i] = successor
+            income = contracts[i].price + best_incomes[successors[i]]
+            if income > best_incomes[i + 1]:
+                best_incomes[i] = income
+                taken[i] = 1
+            else:
+                best_incomes[i] = best_incomes[i + 1]
+
+        # first position from each one where the best path takes a contract, n if none
+        next_taken = [n] * (n + 1)
+        for i in reversed(range(n)):
+            next_taken[i] = i if taken[i] else next_taken[i + 1]
+        stopwatch.lap("dp")
+        self.phases = stopwatch.phases
+
+        # heap of the sidetracks along the best path from each position, built lazily
+        heaps: List[Optional[HeapNode]] = [None] * (n + 1)
+        built = bytearray(n + 1)
+        built[n] = 1
+
+        def heap(position: int) -> Optional[HeapNode]:
+            chain = []
+            while not built[position]:
+                chain.append(position)
+                position = successors[position] if taken[position] else position + 1
+            for i in reversed(chain):
+                next_heap = heaps[successors[i] if taken[i] else i + 1]
+                if taken[i]:
+                    loss = best_incomes[i] - best_incomes[i + 1]
+                elif contracts[i].price > 0:
+                    loss = (
+                        best_incomes[i]
+                        - contracts[i].price
+                        - best_incomes[successors[i]]
+                    )
+                else:
+                    heaps[i] = next_heap
+                    built[i] = 1
+                    continue
+                heaps[i] = _merge((loss, i, 1, None, None), next_heap)
+                built[i] = 1
+            return heaps[chain[0]] if chain else heaps[position]
+
+        def schedule(sidetracks: Sidetracks, loss: int) -> Dict[str, Any]:
+            deviations = []
+            while sidetracks is not None:
+                deviations.append(sidetracks[0])
+                sidetracks = sidetracks[1]
+            deviations.reverse()
+
+            # follows the best path, deviating at each sidetrack
+            path: List[str] = []
+            position, d = 0, 0
+            while position < n:
+                deviation = deviations[d] if d < len(deviations) else n
+                next_take = next_taken[position]
+                if deviation <= next_take:
+                    if deviation == n:
+                        break
+                    d += 1
+                    if taken[deviation]:
+                        position = deviation + 1
+                        continue
+                    next_take = deviation
+                path.append(contracts[next_take].name)
+                position = successors[next_take]
+            return ContractPath(income=best_incomes[0] - loss, path=path)._asdict()
+
+        yield schedule(None, 0)
+
+        # candidates: (total loss, counter for ties, heap node of the last sidetrack, previous sidetracks)
+        counter = 0
+        candidates: List[Tuple[int, int, HeapNode, Sidetracks]] = []
+        root = heap(0)
+        if root is not None:
+            candidates.append((root[0], counter, root, None))
+        while candidates:
+            loss, _, node, previous = heapq.heappop(candidates)
+            sidetracks = (node[1], previous)
+            yield schedule(sidetracks, loss)
+
+            # same previous sidetracks, last one replaced by the next ones in its heap
+            for child in (node[3], node[4]):
+                if child is not None:
+                    counter += 1
+                    heapq.heappush(
+                        candidates,
+                        (loss - node[0] + child[0], counter, child, previous),
+                    )
+            # new sidetrack after the last one, along the best path from where it leads
+            position = node[1]
+            head = heap(position + 1 if taken[position] else successors[position])
+            if head is not None:
+                counter += 1
+                heapq.heappush(candidates, (loss + head[0], counter, head, sidetracks))
@@ -0,0 +1,167 @@
+import bisect
+from typing import Any, Dict, List, Sequence
+
+from optimizer.contract import Contract, ContractPath
+
+
+class ContractWindowIndex:
+    """
+    Index over a set of contracts answering the best schedule restricted to a time window,
+    i.e. among the contracts starting at or after its start and ending at or before its end.
+
+    Two DPs are computed once: B(i) the best income of the contracts from position i onwards
+    when sorted by ascending start, as in ContractOptimizerFast, and F(t) the best income of the
+    contracts ending at or before t. When the window contains a cut point, a point in time
+    that no contract crosses (see split_timeline), contracts on each side of it are independent:
+    B(first contract starting in the window) = best before the cut in the window + best after the cut,
+    F(window end) = best before the cut + best after the cut in the window, B(0) = best before the cut
+    + best after the cut, hence the best income in the window is B(first) + F(end) - B(0).
+    Otherwise the window lies within a single segment, where no point splits the contracts:
+    the backward DP runs again on the contracts starting in the window only, skipping the ones ending after it,
+    reusing the order and the successors computed once instead of sorting and searching them again.
+    NOTE: DP tables per position inside a segment would answer those in constant time, but take quadratic memory
+    on books made of a single segment, such as uniformly spread contracts.
+    Paths are rebuilt by jumping from a taken contract to the next one.
+    Contracts with the same start are sorted by end, and with the same end by start, so that
+    a contract of zero duration is compatible with the contracts ending or starting at its time in both DPs.
+    Time complexity: O(n*log(n)) to build with n the number of contracts, O(log(n)) per query
+    plus the size of the path when the window contains a cut point, O(m) otherwise
+    with m the number of contracts starting in the window.
+    """
+
+    def __init__(self, contracts: Sequence[Contract]):
+        """
+        Sorts the contracts and computes both DPs.
+        :param contracts: contracts to be indexed.
+        """
+        self.contracts = sorted(contracts, key=lambda c: (c.start, c.end))
+        n = len(self.contracts)
+        self._starts = [c.start for c in self.contracts]
+        self._prices = [c.price for c in self.contracts]
+        self._ends_by_start = [c.end for c in self.contracts]
+
+        # backward DP on contracts sorted by start
+        self._successors = [
+            bisect.bisect_left(self._starts, c.end, i + 1)
+            for i, c in enumerate(self.contracts)
+        ]
+        self._best_from = [0] * (n + 1)
+        taken = bytearray(n)
+        for i in reversed(range(n)):
+            income = self.contracts[i].price + self._best_from[self._successors[i]]
+            if income > self._best_from[i + 1]:
+                self._best_from[i] = income
+                taken[i] = 1
+            else:
+                self._best_from[i] = self._best_from[i + 1]
+        # first position from each one where the backward path takes a contract, n if none
+        self._next_taken = [n] * (n + 1)
+        for i in reversed(range(n)):
+            self._next_taken[i] = i if taken[i] else self._next_taken[i + 1]
+
+        # forward DP on contracts sorted by end, _best_until[j] being the best of the j first ones
+        self._by_end = sorted(
+            range(n), key=lambda i: (self.contracts[i].end, self.contracts[i].start)
+        )
+        self._ends = [self.contracts[i].end for i in self._by_end]
+        self._predecessors = [
+            bisect.bisect_right(self._ends, self.contracts[i].start, 0, j)
+            for j, i in enumerate(self._by_end)
+        ]
+        self._best_until = [0] * (n + 1)
+        # last count of contracts from each one where the forward path takes a contract, 0 if none
+        self._previous_taken = [0] * (n + 1)
+        for j, i in enumerate(self._by_end):
+            income = self.contracts[i].price + self._best_until[self._predecessors[j]]
+            if income > self._best_until[j]:
+                self._best_until[j + 1] = income
+                self._previous_taken[j + 1] = j + 1
+            else:
+                self._best_until[j + 1] = self._best_until[j]
+                self._previous_taken[j + 1] = self._previous_taken[j]
+
+        # segments of the timeline: position of their first contract, start and latest end
+        self._segment_firsts: List[int] = []
+        self._segment_starts: List[int] = []
+        self._segment_ends: List[int] = []
+        for i, contract in enumerate(self.contracts):
+            if not self._segment_ends or contract.start >= self._segment_ends[-1]:
+                self._segment_firsts.append(i)
+                self._segment_starts.append(contract.start)
+                self._segment_ends.append(contract.end)
+            else:
+                self._segment_ends[-1] = max(self._segment_ends[-1], contract.end)
+
+    def __len__(self) -> int:
+        return len(self.contracts)
+
+    def query(self, start: int, end: int) -> Dict[str, Any]:
+        """
+        Finds the best schedule among the contracts within a time window.
+        :param start: start of the window.
+        :param end: end of the window.
+        :return: a dictionary with the sublist of optimized contracts and the maximum income associated.
+        :raises ValueError if the window ends before its start.
+        """
+        if end < start:
+            raise ValueError(f"Window ends at {end} before its start {start}")
+
+        first = bisect.bisect_left(self._starts, start)
+        # last segment starting before the window: the window lies within it if it ends before its end
+        segment = bisect.bisect_left(self._segment_starts, start) - 1
+        if segment >= 0 and end < self._segment_ends[segment]:
+            return self._query_segment(
+                first, bisect.bisect_right(self._starts, end), end
+            )
+
+        # first contract after the cut, contracts before it all end at or before the window end
+        cut = (
+            self._segment_firsts[segment + 1]
+            if segment + 1 < len(self._segment_firsts)
+            else len(self.contracts)
+        )
+        count = bisect.bisect_right(self._ends, end)
+        income = self._best_from[first] + self._best_until[count] - self._best_from[0]
+
+        path: List[str] = []
+        i = self._next_taken[first]
+        while i < cut:
+            path.append(self.contracts[i].name)
+            i = self._next_taken[self._successors[i]]
+
+        # contracts before the cut may share their end with zero-length contracts after it
+        cut_start = self._starts[cut] if cut < len(self.contracts) else None
+        after_cut: List[str] = []
+        j = self._previous_taken[count]
+        while j > 0 and cut_start is not None and self._ends[j - 1] >= cut_start:
+            if self._by_end[j - 1] >= cut:
+                after_cut.append(self.contracts[self._by_end[j - 1]].name)
+            j = self._previous_taken[self._predecessors[j - 1]]
+        path += reversed(after_cut)
+
+        return ContractPath(income=income, path=path)._asdict()
+
+    def _query_segment(self, first: int, last: int, end: int) -> Dict[str, Any]:
+        # backward DP on the contracts from first to last ending in the window, by position from first
+        prices, ends, successors = self._prices, self._ends_by_start, self._successors
+        best = [0] * (last - first + 1)
+        taken = bytearray(last - first)
+        for i in range(last - 1, first - 1, -1):
+            k = i - first
+            best[k] = best[k + 1]
+            if ends[i] <= end:
+                # successors after the last contract start after the window
+                income = prices[i] + best[min(successors[i], last) - first]
+                if income > best[k]:
+                    best[k] = income
+                    taken[k] = 1
+
+        path: List[str] = []
+        i = first
+        while i < last:
+            if taken[i - first]:
+                path.append(self.contracts[i].name)
+                i = successors[i]
+            else:
+                i += 1
+        return ContractPath(income=best[0], path=path)._asdict()
@@ -0,0 +1,65 @@
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+
+class AnalysisNotFoundError(KeyError):
+    """Raised when an analysis does not exist, or was evicted."""
+
+
+class AnalysisStore:
+    """
+    In-memory registry of contract analyses, identified by a random analysis id,
+    so that their pages are served without sending the contracts again.
+    Analyses can always be computed again: above the maximum number of analyses,
+    the least recently used ones are evicted instead of rejecting new ones.
+    NOTE: analyses are local to the process, with several uvicorn workers
+    all requests of an analysis must be routed to the same worker.
+    """
+
+    def __init__(self, max_analyses: int = 100):
+        """
+        Initializes an empty store.
+        :param max_analyses: maximum number of analyses kept at the same time (defaults to 100).
+        """
+        self.max_analyses = max_analyses
+        self._analyses: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._analyses)
+
+    def add(self, income: int, contracts: List[Dict[str, Any]]) -> str:
+        """
+        Keeps an analysis, evicting the least recently used one above the maximum number of analyses.
+        :param income: best income of the contracts.
+        :param contracts: analysis of each contract, in input order.
+        :return: the id of the analysis.
+        """
+        analysis_id = uuid.uuid4().hex
+        self._analyses[analysis_id] = {"income": income, "contracts": contracts}
+        while len(self._analyses) > self.max_analyses:
+            self._analyses.popitem(last=False)
+        return analysis_id
+
+    def page(self, analysis_id: str, offset: int, limit: int) -> Dict[str, Any]:
+        """
+        Returns a page of an analysis.
+        :param analysis_id: id of the analysis.
+        :param offset: position of the first contract returned.
+        :param limit: maximum number of contracts returned.
+        :return: the id of the analysis, the best income, the total number of contracts,
+        the offset and the contracts of the page.
+        :raises AnalysisNotFoundError if the analysis does not exist.
+        """
+        try:
+            analysis = self._analyses[analysis_id]
+        except KeyError:
+            raise AnalysisNotFoundError(analysis_id) from None
+        self._analyses.move_to_end(analysis_id)
+        return {
+            "analysis_id": analysis_id,
+            "income": analysis["income"],
+            "total": len(analysis["contracts"]),
+            "offset": offset,
+            "contracts": analysis["contracts"][offset : offset + limit],
+        }
@@ -0,0 +1,49 @@
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizer
+
+ContractSet = Tuple[str, List[Contract]]
+
+
+def chunk_sets(sets: Sequence[ContractSet], chunk_size: int) -> List[List[ContractSet]]:
+    """
+    Groups consecutive contract sets into chunks of about chunk_size contracts,
+    so that small sets are dispatched together to amortize the cost of dispatching.
+    A set larger than chunk_size forms a chunk of its own.
+    :param sets: contract sets with their id.
+    :param chunk_size: minimum number of contracts of a chunk, except for the last one.
+    :return: the list of chunks.
+    """
+    chunks: List[List[ContractSet]] = []
+    chunk: List[ContractSet] = []
+    chunk_contracts = 0
+    for contract_set in sets:
+        chunk.append(contract_set)
+        chunk_contracts += len(contract_set[1])
+        if chunk_contracts >= chunk_size:
+            chunks.append(chunk)
+            chunk, chunk_contracts = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def optimize_chunk(
+    optimizer_class: Callable[[List[Contract]], ContractOptimizer],
+    chunk: List[ContractSet],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Optimizes each set of a chunk, defined at the module level to be sent to worker processes.
+    A set failing to be optimized gets an error instead of a result.
+    :param optimizer_class: optimizer to be used, picklable, e.g. defined at the module level.
+    :param chunk: contract sets with their id.
+    :return: the result or error of each set, by id.
+    """
+    results = {}
+    for set_id, contracts in chunk:
+        try:
+            results[set_id] = optimizer_class(contracts).optimize()
+        except Exception as e:
+            results[set_id] = {"error": f"{e.__class__.__name__}: {e}"}
+    return results
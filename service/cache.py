@@ -0,0 +1,278 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from optimizer.contract import Contract, ContractTemplate
+
+
+def contracts_key(
+    contracts: Iterable[Contract], templates: Iterable[ContractTemplate] = ()
+) -> str:
+    """
+    Returns a hash of a set of contracts, independent of their order.
+    Contracts are serialized unambiguously (names are prefixed with their length),
+    sorted, then hashed together. Recurring templates are hashed as such, without expanding them:
+    their lines are prefixed with T, so that they never collide with the ones of contracts.
+    :param contracts: contracts to be hashed.
+    :param templates: recurring templates to be hashed with the contracts (defaults to none).
+    :return: the hexadecimal digest of the set of contracts.
+    """
+    lines = sorted(
+        f"{len(c.name)}:{c.name}:{c.start}:{c.duration}:{c.price}" for c in contracts
+    )
+    lines += sorted(
+        f"T{len(t.name)}:{t.name}:{t.start}:{t.duration}:{t.price}:{t.period}:{t.repetitions}"
+        for t in templates
+    )
+    return hashlib.blake2b("\n".join(lines).encode(), digest_size=20).hexdigest()
+
+
+def canonical_order(contracts: Sequence[Contract]) -> List[int]:
+    """
+    Returns the positions of contracts in an order only depending on their set, like contracts_key:
+    by start, then duration, name and price.
+    Optimizers may return different paths for the same set in another order, with several paths
+    of maximum income: contracts are optimized in this order on a cache miss,
+    so that a cached result is the one of every order.
+    :param contracts: contracts, in any order.
+    :return: the positions of the contracts, sorted.
+    """
+    return sorted(
+        range(len(contracts)),
+        key=lambda i: (
+            contracts[i].start,
+            contracts[i].duration,
+            contracts[i].name,
+            contracts[i].price,
+        ),
+    )
+
+
+def payload_key(payload: bytes) -> str:
+    """
+    Returns a hash of a raw payload of contracts, unlike contracts_key it depends on their order.
+    Hashes are personalized, so that they never collide with the ones of contracts_key.
+    :param payload: payload to be hashed.
+    :return: the hexadecimal digest of the payload.
+    """
+    return hashlib.blake2b(payload, digest_size=20, person=b"payload").hexdigest()
+
+
+def _approximate_size(value: Any) -> int:
+    # size of the strings and a fixed overhead per object
+    if isinstance(value, str):
+        return 64 + len(value)
+    if isinstance(value, dict):
+        return 64 + sum(_approximate_size(v) for v in value.values())
+    if isinstance(value, list):
+        return 64 + sum(_approximate_size(v) for v in value)
+    return 32
+
+
+class ResultCache:
+    """
+    Cache of optimization results, keyed by contracts_key.
+
+    Results are kept in memory, evicting the least recently used ones above a number of entries
+    or an approximate size, and optionally written to a directory shared by all uvicorn workers.
+    Files of the directory are read and written in a thread, off the event loop, a result being written
+    before it is returned. They are touched when read, and the least recently used ones are removed above
+    max_files: the directory is checked every max_files/16 writes of each cache, so it may exceed it briefly.
+    Concurrent computations of the same key are coalesced: only the first one computes,
+    the others wait for its result.
+    NOTE: results only depend on the set of contracts if they are optimized in canonical_order.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 2**20,
+        directory: Optional[str] = None,
+        max_files: int = 100_000,
+    ):
+        """
+        Initializes an empty cache.
+        :param max_entries: maximum number of results kept in memory, 0 disables memory (defaults to 1024).
+        :param max_bytes: approximate maximum size of the results kept in memory (defaults to 64MB).
+        :param directory: folder where results are shared between processes (defaults to None).
+        :param max_files: maximum number of results kept in the folder (defaults to 100000).
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_files = max_files
+        self._writes = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._entries: OrderedDict[str, Tuple[Dict[str, Any], int]] = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future[Dict[str, Any]]] = {}
+        self.size = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Returns True if results are kept in memory or on disk."""
+        return self.max_entries > 0 or self.directory is not None
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the counters of the cache."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+        }
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Returns the cached result of a key, or computes and caches it.
+        :param key: hash of the contracts.
+        :param compute: coroutine function computing the result on a miss.
+        :return: the result of the optimization.
+        :raises any exception raised by compute, failures are not cached.
+        """
+        result = await self._get(key)
+        if result is not None:
+            return result
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        self.misses += 1
+        # computed in its own task, so that waiters are not impacted if the first caller is cancelled
+        task = asyncio.ensure_future(self._compute(key, compute))
+        self._in_flight[key] = task
+        task.add_done_callback(functools.partial(self._on_computed, key))
+        return await asyncio.shield(task)
+
+    async def _compute(
+        self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        result = await compute()
+        self._remember(key, result)
+        if self.directory is not None:
+            self._writes += 1
+            evict = self._writes % (self.max_files // 16 + 1) == 0
+            await asyncio.to_thread(self._write, key, result, evict)
+        return result
+
+    def _on_computed(self, key: str, task: "asyncio.Future[Dict[str, Any]]") -> None:
+        del self._in_flight[key]
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        if self.directory is None:
+            return None
+        result = await asyncio.to_thread(self._read, key)
+        if result is not None:
+            self.disk_hits += 1
+            self._remember(key, result)
+        return result
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+
+        size = _approximate_size(result)
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+        self._entries[key] = (result, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        assert self.directory is not None
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                result: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def _write(self, key: str, result: Dict[str, Any], evict: bool) -> None:
+        # written in a temporary file then renamed, so that other workers never read partial results
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(temporary_path, path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+
+        if evict:
+            self._evict_files()
+
+    def _evict_files(self) -> None:
+        # removes the least recently written or read files above max_files, other workers may remove them too
+        assert self.directory is not None
+        files = []
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith(".json"):
+                    try:
+                        files.append((entry.stat().st_mtime_ns, entry.path))
+                    except OSError:
+                        pass
+        files.sort()
+        for _, path in files[: max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(path)
+                self.disk_evictions += 1
+            except OSError:
+                pass
@@ -0,0 +1,278 @@
+import mmap
+import struct
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+import numpy as np
+import numpy.typing as npt
+
+from optimizer.contract_columns import ContractColumns
+
+# Contracts layout, all integers little-endian:
+#   header     magic b"SPCC", version (uint32), number n of contracts (uint64)
+#   start      n x int64
+#   duration   n x int64
+#   price      n x int64
+#   offsets    (n + 1) x int64, positions of the names in the blob, from 0 to the blob size
+#   blob       names encoded in utf-8, concatenated
+COLUMNS_MEDIA_TYPE = "application/x-spaceship-columns"
+COLUMNS_HEADER = struct.Struct("<4sIQ")
+COLUMNS_MAGIC = b"SPCC"
+
+# Path layout, all integers little-endian:
+#   header     magic b"SPCP", version (uint32), income (int64), number m of contracts (uint64)
+#   offsets    (m + 1) x int64, positions of the names in the blob, from 0 to the blob size
+#   blob       names of the contracts of the path encoded in utf-8, concatenated
+PATH_MEDIA_TYPE = "application/x-spaceship-path"
+PATH_HEADER = struct.Struct("<4sIqQ")
+PATH_MAGIC = b"SPCP"
+
+VERSION = 1
+INT64 = np.dtype("<i8")
+
+
+class ColumnarFormatError(ValueError):
+    """Raised when a binary payload does not follow the columnar layout."""
+
+
+class ColumnarNames(Sequence[str]):
+    """
+    Names of contracts stored in an utf-8 blob, decoded on access only.
+    Only the names of the best path are decoded during optimization.
+    """
+
+    def __init__(self, blob: Union[bytes, memoryview], offsets: npt.NDArray[np.int64]):
+        """
+        :param blob: names encoded in utf-8, concatenated.
+        :param offsets: positions of the names in the blob, with the blob size as last position.
+        """
+        self._blob = blob
+        self._offsets = offsets
+        # converted on first access, a payload may be decoded without reading any name
+        self._bounds: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("name index out of range")
+        if self._bounds is None:
+            self._bounds = self._offsets.tolist()
+        return str(self._blob[self._bounds[index] : self._bounds[index + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # only the blob is sent to worker processes, not the whole payload it is a view of
+        return self.__class__, (bytes(self._blob), self._offsets)
+
+
+def _encode_names(names: Sequence[str]) -> Tuple[bytes, bytes]:
+    if isinstance(names, ColumnarNames):
+        # already encoded, e.g. names of a decoded payload
+        first, last = int(names._offsets[0]), int(names._offsets[-1])
+        return (names._offsets - first).astype(INT64).tobytes(), bytes(
+            names._blob[first:last]
+        )
+    encoded = [name.encode() for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=INT64)
+    np.cumsum([len(name) for name in encoded], out=offsets[1:])
+    return offsets.tobytes(), b"".join(encoded)
+
+
+def _decode_names(
+    payload: memoryview, position: int, count: int, check_utf8: bool = True
+) -> ColumnarNames:
+    offsets_end = position + (count + 1) * INT64.itemsize
+    if len(payload) < offsets_end:
+        raise ColumnarFormatError("payload is truncated")
+    offsets = np.frombuffer(payload, dtype=INT64, count=count + 1, offset=position)
+    blob = payload[offsets_end:]
+
+    if offsets[0] != 0 or offsets[-1] != len(blob):
+        raise ColumnarFormatError(
+            "name offsets must start at 0 and end at the blob size"
+        )
+    if np.any(offsets[1:] < offsets[:-1]):
+        raise ColumnarFormatError("name offsets must be non-decreasing")
+    if not check_utf8:
+        return ColumnarNames(blob, offsets)
+    try:
+        str(blob, "utf-8")
+    except UnicodeDecodeError as e:
+        raise ColumnarFormatError(f"names are not valid utf-8 ({e.reason})")
+    # a name starting with a continuation byte would be cut in the middle of a character
+    starts = offsets[:-1][offsets[:-1] < len(blob)]
+    if np.any(np.frombuffer(blob, dtype=np.uint8)[starts] & 0xC0 == 0x80):
+        raise ColumnarFormatError("name offsets must not split utf-8 characters")
+    return ColumnarNames(blob, offsets)
+
+
+def encode_columns(columns: ContractColumns) -> bytes:
+    """
+    Serializes contracts in the binary columnar layout.
+    :param columns: contracts to be serialized.
+    :return: the payload.
+    """
+    offsets, blob = _encode_names(columns.names)
+    return b"".join(
+        (
+            COLUMNS_HEADER.pack(COLUMNS_MAGIC, VERSION, len(columns)),
+            columns.start.astype(INT64).tobytes(),
+            columns.duration.astype(INT64).tobytes(),
+            columns.price.astype(INT64).tobytes(),
+            offsets,
+            blob,
+        )
+    )
+
+
+def decode_columns(
+    payload: Union[bytes, bytearray, mmap.mmap], *, check_utf8: bool = True
+) -> ContractColumns:
+    """
+    Deserializes contracts from the binary columnar layout, without copy:
+    int64 columns are views of the payload and names are decoded on access.
+    :param payload: payload to be deserialized.
+    :param check_utf8: when False, names are not checked to be valid utf-8 until accessed (defaults to True).
+    :return: the contracts.
+    :raises ColumnarFormatError if the payload does not follow the layout.
+    """
+    view = memoryview(payload)
+    if len(view) < COLUMNS_HEADER.size:
+        raise ColumnarFormatError("payload is truncated")
+    magic, version, count = COLUMNS_HEADER.unpack_from(view)
+    if magic != COLUMNS_MAGIC:
+        raise ColumnarFormatError("payload is not in columnar layout")
+    if version != VERSION:
+        raise ColumnarFormatError(f"unsupported version {version}")
+    if count > (len(view) - COLUMNS_HEADER.size) // (4 * INT64.itemsize):
+        raise ColumnarFormatError("payload is truncated")
+
+    columns = [
+        np.frombuffer(
+            view,
+            dtype=INT64,
+            count=count,
+            offset=COLUMNS_HEADER.size + i * count * INT64.itemsize,
+        )
+        for i in range(3)
+    ]
+    names = _decode_names(
+        view, COLUMNS_HEADER.size + 3 * count * INT64.itemsize, count, check_utf8
+    )
+    return ContractColumns(names, *columns)
+
+
+def write_columns(
+    file_path: str, chunks: Iterable[ContractColumns], count: int
+) -> None:
+    """
+    Writes contracts in the binary columnar layout to a file, one chunk at a time:
+    each chunk is written at its position in every column, so that only one chunk is held in memory.
+    :param file_path: path of the file to be written.
+    :param chunks: contracts to be written, in chunks.
+    :param count: total number of contracts of the chunks.
+    :raises ValueError if the chunks do not hold count contracts.
+    """
+    columns_position = COLUMNS_HEADER.size
+    offsets_position = columns_position + 3 * count * INT64.itemsize
+    blob_position = offsets_position + (count + 1) * INT64.itemsize
+    written = 0
+    blob_size = 0
+    with open(file_path, "wb") as f:
+        f.write(COLUMNS_HEADER.pack(COLUMNS_MAGIC, VERSION, count))
+        for chunk in chunks:
+            if written + len(chunk) > count:
+                raise ValueError(f"Chunks hold more than {count} contracts")
+            for i, column in enumerate((chunk.start, chunk.duration, chunk.price)):
+                f.seek(columns_position + (i * count + written) * INT64.itemsize)
+                f.write(column.astype(INT64).tobytes())
+
+            offsets, blob = _encode_names(chunk.names)
+            chunk_offsets = np.frombuffer(offsets, dtype=INT64) + blob_size
+            # the first offset of a chunk is the last one of the previous chunk
+            f.seek(offsets_position + written * INT64.itemsize)
+            f.write(chunk_offsets.tobytes())
+            f.seek(blob_position + blob_size)
+            f.write(blob)
+            written += len(chunk)
+            blob_size += len(blob)
+        if written != count:
+            raise ValueError(f"Chunks hold {written} contracts instead of {count}")
+        if count == 0:
+            f.write(np.zeros(1, dtype=INT64).tobytes())
+
+
+def read_columns(file_path: str) -> ContractColumns:
+    """
+    Reads contracts in the binary columnar layout from a file, memory-mapped:
+    the file is not read at once, pages are loaded by the system as columns are accessed.
+    Names are only checked to be valid utf-8 when accessed.
+    :param file_path: path of the file to be read.
+    :return: the contracts, valid as long as they are referenced.
+    :raises ColumnarFormatError if the file does not follow the layout.
+    """
+    with open(file_path, "rb") as f:
+        # the mapping outlives the file, it is released with the last array viewing it
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode_columns(mapping, check_utf8=False)
+
+
+def encode_path(result: Dict[str, Any]) -> bytes:
+    """
+    Serializes the result of an optimization in the binary path layout.
+    :param result: dictionary with the income and the path of contract names.
+    :return: the payload.
+    """
+    offsets, blob = _encode_names(result["path"])
+    header = PATH_HEADER.pack(
+        PATH_MAGIC, VERSION, result["income"], len(result["path"])
+    )
+    return b"".join((header, offsets, blob))
+
+
+def decode_path(payload: bytes) -> Dict[str, Any]:
+    """
+    Deserializes the result of an optimization from the binary path layout.
+    :param payload: payload to be deserialized.
+    :return: a dictionary with the income and the path of contract names.
+    :raises ColumnarFormatError if the payload does not follow the layout.
+    """
+    view = memoryview(payload)
+    if len(view) < PATH_HEADER.size:
+        raise ColumnarFormatError("payload is truncated")
+    magic, version, income, count = PATH_HEADER.unpack_from(view)
+    if magic != PATH_MAGIC:
+        raise ColumnarFormatError("payload is not in path layout")
+    if version != VERSION:
+        raise ColumnarFormatError(f"unsupported version {version}")
+    return {
+        "income": income,
+        "path": list(_decode_names(view, PATH_HEADER.size, count)),
+    }
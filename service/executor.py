@@ -0,0 +1,209 @@
+import asyncio
+import concurrent.futures
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from optimizer.contract_analysis import ContractAnalysis
+from optimizer.contract_optimizer import ContractOptimizer
+
+T = TypeVar("T")
+
+
+class ExecutorOverloadedError(Exception):
+    """Raised when too many optimizations are already queued or running."""
+
+
+class ExecutorTimeoutError(Exception):
+    """Raised when an optimization does not complete in time."""
+
+
+def run_optimizer(optimizer: ContractOptimizer) -> Dict[str, Any]:
+    """
+    Runs the optimization, defined at the module level to be sent to worker processes.
+    :param optimizer: optimizer initialized with the contracts.
+    :return: the result of the optimization.
+    """
+    return optimizer.optimize()
+
+
+def measure_optimizer(
+    optimizer: ContractOptimizer,
+) -> Tuple[Dict[str, Any], Dict[str, float], int]:
+    """
+    Runs the optimization like run_optimizer, also returning the durations of its phases
+    and the number of contracts it pruned, since they are recorded in the copy of the optimizer
+    sent to the worker process.
+    :param optimizer: optimizer initialized with the contracts.
+    :return: the result of the optimization, the durations of its phases if recorded,
+    and the number of contracts pruned, 0 if the optimizer does not prune them.
+    """
+    result = optimizer.optimize()
+    return result, getattr(optimizer, "phases", {}), getattr(optimizer, "pruned", 0)
+
+
+def measure_analysis(
+    analysis: ContractAnalysis,
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Runs the analysis of the contracts, also returning the durations of its phases.
+    :param analysis: analysis initialized with the contracts.
+    :return: the result of the analysis, and the durations of its phases.
+    """
+    result = analysis.analyze()
+    return result, analysis.phases
+
+
+class OptimizationExecutor:
+    """
+    Runs CPU-bound optimizations off the event loop.
+
+    Depending on its mode, jobs are run:
+    - inline: directly in the event loop, blocking other requests;
+    - thread: in a thread pool, only useful for code releasing the GIL;
+    - process: in a process pool, using all cores.
+    Jobs smaller than the inline threshold are always run inline, avoiding the pool overhead.
+    The number of jobs queued or running in the pool is bounded, and each one has a timeout.
+    NOTE: a job timing out is cancelled if not started yet, otherwise it runs to completion
+    in its worker but its result is discarded. It stays counted as pending until its worker is done,
+    so that timed out jobs cannot pile up in the pool behind new ones.
+    """
+
+    MODES = ("inline", "thread", "process")
+
+    def __init__(
+        self,
+        mode: str = "inline",
+        *,
+        max_workers: Optional[int] = None,
+        inline_threshold: int = 0,
+        max_pending: int = 64,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Initializes the executor and its pool of workers.
+        :param mode: inline, thread or process (defaults to inline).
+        :param max_workers: number of workers of the pool (defaults to the number of cores).
+        :param inline_threshold: jobs with a smaller size are run inline (defaults to 0).
+        :param max_pending: maximum number of jobs queued or running in the pool (defaults to 64).
+        :param timeout: maximum duration of a job run in the pool, in seconds (defaults to None).
+        :raises ValueError if mode is unknown.
+        """
+        if mode not in self.MODES:
+            raise ValueError(
+                f"Unknown executor mode {mode}, expected one of {self.MODES}"
+            )
+
+        self.mode = mode
+        self.inline_threshold = inline_threshold
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.workers = 1 if mode == "inline" else max_workers or os.cpu_count() or 1
+
+        self._pool: Optional[Executor] = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        elif mode == "process":
+            self._pool = ProcessPoolExecutor(max_workers=max_workers)
+
+    def _submit(
+        self, fn: Callable[..., T], args_list: Sequence[Sequence[Any]]
+    ) -> List["asyncio.Future[T]"]:
+        # submits jobs counting as a single pending one, until all their workers are done
+        assert self._pool is not None
+        loop = asyncio.get_running_loop()
+        futures = [self._pool.submit(fn, *args) for args in args_list]
+        remaining = [len(futures)]
+        self.pending += 1
+
+        def release() -> None:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                self.pending -= 1
+
+        def on_done(_: "concurrent.futures.Future[T]") -> None:
+            # called from the worker, the counter is only updated in the event loop
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                # event loop already closed
+                release()
+
+        for future in futures:
+            future.add_done_callback(on_done)
+        return [asyncio.wrap_future(future, loop=loop) for future in futures]
+
+    async def run(self, fn: Callable[..., T], *args: Any, size: int) -> T:
+        """
+        Runs a job inline or in the pool depending on its size.
+        :param fn: function to be called, must be defined at the module level in process mode.
+        :param args: arguments of the function, must be picklable in process mode.
+        :param size: size of the job, usually its number of contracts.
+        :return: the result of the function.
+        :raises ExecutorOverloadedError if the maximum number of pending jobs is reached.
+        :raises ExecutorTimeoutError if the job does not complete in time.
+        """
+        if self._pool is None or size < self.inline_threshold:
+            return fn(*args)
+
+        if self.pending >= self.max_pending:
+            raise ExecutorOverloadedError(
+                f"Too many optimizations in progress ({self.pending})"
+            )
+
+        [future] = self._submit(fn, [args])
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise ExecutorTimeoutError(
+                f"Optimization did not complete in {self.timeout}s"
+            ) from None
+
+    async def run_all(
+        self, fn: Callable[..., T], args_list: Sequence[Sequence[Any]], *, size: int
+    ) -> List[Union[T, BaseException]]:
+        """
+        Runs several jobs at once, inline or in parallel in the pool depending on their total size.
+        They count as a single pending job, and the timeout applies to each of them from their submission:
+        jobs not complete in time get an ExecutorTimeoutError as result, without impacting the others,
+        and are cancelled if they did not start yet.
+        :param fn: function to be called, must be defined at the module level in process mode.
+        :param args_list: arguments of each call, must be picklable in process mode.
+        :param size: total size of the jobs, usually their number of contracts.
+        :return: the result of each call, or the exception it raised.
+        :raises ExecutorOverloadedError if the maximum number of pending jobs is reached.
+        """
+        results: List[Union[T, BaseException]] = []
+        if self._pool is None or size < self.inline_threshold or not args_list:
+            for args in args_list:
+                try:
+                    results.append(fn(*args))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        if self.pending >= self.max_pending:
+            raise ExecutorOverloadedError(
+                f"Too many optimizations in progress ({self.pending})"
+            )
+
+        futures = self._submit(fn, args_list)
+        await asyncio.wait(futures, timeout=self.timeout)
+        for future in futures:
+            if not future.done():
+                future.cancel()
+                results.append(
+                    ExecutorTimeoutError(
+                        f"Optimization did not complete in {self.timeout}s"
+                    )
+                )
+                continue
+            exception = future.exception()
+            results.append(future.result() if exception is None else exception)
+        return results
+
+    def shutdown(self) -> None:
+        """Stops the pool of workers, cancelling queued jobs."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
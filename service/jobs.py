@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobNotFoundError(KeyError):
+    """Raised when a job does not exist, or its result expired."""
+
+
+class JobLimitError(Exception):
+    """Raised when the maximum number of jobs queued or running is reached."""
+
+
+class JobNotDoneError(Exception):
+    """Raised when the result of a job is requested before it completed successfully."""
+
+
+class Job:
+    """
+    Optimization submitted to a JobQueue, with its status and result once finished.
+    """
+
+    def __init__(
+        self, work: Callable[[], Awaitable[Dict[str, Any]]], size: int, deadline: float
+    ):
+        """
+        :param work: coroutine function running the optimization.
+        :param size: size of the job, usually its number of contracts.
+        :param deadline: virtual deadline of the job, jobs are started by ascending deadline.
+        """
+        self.job_id = uuid.uuid4().hex
+        # released once the job is finished, with the contracts it holds
+        self.work: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = work
+        self.size = size
+        self.deadline = deadline
+        self.status = QUEUED
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.task: Optional["asyncio.Future[None]"] = None
+
+    @property
+    def finished(self) -> bool:
+        """Returns True if the job is done, failed or cancelled."""
+        return self.status in (DONE, FAILED, CANCELLED)
+
+
+class JobQueue:
+    """
+    Queue of optimizations run in the background, polled by job id.
+
+    At most max_running jobs run at the same time, through the executor of the caller.
+    Jobs are scheduled by earliest virtual deadline: their submission time plus their estimated
+    duration, proportional to their size. Jobs of similar sizes run in FIFO order, short jobs
+    overtake huge ones submitted a bit earlier, and a huge job is never postponed by jobs submitted
+    later than its own deadline, so it cannot starve.
+    Finished jobs are kept for a time to live, then discarded on the next call.
+    NOTE: the queue lives in the event loop of a single process, with several uvicorn workers
+    all requests of a job must be routed to the same worker, as for sessions.
+    """
+
+    # rough duration of an optimization per contract, for the virtual deadlines only
+    SECONDS_PER_CONTRACT = 5e-6
+
+    def __init__(self, max_running: int = 1, max_jobs: int = 100, ttl: float = 3600.0):
+        """
+        Initializes an empty queue.
+        :param max_running: maximum number of jobs running at the same time (defaults to 1).
+        :param max_jobs: maximum number of jobs queued or running (defaults to 100).
+        :param ttl: duration finished jobs are kept, in seconds (defaults to 3600).
+        """
+        self.max_running = max_running
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.running = 0
+        self._jobs: Dict[str, Job] = {}
+        # queued jobs: (deadline, counter for ties, job), cancelled ones are skipped when popped
+        self._queue: List[Tuple[float, int, Job]] = []
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    @property
+    def pending(self) -> int:
+        """Returns the number of jobs queued or running."""
+        return sum(not job.finished for job in self._jobs.values())
+
+    def submit(self, work: Callable[[], Awaitable[Dict[str, Any]]], size: int) -> str:
+        """
+        Queues a job, started as soon as a slot is available. Must be called from the event loop.
+        :param work: coroutine function running the optimization and returning its result.
+        :param size: size of the job, usually its number of contracts.
+        :return: the id of the job.
+        :raises JobLimitError if the maximum number of jobs queued or running is reached.
+        """
+        self._expire()
+        pending = self.pending
+        if pending >= self.max_jobs:
+            raise JobLimitError(f"Too many jobs in progress ({pending})")
+
+        deadline = time.monotonic() + size * self.SECONDS_PER_CONTRACT
+        job = Job(work, size, deadline)
+        self._jobs[job.job_id] = job
+        self._counter += 1
+        heapq.heappush(self._queue, (deadline, self._counter, job))
+        self._dispatch()
+        return job.job_id
+
+    def get(self, job_id: str) -> Job:
+        """
+        Returns a job.
+        :raises JobNotFoundError if the job does not exist or expired.
+        """
+        self._expire()
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise JobNotFoundError(job_id) from None
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Returns the status of a job: its position in the queue while queued,
+        its durations of wait and run, and its error if it failed.
+        :raises JobNotFoundError if the job does not exist or expired.
+        """
+        job = self.get(job_id)
+        now = time.monotonic()
+        status: Dict[str, Any] = {
+            "job_id": job.job_id,
+            "status": job.status,
+            "contracts": job.size,
+            "waited": (job.started_at or job.finished_at or now) - job.submitted_at,
+        }
+        if job.status == QUEUED:
+            status["position"] = sum(
+                1
+                for _, _, other in self._queue
+                if other.status == QUEUED and other.deadline < job.deadline
+            )
+        if job.started_at is not None:
+            status["ran"] = (job.finished_at or now) - job.started_at
+        if job.error is not None:
+            status["error"] = job.error
+        return status
+
+    def result(self, job_id: str) -> Dict[str, Any]:
+        """
+        Returns the result of a job.
+        :raises JobNotFoundError if the job does not exist or expired.
+        :raises JobNotDoneError if the job is not done, or failed or was cancelled.
+        """
+        job = self.get(job_id)
+        if job.status != DONE or job.result is None:
+            raise JobNotDoneError(f"Job {job.status}")
+        return job.result
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        Cancels a job queued or running, finished jobs are left untouched.
+        NOTE: a running optimization is not interrupted in its worker, its result is discarded.
+        Its slot is only released once it completes, so that the next job does not find its worker busy.
+        :return: the status of the job.
+        :raises JobNotFoundError if the job does not exist or expired.
+        """
+        job = self.get(job_id)
+        if job.status in (QUEUED, RUNNING):
+            self._finish(job, CANCELLED)
+        return self.status(job_id)
+
+    def _dispatch(self) -> None:
+        while self.running < self.max_running and self._queue:
+            _, _, job = heapq.heappop(self._queue)
+            if job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            job.started_at = time.monotonic()
+            self.running += 1
+            job.task = asyncio.ensure_future(self._run(job))
+
+    async def _run(self, job: Job) -> None:
+        assert job.work is not None
+        try:
+            result = await job.work()
+        except Exception as e:
+            if job.status == RUNNING:
+                job.error = f"{e.__class__.__name__}: {e}"
+                self._finish(job, FAILED)
+        else:
+            if job.status == RUNNING:
+                job.result = result
+                self._finish(job, DONE)
+        finally:
+            # released even if the job was cancelled meanwhile, only once its work is done
+            self.running -= 1
+        self._dispatch()
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.monotonic()
+        job.work = None
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at >= self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,305 @@
+import abc
+import bisect
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+# upper bounds of the payload size buckets, in number of contracts
+SIZE_BUCKETS = (
+    (100, "100"),
+    (10**3, "1k"),
+    (10**4, "10k"),
+    (10**5, "100k"),
+    (10**6, "1M"),
+)
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+M = TypeVar("M", bound="Metric")
+
+
+def size_bucket(nb_contracts: int) -> str:
+    """
+    Returns the label of the size bucket of a payload, e.g. "10k" for 1001 to 10000 contracts.
+    :param nb_contracts: number of contracts of the payload.
+    """
+    for upper_bound, label in SIZE_BUCKETS:
+        if nb_contracts <= upper_bound:
+            return label
+    return "+Inf"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(abc.ABC):
+    """
+    Base class of the metrics, holding one value per combination of label values.
+    Metrics are updated from the event loop only, so they are not protected by any lock.
+    """
+
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        """
+        :param name: name of the metric, in Prometheus format.
+        :param documentation: description of the metric.
+        :param labels: names of the labels of the metric.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._label_set = frozenset(labels)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if labels.keys() != self._label_set:
+            raise ValueError(f"Metric {self.name} expects labels {self.labels}")
+        return tuple(labels[name] for name in self.labels)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        """Returns the lines of the samples of the metric."""
+
+    def render(self) -> List[str]:
+        """Returns the lines of the metric in Prometheus text format."""
+        return [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.TYPE}",
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    """Cumulative value, only increasing."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increments the counter of the given label values.
+        :param amount: value to be added (defaults to 1).
+        """
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """
+    Value going up and down, either updated by the application,
+    or computed by a function when metrics are collected.
+    """
+
+    TYPE = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        """
+        :param function: function computing the value when metrics are collected,
+        for a gauge without label (defaults to None).
+        """
+        super().__init__(name, documentation, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.function = function
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increments the gauge of the given label values."""
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """Decrements the gauge of the given label values."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        """Sets the gauge of the given label values."""
+        self.values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            return [f"{self.name} {_format_value(self.function())}"]
+        return [
+            f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in buckets, with their count and sum.
+    An observation only costs a binary search and a few additions.
+    """
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        :param buckets: upper bounds of the buckets, sorted, +Inf is implicit.
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # per label values: observations per bucket (not cumulative, last one is +Inf), and sum
+        self.values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Records an observation for the given label values.
+        :param value: observed value.
+        """
+        key = self._key(labels)
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for upper_bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                labels = self._format_labels(key, f'le="{_format_value(upper_bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total[0]!r}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Set of metrics of the service, rendered in Prometheus text format when collected.
+    Nothing is computed until metrics are collected, except the updates of the metrics themselves.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        """
+        Adds a metric to the registry.
+        :param metric: metric to be added.
+        :return: the metric.
+        :raises ValueError if a metric with the same name is already registered.
+        """
+        if metric.name in self.metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Returns all metrics in Prometheus text format."""
+        lines = [line for metric in self.metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests by endpoint and status, their duration,
+    and the number of requests in flight.
+    Endpoints are identified by the name of their function, so that path parameters
+    like session ids do not create new label values.
+    """
+
+    def __init__(self, app: Any, registry: MetricsRegistry):
+        """
+        :param app: ASGI application.
+        :param registry: registry where the request metrics are added.
+        """
+        self.app = app
+        self.requests = registry.register(
+            Counter(
+                "spaceship_http_requests_total",
+                "HTTP requests handled, by endpoint and status code.",
+                ["handler", "status"],
+            )
+        )
+        self.duration = registry.register(
+            Histogram(
+                "spaceship_http_request_duration_seconds",
+                "Duration of the HTTP requests, by endpoint.",
+                ["handler"],
+            )
+        )
+        self.in_flight = registry.register(
+            Gauge(
+                "spaceship_http_requests_in_flight",
+                "HTTP requests being handled.",
+            )
+        )
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight.dec()
+            # endpoint is set in the scope by the router, once the route is found
+            endpoint = scope.get("endpoint")
+            handler = getattr(endpoint, "__name__", "none")
+            self.requests.inc(handler=handler, status=str(status))
+            self.duration.observe(time.perf_counter() - start_time, handler=handler)
@@ -0,0 +1,168 @@
+import json
+import zlib
+from array import array
+from typing import Any, List, Optional
+
+import numpy as np
+
+from optimizer.contract_columns import ContractColumns
+
+
+class ContractParseError(ValueError):
+    """Raised when a line of the payload is not a valid contract."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+class PayloadTooLargeError(ContractParseError):
+    """Raised when the payload, once decompressed, is larger than allowed."""
+
+
+class NdjsonContractReader:
+    """
+    Incremental parser of contracts serialized as newline-delimited JSON, optionally gzipped.
+
+    Each non-empty line must be a JSON object with a string "name" and integer
+    "start", "duration" and "price", extra keys are ignored.
+    Contracts are validated and appended to compact int64 buffers as chunks are fed,
+    without building any intermediate object per contract.
+    Parsing stops at the first invalid line, or when the payload decompressed exceeds its maximum size:
+    gzip data is never decompressed beyond it, so that a small compressed payload cannot exhaust memory.
+    """
+
+    INT_FIELDS = ("start", "duration", "price")
+
+    def __init__(self, gzipped: bool = False, max_size: Optional[int] = None):
+        """
+        Initializes an empty reader.
+        :param gzipped: when True, chunks are decompressed as gzip (defaults to False).
+        :param max_size: maximum size of the payload decompressed, in bytes, None if unlimited (defaults to None).
+        """
+        self._decompressor = (
+            zlib.decompressobj(wbits=16 + zlib.MAX_WBITS) if gzipped else None
+        )
+        self._buffer = bytearray()
+        self._line = 0
+        self.max_size = max_size
+        self._size = 0
+
+        self.names: List[str] = []
+        self.starts = array("q")
+        self.durations = array("q")
+        self.prices = array("q")
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Parses all complete lines of the chunk, incomplete last line is kept for the next chunk.
+        :param chunk: part of the payload, in any size.
+        :raises ContractParseError if a line is not a valid contract.
+        :raises PayloadTooLargeError if the payload decompressed exceeds the maximum size.
+        """
+        if self._decompressor is not None:
+            try:
+                chunk = self._decompressor.decompress(chunk, self._max_length())
+            except zlib.error as e:
+                raise ContractParseError(self._line + 1, f"invalid gzip data ({e})")
+        self._count(chunk)
+
+        # the incomplete line is only extended until a chunk completes it,
+        # so that a long line sent in many chunks is not copied on each one
+        if b"\n" not in chunk:
+            self._buffer += chunk
+            return
+        lines = chunk.split(b"\n")
+        lines[0] = bytes(self._buffer) + lines[0]
+        self._buffer = bytearray(lines.pop())
+        self._parse_lines(lines)
+
+    def close(self) -> ContractColumns:
+        """
+        Parses the last line and returns all the contracts read.
+        :return: the columns of the contracts, sharing memory with the reader buffers.
+        :raises ContractParseError if the last line is not a valid contract or gzip data is truncated.
+        :raises PayloadTooLargeError if the payload decompressed exceeds the maximum size.
+        """
+        if self._decompressor is not None:
+            tail = self._decompressor.flush(self._max_length() or zlib.DEF_BUF_SIZE)
+            self._count(tail)
+            self._buffer += tail
+            if not self._decompressor.eof:
+                raise ContractParseError(self._line + 1, "truncated gzip data")
+
+        self._parse_lines([bytes(self._buffer)])
+        self._buffer = bytearray()
+
+        return ContractColumns(
+            self.names,
+            np.frombuffer(self.starts, dtype=np.int64),
+            np.frombuffer(self.durations, dtype=np.int64),
+            np.frombuffer(self.prices, dtype=np.int64),
+        )
+
+    def _max_length(self) -> int:
+        # decompresses one byte more than allowed, to detect payloads too large, 0 if unlimited
+        return 0 if self.max_size is None else self.max_size - self._size + 1
+
+    def _count(self, chunk: bytes) -> None:
+        self._size += len(chunk)
+        if self.max_size is not None and self._size > self.max_size:
+            raise PayloadTooLargeError(
+                self._line + 1, f"payload larger than {self.max_size} bytes"
+            )
+
+    def _parse_lines(self, lines: List[bytes]) -> None:
+        numbered_lines = [
+            (self._line + i, line.strip())
+            for i, line in enumerate(lines, 1)
+            if line.strip()
+        ]
+        self._line += len(lines)
+
+        # lines are decoded all at once when each one looks like a single JSON object
+        # (strings cannot span lines), otherwise one by one to locate the error
+        items: Any = None
+        if all(line[0] == 123 and line[-1] == 125 for _, line in numbered_lines):
+            try:
+                items = json.loads(
+                    b"[" + b",".join(line for _, line in numbered_lines) + b"]"
+                )
+            except ValueError:
+                pass
+        if items is None or len(items) != len(numbered_lines):
+            items = [self._decode(line, number) for number, line in numbered_lines]
+
+        for (number, _), item in zip(numbered_lines, items):
+            self._append(item, number)
+
+    @staticmethod
+    def _decode(line: bytes, number: int) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise ContractParseError(number, f"invalid JSON ({e})")
+
+    def _append(self, item: Any, number: int) -> None:
+        if not isinstance(item, dict):
+            raise ContractParseError(number, "contract must be a JSON object")
+
+        name = item.get("name")
+        if not isinstance(name, str):
+            raise ContractParseError(number, "field 'name' must be a string")
+
+        values = []
+        for field in self.INT_FIELDS:
+            value = item.get(field)
+            if type(value) is not int:
+                raise ContractParseError(number, f"field '{field}' must be an integer")
+            values.append(value)
+
+        try:
+            self.starts.append(values[0])
+            self.durations.append(values[1])
+            self.prices.append(values[2])
+        except OverflowError:
+            raise ContractParseError(number, "integer out of 64-bit range")
+        self.names.append(name)
@@ -0,0 +1,210 @@
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from optimizer.contract_optimizer import ContractOptimizer
+from optimizer.stopwatch import Stopwatch
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_TOP = 20
+
+# tracemalloc is global to the process: profiles of concurrent threads run one at a time
+_profile_lock = threading.Lock()
+
+
+class _PeakSnapshot:
+    """
+    Keeps the snapshot of the memory traced at the end of the phase holding the most memory:
+    a snapshot at the end of the call would only show the memory still held by the result.
+    """
+
+    def __init__(self, profiler: cProfile.Profile) -> None:
+        self.profiler = profiler
+        self.phase = "end"
+        self.traced = -1
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def take(self, phase: str) -> None:
+        traced = tracemalloc.get_traced_memory()[0]
+        if traced > self.traced:
+            self.profiler.disable()
+            self.phase = phase
+            self.traced = traced
+            self.snapshot = tracemalloc.take_snapshot()
+            self.profiler.enable()
+
+
+def _top_functions(profiler: cProfile.Profile, top: int) -> List[Dict[str, Any]]:
+    stats: Dict[Tuple[str, int, str], Tuple[Any, ...]] = pstats.Stats(
+        profiler
+    ).stats  # type: ignore[attr-defined]
+    ordered = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": f"{file}:{line}({name})",
+            "calls": calls,
+            "tottime": tottime,
+            "cumtime": cumtime,
+        }
+        for (file, line, name), (_, calls, tottime, cumtime, _) in ordered[:top]
+    ]
+
+
+def _top_allocations(
+    snapshot: Optional[tracemalloc.Snapshot], top: int
+) -> List[Dict[str, Any]]:
+    if snapshot is None:
+        return []
+    # allocations of the profiler itself are not relevant
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "bytes": stat.size,
+            "blocks": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+
+
+def profile_optimizer(
+    optimizer: ContractOptimizer, top: int = PROFILE_TOP
+) -> Tuple[Dict[str, Any], Dict[str, float], Dict[str, Any]]:
+    """
+    Runs the optimization like measure_optimizer, under cProfile and tracemalloc,
+    defined at the module level to be sent to worker processes.
+    Allocation sites are the ones holding memory at the end of the phase with the most memory traced,
+    listening to the phases of the current thread only, so that the profiler is never enabled in other threads.
+    NOTE: both profilers slow the optimization down several times, and tracemalloc traces all threads:
+    in thread mode, profiles wait for each other, and allocations of concurrent optimizations are reported too.
+    :param optimizer: optimizer initialized with the contracts.
+    :param top: number of functions and allocation sites reported (defaults to PROFILE_TOP).
+    :return: the result of the optimization, the durations of its phases if recorded, and the profile:
+    its duration, peak memory, top functions by cumulative time and top allocation sites by size.
+    """
+    with _profile_lock:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        peak = _PeakSnapshot(profiler)
+        previous_listener = Stopwatch.listener()
+        Stopwatch.set_listener(peak.take)
+
+        start_time = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                result = optimizer.optimize()
+            finally:
+                profiler.disable()
+            seconds = time.perf_counter() - start_time
+            if peak.snapshot is None:
+                # optimizers without phases, the memory they still hold
+                peak.snapshot = tracemalloc.take_snapshot()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            Stopwatch.set_listener(previous_listener)
+            if started_tracing:
+                tracemalloc.stop()
+
+    profile = {
+        "seconds": seconds,
+        "peak_bytes": peak_bytes,
+        "functions": _top_functions(profiler, top),
+        "allocations_phase": peak.phase,
+        "allocations": _top_allocations(peak.snapshot, top),
+    }
+    return result, getattr(optimizer, "phases", {}), profile
+
+
+class ProfileRecorder:
+    """
+    Decides which requests are profiled, and keeps their profiles.
+
+    Requests are profiled on demand by authorized callers only, sending the token of the settings
+    in the X-Profile-Token header, or automatically one in sample_rate optimizations.
+    Profiles are written as json files in a local folder, named by time so that the oldest ones
+    are removed above max_files.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        sample_rate: int = 0,
+        directory: Optional[str] = None,
+        max_files: int = 100,
+    ):
+        """
+        :param token: secret of the callers allowed to profile requests, None disables it (defaults to None).
+        :param sample_rate: one in sample_rate optimizations is profiled, 0 disables sampling (defaults to 0).
+        :param directory: folder where profiles are written, None disables it (defaults to None).
+        :param max_files: maximum number of profiles kept in the folder (defaults to 100).
+        """
+        self.token = token
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.max_files = max_files
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._counter = itertools.count(1)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """
+        Returns True if a caller is allowed to profile requests.
+        :param token: token sent by the caller, None if missing.
+        """
+        if self.token is None or token is None:
+            return False
+        return hmac.compare_digest(token.encode(), self.token.encode())
+
+    def sample(self) -> bool:
+        """Returns True one call in sample_rate, if sampling is enabled."""
+        return self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0
+
+    def save(self, handler: str, profile: Dict[str, Any]) -> Optional[str]:
+        """
+        Writes a profile in the folder, removing the oldest profiles above max_files.
+        :param handler: name of the endpoint profiled.
+        :param profile: profile to be written.
+        :return: the path of the file written, None if no folder is set.
+        """
+        if self.directory is None:
+            return None
+
+        path = os.path.join(
+            self.directory, f"{time.time_ns()}-{handler}-{uuid.uuid4().hex[:8]}.json"
+        )
+        # written in a temporary file then renamed, so that profiles are never read partially
+        fd, temporary_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(profile, f)
+            os.replace(temporary_path, path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return None
+
+        profiles = sorted(f for f in os.listdir(self.directory) if f.endswith(".json"))
+        for name in profiles[: max(0, len(profiles) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return path
@@ -0,0 +1,80 @@
+import asyncio
+import uuid
+from typing import Dict, Iterable
+
+from optimizer.contract import Contract
+from optimizer.contract_book import ContractBook
+
+
+class SessionNotFoundError(KeyError):
+    """Raised when a session does not exist."""
+
+
+class SessionLimitError(Exception):
+    """Raised when the maximum number of sessions is reached."""
+
+
+class SessionStore:
+    """
+    In-memory registry of contract books, identified by a random session id.
+    Each session has a lock: books are optimized in a thread, off the event loop,
+    and must not be edited meanwhile.
+    NOTE: sessions are local to the process, with several uvicorn workers
+    all requests of a session must be routed to the same worker.
+    """
+
+    def __init__(self, max_sessions: int = 100):
+        """
+        Initializes an empty store.
+        :param max_sessions: maximum number of sessions kept at the same time (defaults to 100).
+        """
+        self.max_sessions = max_sessions
+        self._books: Dict[str, ContractBook] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def create(self, contracts: Iterable[Contract]) -> str:
+        """
+        Creates a session holding a new contract book.
+        :param contracts: initial contracts of the book.
+        :return: the id of the session.
+        :raises SessionLimitError if the maximum number of sessions is reached.
+        :raises ValueError if several contracts have the same name.
+        """
+        if len(self._books) >= self.max_sessions:
+            raise SessionLimitError(f"Too many sessions ({len(self._books)})")
+
+        book = ContractBook(contracts)
+        session_id = uuid.uuid4().hex
+        self._books[session_id] = book
+        self._locks[session_id] = asyncio.Lock()
+        return session_id
+
+    def get(self, session_id: str) -> ContractBook:
+        """
+        Returns the contract book of a session.
+        :raises SessionNotFoundError if the session does not exist.
+        """
+        try:
+            return self._books[session_id]
+        except KeyError:
+            raise SessionNotFoundError(session_id) from None
+
+    def delete(self, session_id: str) -> None:
+        """
+        Deletes a session and its contract book.
+        :raises SessionNotFoundError if the session does not exist.
+        """
+        self.get(session_id)
+        del self._books[session_id]
+        del self._locks[session_id]
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """
+        Returns the lock of a session, held while its book is edited or optimized.
+        :raises SessionNotFoundError if the session does not exist.
+        """
+        self.get(session_id)
+        return self._locks[session_id]
@@ -0,0 +1,62 @@
+from typing import Literal, Optional
+
+from pydantic import BaseSettings
+
+
+class Settings(BaseSettings):
+    """API settings, read from environment variables prefixed with SPACESHIP_.
+
+    Attributes:
+        optimizer           Name of the optimization engine, auto selects it by time span of the contracts.
+        prune               Removes contracts dominated by another one before optimizing a single schedule.
+        executor            Backend running the optimizations: inline, thread or process.
+        max_workers         Number of workers of the thread/process pool (defaults to number of cores).
+        inline_threshold    Payloads with fewer contracts are always optimized inline.
+        max_pending         Maximum number of optimizations queued or running in the pool.
+        timeout             Maximum duration of an optimization in the pool, in seconds.
+        max_sessions        Maximum number of contract books kept in memory.
+        max_analyses        Maximum number of contract analyses kept in memory, the least recently used are evicted.
+        max_schedules       Maximum number of best schedules returned by an optimization.
+        max_occurrences     Maximum number of occurrences of the recurring templates of a request.
+        max_stream_bytes    Maximum size of a streamed body, once decompressed.
+        job_workers         Number of workers of the pool running jobs.
+        job_timeout         Maximum duration of a job, in seconds (unlimited if unset).
+        max_jobs            Maximum number of jobs queued or running.
+        job_ttl             Duration results of jobs are kept, in seconds.
+        cache_max_entries   Maximum number of results cached in memory, 0 disables memory cache.
+        cache_max_bytes     Approximate maximum size of the results cached in memory.
+        cache_dir           Folder caching results on disk, shared by all workers (disabled if unset).
+        cache_max_files     Maximum number of results cached on disk, the least recently used ones are removed.
+        profile_token       Secret of the callers allowed to profile requests (disabled if unset).
+        profile_sample_rate One in this number of optimizations is profiled, 0 disables sampling.
+        profile_dir         Folder where profiles are written (disabled if unset).
+        profile_max_files   Maximum number of profiles kept in the folder, the oldest ones are removed.
+    """
+
+    optimizer: str = "auto"
+    prune: bool = False
+    executor: Literal["inline", "thread", "process"] = "process"
+    max_workers: Optional[int] = None
+    inline_threshold: int = 10000
+    max_pending: int = 64
+    timeout: Optional[float] = 30.0
+    max_sessions: int = 100
+    max_analyses: int = 100
+    max_schedules: int = 100
+    max_occurrences: int = 10_000_000
+    max_stream_bytes: int = 2**30
+    job_workers: int = 1
+    job_timeout: Optional[float] = None
+    max_jobs: int = 100
+    job_ttl: float = 3600.0
+    cache_max_entries: int = 1024
+    cache_max_bytes: int = 64 * 2**20
+    cache_dir: Optional[str] = None
+    cache_max_files: int = 100_000
+    profile_token: Optional[str] = None
+    profile_sample_rate: int = 0
+    profile_dir: Optional[str] = None
+    profile_max_files: int = 100
+
+    class Config:
+        env_prefix = "SPACESHIP_"
@@ -0,0 +1,489 @@
+import argparse
+import json
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from os import path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from optimizer.contract import Contract
+from optimizer.contract_book import ContractBook
+from optimizer.contract_optimizer import (
+    ContractOptimizer,
+    ContractOptimizerFast,
+    ContractOptimizerNaive,
+    ContractOptimizerNaiveImproved,
+)
+from optimizer.contract_optimizer_numpy import ContractOptimizerNumpy
+from optimizer.dominance import ContractOptimizerPruned
+from optimizer.fleet_optimizer import ContractFleetOptimizer
+from optimizer.rolling_optimizer import ContractOptimizerRolling
+from optimizer.time_axis_optimizer import ContractOptimizerTimeAxis, select_optimizer
+from optimizer.timeline_decomposition import ContractOptimizerDecomposed
+from optimizer.top_k_optimizer import ContractOptimizerTopK
+from optimizer.window_index import ContractWindowIndex
+from service.columnar import read_columns
+from test.contract_generator import WorkloadGenerator
+
+
+def _make_contracts(
+    starts: Sequence[int], durations: Sequence[int], rng: random.Random
+) -> List[Contract]:
+    return [
+        Contract(
+            name=f"c{i}", start=start, duration=duration, price=rng.randint(0, 1000)
+        )
+        for i, (start, duration) in enumerate(zip(starts, durations))
+    ]
+
+
+def uniform(n: int, rng: random.Random) -> List[Contract]:
+    """Starts spread uniformly, durations up to 1000: each contract overlaps about 100 others."""
+    starts = [rng.randrange(10 * n) for _ in range(n)]
+    return _make_contracts(starts, [rng.randint(1, 1000) for _ in range(n)], rng)
+
+
+def disjoint_chains(n: int, rng: random.Random) -> List[Contract]:
+    """Contracts following each other without overlap: all of them belong to the best path."""
+    durations = [rng.randint(1, 100) for _ in range(n)]
+    starts = np.concatenate(([0], np.cumsum(durations[:-1]))).tolist()
+    contracts = _make_contracts(starts, durations, rng)
+    rng.shuffle(contracts)
+    return contracts
+
+
+def total_overlap(n: int, rng: random.Random) -> List[Contract]:
+    """Contracts all overlapping each other: the best path holds a single contract."""
+    starts = [rng.randrange(n) for _ in range(n)]
+    return _make_contracts(starts, [2 * n] * n, rng)
+
+
+def dense_overlap(n: int, rng: random.Random) -> List[Contract]:
+    """Contracts all overlapping each other with various durations, most of them containing another one."""
+    starts = [rng.randrange(n) for _ in range(n)]
+    return _make_contracts(starts, [rng.randint(n, 2 * n) for _ in range(n)], rng)
+
+
+def clustered(n: int, rng: random.Random) -> List[Contract]:
+    """Contracts gathered around a few busy periods, separated by idle periods."""
+    centers = [rng.randrange(100 * n) for _ in range(max(1, n // 1000))]
+    starts = [max(0, int(rng.gauss(rng.choice(centers), 500))) for _ in range(n)]
+    return _make_contracts(starts, [rng.randint(1, 100) for _ in range(n)], rng)
+
+
+def long_tail(n: int, rng: random.Random) -> List[Contract]:
+    """Mostly short contracts, with a few very long ones (Pareto distributed durations)."""
+    starts = [rng.randrange(10 * n) for _ in range(n)]
+    durations = [min(10 * n, int(rng.paretovariate(1.2))) for _ in range(n)]
+    return _make_contracts(starts, durations, rng)
+
+
+def duplicate_starts(n: int, rng: random.Random) -> List[Contract]:
+    """Many contracts sharing the same start, among about sqrt(n) distinct starts."""
+    distinct_starts = [100 * i for i in range(max(1, int(n**0.5)))]
+    starts = [rng.choice(distinct_starts) for _ in range(n)]
+    return _make_contracts(starts, [rng.randint(1, 1000) for _ in range(n)], rng)
+
+
+WORKLOADS: Dict[str, Callable[[int, random.Random], List[Contract]]] = {
+    f.__name__: f
+    for f in (
+        uniform,
+        disjoint_chains,
+        total_overlap,
+        dense_overlap,
+        clustered,
+        long_tail,
+        duplicate_starts,
+    )
+}
+
+# optimizers with the maximum number of contracts they are benchmarked on
+OPTIMIZERS: Dict[str, Tuple[Callable[[List[Contract]], ContractOptimizer], int]] = {
+    "naive": (ContractOptimizerNaive, 1000),
+    "naive_improved": (ContractOptimizerNaiveImproved, 1000),
+    "fast": (ContractOptimizerFast, 10**7),
+    "numpy": (ContractOptimizerNumpy, 10**7),
+    "time_axis": (ContractOptimizerTimeAxis, 10**7),
+    "auto": (select_optimizer, 10**7),
+    "decomposed": (ContractOptimizerDecomposed, 10**7),
+    "pruned": (ContractOptimizerPruned, 10**7),
+    # the online optimizer is fed by ascending start
+    "rolling": (
+        lambda contracts: ContractOptimizerRolling(
+            sorted(contracts, key=lambda c: c.start)
+        ),
+        10**7,
+    ),
+    "book": (ContractBook, 10**7),
+    "fleet": (lambda contracts: ContractFleetOptimizer(contracts, ships=2), 10**5),
+    "top_k": (lambda contracts: ContractOptimizerTopK(contracts, k=10), 10**6),
+}
+
+# optimizers scheduling a single ship, which must find the same income
+SINGLE_SHIP_OPTIMIZERS = {
+    "naive",
+    "naive_improved",
+    "fast",
+    "numpy",
+    "time_axis",
+    "auto",
+    "decomposed",
+    "pruned",
+    "rolling",
+    "book",
+}
+
+
+class Benchmark:
+    """
+    Benchmark of contract optimizers over several workload shapes.
+
+    For each optimizer, workload and number of contracts, it measures:
+    - the best wall time out of several repetitions, building the optimizer included ("init" phase);
+    - the durations of the phases of the optimization, for optimizers recording them;
+    - the peak memory allocated, in a separate run traced by tracemalloc.
+    Results can be saved as a JSON baseline, and compared to a previous baseline to detect regressions.
+    """
+
+    MEASURE_REPETITIONS = 3
+    # durations below this one are too noisy to be compared
+    MIN_COMPARED_SECONDS = 1e-3
+
+    def __init__(self, seed: int = 0, repetitions: int = MEASURE_REPETITIONS):
+        """
+        :param seed: seed of the workloads, so that baselines are measured on the same contracts.
+        :param repetitions: number of measures of the wall time, the best one is kept.
+        """
+        self.seed = seed
+        self.repetitions = repetitions
+
+    def measure(
+        self,
+        optimizer_class: Callable[[List[Contract]], ContractOptimizer],
+        contracts: List[Contract],
+    ) -> Dict[str, Any]:
+        """
+        Measures the optimization of a list of contracts.
+        :param optimizer_class: optimizer to be measured.
+        :param contracts: contracts to be optimized.
+        :return: the wall time, phases, peak memory and income of the optimization,
+        and the number of contracts pruned for optimizers pruning them.
+        """
+        best: Optional[Dict[str, Any]] = None
+        for _ in range(self.repetitions):
+            start_time = time.perf_counter()
+            optimizer = optimizer_class(contracts)
+            init_time = time.perf_counter()
+            result = optimizer.optimize()
+            end_time = time.perf_counter()
+
+            seconds = end_time - start_time
+            if best is None or seconds < best["seconds"]:
+                phases = {"init": init_time - start_time}
+                phases.update(getattr(optimizer, "phases", {}))
+                income = (
+                    result["income"]
+                    if "income" in result
+                    else [s["income"] for s in result["schedules"]]
+                )
+                best = {"seconds": seconds, "phases": phases, "income": income}
+                if hasattr(optimizer, "pruned"):
+                    best["pruned"] = optimizer.pruned
+        assert best is not None
+
+        tracemalloc.start()
+        optimizer_class(contracts).optimize()
+        best["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best
+
+    def measure_windows(
+        self, contracts: List[Contract], nb_windows: int
+    ) -> Dict[str, Any]:
+        """
+        Measures queries restricted to random time windows, answered by a ContractWindowIndex
+        and by a fresh ContractOptimizerFast on the contracts of each window.
+        :param contracts: contracts to be queried.
+        :param nb_windows: number of windows, each one covering up to a tenth of the timeline.
+        :return: the time to build the index, and the total time of the queries with each method.
+        """
+        rng = random.Random(self.seed)
+        first = min((c.start for c in contracts), default=0)
+        last = max((c.end for c in contracts), default=0)
+        windows = []
+        for _ in range(nb_windows):
+            start = rng.randint(first, last)
+            windows.append((start, start + rng.randint(0, (last - first) // 10)))
+
+        start_time = time.perf_counter()
+        index = ContractWindowIndex(contracts)
+        build_time = time.perf_counter()
+        indexed = [index.query(start, end)["income"] for start, end in windows]
+        index_time = time.perf_counter()
+        fresh = [
+            ContractOptimizerFast(
+                [c for c in contracts if c.start >= start and c.end <= end]
+            ).optimize()["income"]
+            for start, end in windows
+        ]
+        fresh_time = time.perf_counter()
+
+        if indexed != fresh:
+            print("WARNING: window index disagrees with fresh optimizations")
+        return {
+            "build": build_time - start_time,
+            "index": index_time - build_time,
+            "fresh": fresh_time - index_time,
+        }
+
+    def measure_stream(self, nb_contracts: int, distribution: str) -> Dict[str, Any]:
+        """
+        Measures the throughput of ContractOptimizerRolling on a feed of contracts by ascending start,
+        generated lazily by WorkloadGenerator.stream so that the feed is never held in memory.
+        The feed is generated once alone, so that its time can be subtracted.
+        :param nb_contracts: number of contracts of the feed.
+        :param distribution: shape of the contracts, in WorkloadGenerator.DISTRIBUTIONS.
+        :return: the wall time of the feed and of the optimization, the number of contracts optimized per second,
+        the maximum number of pending contracts, the number of committed points and contracts, the income,
+        and the peak resident memory of the process.
+        """
+        generator = WorkloadGenerator(distribution, self.seed)
+        start_time = time.perf_counter()
+        for _ in generator.stream(nb_contracts):
+            pass
+        feed_seconds = time.perf_counter() - start_time
+
+        optimizer = ContractOptimizerRolling()
+        commits = committed = 0
+        start_time = time.perf_counter()
+        for contract in generator.stream(nb_contracts):
+            names = optimizer.push(contract)
+            if names:
+                commits += 1
+                committed += len(names)
+        committed += len(optimizer.close())
+        seconds = time.perf_counter() - start_time - feed_seconds
+
+        # kilobytes on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {
+            "feed_seconds": feed_seconds,
+            "seconds": seconds,
+            "contracts_per_second": nb_contracts / max(seconds, 1e-12),
+            "max_pending": optimizer.max_pending,
+            "commits": commits,
+            "committed": committed,
+            "income": optimizer.committed_income,
+            "max_rss_bytes": max_rss if sys.platform == "darwin" else max_rss * 1024,
+        }
+
+    def run(
+        self,
+        optimizers: Sequence[str],
+        workloads: Sequence[str],
+        sizes: Sequence[int],
+        datasets: Sequence[str] = (),
+    ) -> Dict[str, Any]:
+        """
+        Measures all optimizers on all workloads and sizes, printing results as they come.
+        Optimizers are skipped on sizes above their maximum.
+        :param optimizers: names of the optimizers, in OPTIMIZERS.
+        :param workloads: names of the workloads, in WORKLOADS.
+        :param sizes: numbers of contracts.
+        :param datasets: files of contracts in the binary columnar layout, e.g. saved by WorkloadGenerator,
+        measured in addition to the workloads under their file name.
+        :return: the results by "optimizer/workload/size", with the environment they were measured in.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        for workload in workloads:
+            for n in sizes:
+                contracts = WORKLOADS[workload](n, random.Random(self.seed))
+                results.update(self._run_contracts(optimizers, workload, contracts))
+        for dataset in datasets:
+            contracts = read_columns(dataset).to_contracts()
+            results.update(
+                self._run_contracts(optimizers, path.basename(dataset), contracts)
+            )
+
+        return {
+            "environment": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+                "seed": self.seed,
+            },
+            "results": results,
+        }
+
+    def _run_contracts(
+        self, optimizers: Sequence[str], workload: str, contracts: List[Contract]
+    ) -> Dict[str, Dict[str, Any]]:
+        n = len(contracts)
+        results = {}
+        incomes = {}
+        for name in optimizers:
+            optimizer_class, max_contracts = OPTIMIZERS[name]
+            if n > max_contracts:
+                continue
+            result = self.measure(optimizer_class, contracts)
+            results[f"{name}/{workload}/{n}"] = result
+            print(self._format(name, workload, n, result))
+            if name in SINGLE_SHIP_OPTIMIZERS:
+                incomes[name] = result["income"]
+
+        if len(set(incomes.values())) > 1:
+            print(f"WARNING: optimizers disagree on {workload}/{n}: {incomes}")
+        return results
+
+    @staticmethod
+    def _format(optimizer: str, workload: str, n: int, result: Dict[str, Any]) -> str:
+        phases = ", ".join(f"{k} {v:.4f}s" for k, v in result["phases"].items())
+        if "pruned" in result:
+            phases += f" | {result['pruned']} pruned"
+        return (
+            f"{optimizer:<15} {workload:<17} {n:>9} | {result['seconds']:9.4f}s "
+            f"| {result['peak_bytes'] / 2**20:8.1f}MB | {phases}"
+        )
+
+    @classmethod
+    def compare(
+        cls, baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+    ) -> List[str]:
+        """
+        Compares results to a baseline, on the measures present in both.
+        :param baseline: results of a previous run.
+        :param current: results of the current run.
+        :param threshold: relative increase above which a measure is a regression, e.g. 0.2 for +20%.
+        :return: a description of each regression.
+        """
+        regressions = []
+        for key, result in current["results"].items():
+            reference = baseline["results"].get(key)
+            if reference is None:
+                continue
+            for measure, minimum in (
+                ("seconds", cls.MIN_COMPARED_SECONDS),
+                ("peak_bytes", 0),
+            ):
+                if max(result[measure], reference[measure]) < minimum:
+                    continue
+                if result[measure] > reference[measure] * (1 + threshold):
+                    increase = result[measure] / max(reference[measure], 1e-12) - 1
+                    regressions.append(
+                        f"{key} {measure}: {reference[measure]:.6g} -> "
+                        f"{result[measure]:.6g} (+{increase:.0%})"
+                    )
+            if result["income"] != reference["income"]:
+                regressions.append(
+                    f"{key} income: {reference['income']} -> {result['income']}"
+                )
+        return regressions
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of contract optimizers.")
+    parser.add_argument(
+        "--optimizers", nargs="+", default=list(OPTIMIZERS), choices=list(OPTIMIZERS)
+    )
+    parser.add_argument(
+        "--workloads",
+        nargs="+",
+        choices=list(WORKLOADS),
+        help="workloads generated for each size (defaults to all of them, none with --datasets)",
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument(
+        "--repetitions", type=int, default=Benchmark.MEASURE_REPETITIONS
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--datasets",
+        nargs="+",
+        default=[],
+        help="files of contracts in the binary columnar layout, measured in addition to the workloads",
+    )
+    parser.add_argument(
+        "--windows",
+        type=int,
+        help="number of random time windows queried with a window index "
+        "and with a fresh optimization, instead of benchmarking optimizers",
+    )
+    parser.add_argument(
+        "--stream",
+        type=int,
+        help="number of contracts of a feed by ascending start optimized online by the rolling optimizer, "
+        "instead of benchmarking optimizers",
+    )
+    parser.add_argument(
+        "--distribution",
+        default="uniform",
+        choices=WorkloadGenerator.DISTRIBUTIONS,
+        help="shape of the contracts of the feed with --stream (defaults to uniform)",
+    )
+    parser.add_argument(
+        "--save", help="JSON file where results are saved as a baseline"
+    )
+    parser.add_argument("--compare", help="JSON baseline to detect regressions against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative increase of a measure flagged as a regression (defaults to 0.2)",
+    )
+    options = parser.parse_args(args)
+    if options.workloads is None:
+        options.workloads = [] if options.datasets else list(WORKLOADS)
+
+    benchmark = Benchmark(seed=options.seed, repetitions=options.repetitions)
+    if options.windows:
+        for workload in options.workloads:
+            for n in options.sizes:
+                contracts = WORKLOADS[workload](n, random.Random(options.seed))
+                result = benchmark.measure_windows(contracts, options.windows)
+                print(
+                    f"{workload:<17} {n:>9} | build {result['build']:.4f}s "
+                    f"| index {result['index']:.4f}s | fresh {result['fresh']:.4f}s"
+                )
+        return 0
+    if options.stream:
+        result = benchmark.measure_stream(options.stream, options.distribution)
+        print(
+            f"rolling {options.distribution:<17} {options.stream:>9} "
+            f"| feed {result['feed_seconds']:.2f}s | optimize {result['seconds']:.2f}s "
+            f"| {result['contracts_per_second']:,.0f} contracts/s "
+            f"| {result['max_pending']} pending at most | {result['commits']} commits "
+            f"| {result['max_rss_bytes'] / 2**20:.1f}MB RSS"
+        )
+        return 0
+
+    current = benchmark.run(
+        options.optimizers, options.workloads, options.sizes, options.datasets
+    )
+
+    if options.save:
+        with open(options.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4)
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["environment"] != current["environment"]:
+            print("WARNING: baseline was measured in another environment")
+        regressions = Benchmark.compare(baseline, current, options.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,16 @@
+import argparse
 import json
 import random
 import string
 from os import path
-from typing import List
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
 
 from optimizer.contract import Contract
+from optimizer.contract_columns import ContractColumns
+from service.columnar import ColumnarNames, read_columns, write_columns
 
 
 class ContractGenerator:
@@ -16,23 +22,26 @@ class ContractGenerator:
         path.abspath(path.dirname(path.dirname(__file__))), "test", "data"
     )
 
-    def __init__(self, from_file: bool = False):
+    def __init__(self, from_file: bool = False, rng: Optional[random.Random] = None):
         """
         Initializes settings for contract generation.
         :param from_file: when True, contracts are generated from json files in data folder (defaults to False).
+        :param rng: random generator of the contracts, the global one of the random module if None
+        (defaults to None).
         """
         self.from_file = from_file
+        self.rng = rng
 
-    @staticmethod
-    def _generate_random_contract() -> Contract:
+    def _generate_random_contract(self) -> Contract:
         """
         Returns a single Contract randomly generated.
         """
+        rng = self.rng or random
         return Contract(
-            name="".join(random.choices(string.ascii_lowercase, k=12)),
-            start=random.randint(0, 1000),
-            duration=random.randint(1, 1000),
-            price=random.randint(0, 1000),
+            name="".join(rng.choices(string.ascii_lowercase, k=12)),
+            start=rng.randint(0, 1000),
+            duration=rng.randint(1, 1000),
+            price=rng.randint(0, 1000),
         )
 
     def generate(
@@ -53,9 +62,7 @@ class ContractGenerator:
                 save_payload = True
                 pass
 
-        contracts = [
-            ContractGenerator._generate_random_contract() for _ in range(nb_contracts)
-        ]
+        contracts = [self._generate_random_contract() for _ in range(nb_contracts)]
 
         if save_payload:
             with open(
@@ -64,7 +71,10 @@ class ContractGenerator:
                 encoding="utf-8",
             ) as f:
                 json.dump(
-                    [c._asdict() for c in contracts], f, ensure_ascii=False, indent=4
+                    [c._asdict() for c in contracts],
+                    f,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
                 )
 
         return contracts
@@ -80,3 +90,224 @@ class ContractGenerator:
         with open(path.join(self.DATA_FOLDER, json_file)) as f:
             data = json.load(f)
             return [Contract(**c) for c in data]
+
+
+class WorkloadGenerator:
+    """
+    Seeded generator of large sets of contracts, for capacity tests and benchmarks.
+
+    Contracts are generated lazily in chunks of columns with numpy, named "c0", "c1"... in order,
+    each chunk being drawn from its own generator seeded by the seed and the chunk index:
+    the same seed, distribution and chunk size always give the same contracts.
+    Distributions, for n contracts:
+    - uniform: starts within [0, 10n), durations within [1, 1000], each contract overlaps about 100 others;
+    - clustered: starts gathered around n / 1000 busy periods within [0, 100n), durations within [1, 100];
+    - heavy_tailed: starts within [0, 10n), mostly short durations with a few very long ones (Pareto);
+    - dense_overlap: starts within [0, n), durations within [n, 2n], all contracts overlap each other.
+    Prices are within [0, 1000].
+    """
+
+    DISTRIBUTIONS = ("uniform", "clustered", "heavy_tailed", "dense_overlap")
+    CHUNK_SIZE = 1_000_000
+    STREAM_BLOCK_SIZE = 4096
+
+    def __init__(
+        self,
+        distribution: str = "uniform",
+        seed: int = 0,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        """
+        :param distribution: shape of the contracts, in DISTRIBUTIONS (defaults to uniform).
+        :param seed: seed of the contracts (defaults to 0).
+        :param chunk_size: number of contracts per chunk (defaults to CHUNK_SIZE).
+        :raises ValueError if the distribution is unknown or the chunk size is not positive.
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution {distribution}")
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive")
+        self.distribution = distribution
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    def chunks(self, nb_contracts: int) -> Iterator[ContractColumns]:
+        """
+        Generates contracts lazily, one chunk at a time.
+        :param nb_contracts: total number of contracts to be generated.
+        :return: an iterator over chunks of at most chunk_size contracts.
+        """
+        centers: Optional[npt.NDArray[np.int64]] = None
+        if self.distribution == "clustered":
+            centers = np.random.default_rng([self.seed]).integers(
+                0, 100 * nb_contracts, max(1, nb_contracts // 1000)
+            )
+
+        for index, first in enumerate(range(0, nb_contracts, self.chunk_size)):
+            size = min(self.chunk_size, nb_contracts - first)
+            rng = np.random.default_rng([self.seed, index])
+            starts, durations = self._draw(rng, size, nb_contracts, centers)
+            prices = rng.integers(0, 1000, size, endpoint=True)
+            yield ContractColumns(self._names(first, size), starts, durations, prices)
+
+    def _draw(
+        self,
+        rng: np.random.Generator,
+        size: int,
+        n: int,
+        centers: Optional[npt.NDArray[np.int64]],
+    ) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        """
+        Returns the starts and durations of size contracts, out of a dataset of n contracts.
+        """
+        if self.distribution == "uniform":
+            starts = rng.integers(0, 10 * n, size)
+            durations = rng.integers(1, 1000, size, endpoint=True)
+        elif self.distribution == "clustered":
+            assert centers is not None
+            around = rng.normal(centers[rng.integers(0, len(centers), size)], 500)
+            starts = np.maximum(around, 0).astype(np.int64)
+            durations = rng.integers(1, 100, size, endpoint=True)
+        elif self.distribution == "heavy_tailed":
+            starts = rng.integers(0, 10 * n, size)
+            # numpy draws the Pareto distribution shifted to 0, as a Lomax distribution
+            durations = np.minimum(rng.pareto(1.2, size) + 1, 10 * n).astype(np.int64)
+        else:
+            starts = rng.integers(0, n, size)
+            durations = rng.integers(n, 2 * n, size, endpoint=True)
+        return starts, durations
+
+    def stream(self, nb_contracts: int) -> Iterator[Contract]:
+        """
+        Generates contracts lazily by ascending start, like a time-ordered feed.
+        Each chunk is drawn as a dataset of chunk_size contracts, sorted by start,
+        then shifted to start after the previous chunk.
+        :param nb_contracts: number of contracts to be generated.
+        :return: an iterator over the contracts.
+        """
+        offset = 0
+        for index, first in enumerate(range(0, nb_contracts, self.chunk_size)):
+            size = min(self.chunk_size, nb_contracts - first)
+            rng = np.random.default_rng([self.seed, index])
+            centers = (
+                rng.integers(0, 100 * size, max(1, size // 1000))
+                if self.distribution == "clustered"
+                else None
+            )
+            starts, durations = self._draw(rng, size, size, centers)
+            prices = rng.integers(0, 1000, size, endpoint=True)
+            order = np.argsort(starts, kind="stable")
+            starts = starts[order]
+            starts += offset - int(starts[0])
+            offset = int(starts[-1])
+            names, durations, prices = (
+                self._names(first, size),
+                durations[order],
+                prices[order],
+            )
+            # converted by blocks, so that a chunk is never held as contracts
+            for block in range(0, size, self.STREAM_BLOCK_SIZE):
+                end = block + self.STREAM_BLOCK_SIZE
+                yield from map(
+                    Contract._make,
+                    zip(
+                        names[block:end],
+                        starts[block:end].tolist(),
+                        durations[block:end].tolist(),
+                        prices[block:end].tolist(),
+                    ),
+                )
+
+    @staticmethod
+    def _names(first: int, size: int) -> ColumnarNames:
+        """
+        Returns the names "c{first}"... "c{first + size - 1}", encoded one digit at a time for all names.
+        """
+        numbers = np.arange(first, first + size, dtype=np.int64)
+        nb_digits = np.ones(size, dtype=np.int64)
+        power = 10
+        while power < first + size:
+            nb_digits += numbers >= power
+            power *= 10
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(nb_digits + 1, out=offsets[1:])
+
+        blob = np.empty(int(offsets[-1]), dtype=np.uint8)
+        blob[offsets[:-1]] = ord("c")
+        for k in range(1, int(nb_digits.max(initial=0)) + 1):
+            # k-th digit from the right, for the names having at least k digits
+            has_digit = nb_digits >= k
+            blob[offsets[1:][has_digit] - k] = ord("0") + numbers[has_digit] % 10
+            numbers //= 10
+        return ColumnarNames(blob.tobytes(), offsets)
+
+    def generate(self, nb_contracts: int) -> Iterator[Contract]:
+        """
+        Generates contracts lazily, one at a time.
+        :param nb_contracts: number of contracts to be generated.
+        :return: an iterator over the contracts.
+        """
+        for chunk in self.chunks(nb_contracts):
+            yield from chunk.to_contracts()
+
+    def save(self, nb_contracts: int, file_path: str) -> None:
+        """
+        Generates contracts and saves them in the binary columnar layout, one chunk at a time.
+        :param nb_contracts: number of contracts to be generated.
+        :param file_path: path of the file to be written.
+        """
+        write_columns(file_path, self.chunks(nb_contracts), nb_contracts)
+
+    def save_json(self, nb_contracts: int, file_path: str) -> None:
+        """
+        Generates contracts and saves them as a compact json list, one chunk at a time.
+        :param nb_contracts: number of contracts to be generated.
+        :param file_path: path of the file to be written.
+        """
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            separator = ""
+            for chunk in self.chunks(nb_contracts):
+                for contract in chunk.to_contracts():
+                    f.write(separator)
+                    f.write(json.dumps(contract._asdict(), separators=(",", ":")))
+                    separator = ","
+            f.write("]")
+
+    @staticmethod
+    def load(file_path: str) -> ContractColumns:
+        """
+        Loads contracts saved in the binary columnar layout, memory-mapped.
+        :param file_path: path of the file to be read.
+        :return: the contracts.
+        :raises ColumnarFormatError if the file does not follow the layout.
+        """
+        return read_columns(file_path)
+
+
+def main(args: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generator of contract datasets.")
+    parser.add_argument("file", help="file where contracts are saved")
+    parser.add_argument("--contracts", type=int, required=True)
+    parser.add_argument(
+        "--distribution",
+        default="uniform",
+        choices=WorkloadGenerator.DISTRIBUTIONS,
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="saves contracts as json instead of the binary columnar layout",
+    )
+    options = parser.parse_args(args)
+
+    generator = WorkloadGenerator(options.distribution, options.seed)
+    if options.json:
+        generator.save_json(options.contracts, options.file)
+    else:
+        generator.save(options.contracts, options.file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from os import path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+import psutil
+
+from test.contract_generator import ContractGenerator
+
+ROOT_FOLDER = path.abspath(path.dirname(path.dirname(__file__)))
+
+# numbers of contracts of the payloads sent, with their share of the requests
+PAYLOAD_MIXES: Dict[str, List[Tuple[int, float]]] = {
+    "small": [(10, 0.8), (100, 0.2)],
+    "mixed": [(10, 0.5), (100, 0.3), (1000, 0.15), (10000, 0.05)],
+    "large": [(1000, 0.5), (10000, 0.4), (100000, 0.1)],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+class ServerProcess:
+    """
+    Runs the API locally under uvicorn in a subprocess, for the duration of a with block.
+
+    Settings are passed as SPACESHIP_* environment variables, on top of the current environment.
+    The resident memory of the server is the one of the uvicorn process and all its workers.
+    """
+
+    STARTUP_TIMEOUT = 30.0
+
+    def __init__(
+        self,
+        workers: int = 1,
+        port: Optional[int] = None,
+        env: Optional[Mapping[str, str]] = None,
+    ):
+        """
+        :param workers: number of uvicorn worker processes (defaults to 1).
+        :param port: port listened to, a free one if None (defaults to None).
+        :param env: environment variables set for the server, e.g. its settings (defaults to none).
+        """
+        self.workers = workers
+        self.port = port or _free_port()
+        self.env = dict(env or {})
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._process: Optional[subprocess.Popen[bytes]] = None
+
+    def __enter__(self) -> "ServerProcess":
+        command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(self.port),
+            "--workers",
+            str(self.workers),
+            "--log-level",
+            "warning",
+        ]
+        self._process = subprocess.Popen(
+            command, cwd=ROOT_FOLDER, env={**os.environ, **self.env}
+        )
+        try:
+            self._wait_ready()
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self._process is None:
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    def _wait_ready(self) -> None:
+        assert self._process is not None
+        deadline = time.monotonic() + self.STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(
+                    f"Server exited with code {self._process.returncode}"
+                )
+            try:
+                if httpx.get(f"{self.url}/spaceship/cache/stats").status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"Server not ready after {self.STARTUP_TIMEOUT}s")
+
+    def rss(self) -> int:
+        """Returns the resident memory of the server and its workers, in bytes."""
+        if self._process is None:
+            return 0
+        try:
+            process = psutil.Process(self._process.pid)
+            processes = [process] + process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return 0
+        total = 0
+        for p in processes:
+            try:
+                total += p.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+
+class LoadTest:
+    """
+    Load test of the optimization endpoint of a running API.
+
+    Concurrent async clients send contracts generated by ContractGenerator in a loop, each request
+    picking the size of its payload at random by the shares of a payload mix. Several distinct payloads
+    are generated per size, the cache only serves repeated ones.
+    Requests started during the warmup are not measured. No request is started after the measure,
+    the ones still in flight are waited for and measured, so that slow requests are not left out.
+    It reports:
+    - latency percentiles of all requests, and by payload size;
+    - requests per second over the measure and the end of the requests in flight,
+    and error rate, an error being a transport failure or a status other than 200;
+    - peak and final resident memory of the server, sampled during the test when it is started locally.
+    Reports are saved as JSON, and can be compared to a previous report to detect regressions.
+    """
+
+    PAYLOADS_PER_SIZE = 8
+    RSS_SAMPLE_INTERVAL = 0.5
+    REQUEST_TIMEOUT = 120.0
+
+    def __init__(
+        self,
+        url: str,
+        mix: str = "small",
+        concurrency: int = 16,
+        duration: float = 10.0,
+        warmup: float = 1.0,
+        seed: int = 0,
+        payloads_per_size: int = PAYLOADS_PER_SIZE,
+        server: Optional[ServerProcess] = None,
+    ):
+        """
+        :param url: base url of the API.
+        :param mix: name of the payload mix, in PAYLOAD_MIXES (defaults to small).
+        :param concurrency: number of concurrent clients (defaults to 16).
+        :param duration: duration of the measure, in seconds (defaults to 10).
+        :param warmup: duration before the measure, in seconds (defaults to 1).
+        :param seed: seed of the payloads and of the sizes picked (defaults to 0).
+        :param payloads_per_size: number of distinct payloads per size (defaults to PAYLOADS_PER_SIZE).
+        :param server: local server whose memory is sampled, None if it is not started locally.
+        """
+        self.url = url
+        self.mix = mix
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.seed = seed
+        self.server = server
+        sizes, shares = zip(*PAYLOAD_MIXES[mix])
+        self.sizes: Tuple[int, ...] = sizes
+        self.shares: Tuple[float, ...] = shares
+
+        generator = ContractGenerator(rng=random.Random(seed))
+        self.payloads = {
+            n: [
+                json.dumps(
+                    [c._asdict() for c in generator.generate(n)],
+                    separators=(",", ":"),
+                ).encode()
+                for _ in range(payloads_per_size)
+            ]
+            for n in self.sizes
+        }
+        # (size, seconds, status code or 0 on a transport failure)
+        self.samples: List[Tuple[int, float, int]] = []
+        self.rss_samples: List[int] = []
+        # from the start of the measure to the end of the last request measured, in seconds
+        self.elapsed = duration
+
+    async def _client(
+        self,
+        client: httpx.AsyncClient,
+        rng: random.Random,
+        measure_from: float,
+        end: float,
+    ) -> None:
+        while time.perf_counter() < end:
+            n = rng.choices(self.sizes, self.shares)[0]
+            payload = rng.choice(self.payloads[n])
+            start_time = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/spaceship/optimize",
+                    content=payload,
+                    headers={"Content-Type": "application/json"},
+                )
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            end_time = time.perf_counter()
+            if start_time >= measure_from:
+                self.samples.append((n, end_time - start_time, status))
+
+    async def _sample_rss(self, end: float) -> None:
+        assert self.server is not None
+        while time.perf_counter() < end:
+            self.rss_samples.append(self.server.rss())
+            await asyncio.sleep(self.RSS_SAMPLE_INTERVAL)
+
+    async def _run(self) -> None:
+        start_time = time.perf_counter()
+        measure_from = start_time + self.warmup
+        end = measure_from + self.duration
+        limits = httpx.Limits(max_connections=self.concurrency)
+        async with httpx.AsyncClient(
+            base_url=self.url, timeout=self.REQUEST_TIMEOUT, limits=limits
+        ) as client:
+            tasks = [
+                self._client(client, random.Random(self.seed + i), measure_from, end)
+                for i in range(self.concurrency)
+            ]
+            if self.server is not None:
+                tasks.append(self._sample_rss(end))
+            await asyncio.gather(*tasks)
+        self.elapsed = time.perf_counter() - measure_from
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Runs the load test, printing its summary.
+        :return: the report of the test, with its configuration and the environment it was measured in.
+        """
+        self.samples, self.rss_samples = [], []
+        asyncio.run(self._run())
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+                "cpus": os.cpu_count(),
+            },
+            "config": {
+                "mix": self.mix,
+                "concurrency": self.concurrency,
+                "duration": self.duration,
+                "seed": self.seed,
+                "workers": self.server.workers if self.server else None,
+                "env": self.server.env if self.server else {},
+            },
+            "results": self.summarize(self.samples, self.elapsed, self.rss_samples),
+        }
+        print(self.format(report["results"]))
+        return report
+
+    @staticmethod
+    def _latencies(seconds: Sequence[float]) -> Dict[str, float]:
+        if not seconds:
+            return {}
+        values = np.array(seconds)
+        p50, p90, p99 = np.percentile(values, [50, 90, 99]).tolist()
+        return {
+            "mean": float(values.mean()),
+            "p50": p50,
+            "p90": p90,
+            "p99": p99,
+            "max": float(values.max()),
+        }
+
+    @classmethod
+    def summarize(
+        cls,
+        samples: Sequence[Tuple[int, float, int]],
+        duration: float,
+        rss_samples: Sequence[int] = (),
+    ) -> Dict[str, Any]:
+        """
+        Summarizes the requests measured.
+        :param samples: size of the payload, latency in seconds and status code (0 on failure) of each request.
+        :param duration: duration of the measure until the end of the last request, in seconds.
+        :param rss_samples: resident memory of the server sampled during the measure, in bytes.
+        :return: the numbers of requests and errors, the error rate, requests per second, latency percentiles
+        of all requests and by size, status codes, and peak and final resident memory of the server.
+        """
+        errors = sum(1 for _, _, status in samples if status != 200)
+        status_codes: Dict[str, int] = {}
+        latencies_by_size: Dict[int, List[float]] = {}
+        for n, seconds, status in samples:
+            status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+            latencies_by_size.setdefault(n, []).append(seconds)
+        return {
+            "requests": len(samples),
+            "errors": errors,
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "requests_per_second": len(samples) / duration,
+            "latency": cls._latencies([s for _, s, _ in samples]),
+            "latency_by_size": {
+                str(n): {"requests": len(latencies), **cls._latencies(latencies)}
+                for n, latencies in sorted(latencies_by_size.items())
+            },
+            "status_codes": status_codes,
+            "server_rss_bytes": {
+                "peak": max(rss_samples, default=0),
+                "end": rss_samples[-1] if rss_samples else 0,
+            },
+        }
+
+    @staticmethod
+    def format(results: Dict[str, Any]) -> str:
+        """Returns the summary of a load test on a few lines."""
+        lines = [
+            f"{results['requests']} requests | {results['requests_per_second']:.1f} req/s "
+            f"| {results['error_rate']:.2%} errors | status {results['status_codes']} "
+            f"| server RSS peak {results['server_rss_bytes']['peak'] / 2**20:.1f}MB"
+        ]
+        for name, latency in [("all", results["latency"])] + list(
+            results["latency_by_size"].items()
+        ):
+            if latency:
+                lines.append(
+                    f"{name:>8} | p50 {latency['p50'] * 1000:9.2f}ms "
+                    f"| p90 {latency['p90'] * 1000:9.2f}ms "
+                    f"| p99 {latency['p99'] * 1000:9.2f}ms "
+                    f"| max {latency['max'] * 1000:9.2f}ms"
+                )
+        return "\n".join(lines)
+
+    @staticmethod
+    def compare(
+        baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+    ) -> List[str]:
+        """
+        Compares a report to a baseline.
+        :param baseline: report of a previous run.
+        :param current: report of the current run.
+        :param threshold: relative change above which a measure is a regression, e.g. 0.2 for 20%.
+        :return: a description of each regression: higher latency percentiles or server memory,
+        fewer requests per second or more errors.
+        """
+        before, after = baseline["results"], current["results"]
+        regressions = []
+        measures = [
+            (f"latency {p}", before["latency"].get(p), after["latency"].get(p), 1)
+            for p in ("p50", "p90", "p99")
+        ]
+        measures += [
+            (
+                "requests_per_second",
+                before["requests_per_second"],
+                after["requests_per_second"],
+                -1,
+            ),
+            (
+                "server_rss_bytes peak",
+                before["server_rss_bytes"]["peak"],
+                after["server_rss_bytes"]["peak"],
+                1,
+            ),
+        ]
+        for name, reference, value, direction in measures:
+            if not reference or value is None:
+                continue
+            change = value / reference - 1
+            if change * direction > threshold:
+                regressions.append(
+                    f"{name}: {reference:.6g} -> {value:.6g} ({change:+.0%})"
+                )
+        if after["error_rate"] > before["error_rate"]:
+            regressions.append(
+                f"error_rate: {before['error_rate']:.2%} -> {after['error_rate']:.2%}"
+            )
+        return regressions
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test of the API.")
+    parser.add_argument(
+        "--url",
+        help="base url of a running API, instead of starting it locally under uvicorn",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of uvicorn workers started"
+    )
+    parser.add_argument(
+        "--env",
+        nargs="+",
+        default=[],
+        metavar="NAME=VALUE",
+        help="environment variables of the server started, e.g. SPACESHIP_EXECUTOR=thread",
+    )
+    parser.add_argument("--mix", default="small", choices=list(PAYLOAD_MIXES))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--payloads",
+        type=int,
+        default=LoadTest.PAYLOADS_PER_SIZE,
+        help="distinct payloads per size",
+    )
+    parser.add_argument("--save", help="JSON file where the report is saved")
+    parser.add_argument("--compare", help="JSON report to detect regressions against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative change of a measure flagged as a regression (defaults to 0.2)",
+    )
+    options = parser.parse_args(args)
+    env = dict(variable.split("=", 1) for variable in options.env)
+
+    def load_test(url: str, server: Optional[ServerProcess] = None) -> LoadTest:
+        return LoadTest(
+            url,
+            mix=options.mix,
+            concurrency=options.concurrency,
+            duration=options.duration,
+            warmup=options.warmup,
+            seed=options.seed,
+            payloads_per_size=options.payloads,
+            server=server,
+        )
+
+    if options.url:
+        current = load_test(options.url).run()
+    else:
+        with ServerProcess(options.workers, env=env) as server:
+            current = load_test(server.url, server).run()
+
+    if options.save:
+        with open(options.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4)
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["environment"] != current["environment"]:
+            print("WARNING: baseline was measured in another environment")
+        if baseline["config"] != current["config"]:
+            print("WARNING: baseline was measured with another configuration")
+        regressions = LoadTest.compare(baseline, current, options.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import unittest
+
+from service.analyses import AnalysisNotFoundError, AnalysisStore
+
+
+class Test(unittest.TestCase):
+    CONTRACTS = [
+        {"name": "Contract1", "forced_in": 18, "forced_out": 14, "marginal_value": 4},
+        {"name": "Contract2", "forced_in": 14, "forced_out": 18, "marginal_value": 0},
+        {"name": "Contract3", "forced_in": 18, "forced_out": 17, "marginal_value": 1},
+    ]
+
+    def test_page_should_return_contracts_from_offset(self):
+        store = AnalysisStore()
+        analysis_id = store.add(18, self.CONTRACTS)
+
+        self.assertEqual(
+            {
+                "analysis_id": analysis_id,
+                "income": 18,
+                "total": 3,
+                "offset": 1,
+                "contracts": self.CONTRACTS[1:2],
+            },
+            store.page(analysis_id, 1, 1),
+        )
+        self.assertEqual([], store.page(analysis_id, 5, 10)["contracts"])
+
+    def test_page_unknown_id_should_raise_error(self):
+        with self.assertRaises(AnalysisNotFoundError):
+            AnalysisStore().page("unknown", 0, 10)
+
+    def test_add_above_max_analyses_should_evict_least_recently_used(self):
+        store = AnalysisStore(max_analyses=2)
+        first = store.add(18, self.CONTRACTS)
+        second = store.add(18, self.CONTRACTS)
+        store.page(first, 0, 10)
+        store.add(18, self.CONTRACTS)
+
+        self.assertEqual(2, len(store))
+        store.page(first, 0, 10)
+        with self.assertRaises(AnalysisNotFoundError):
+            store.page(second, 0, 10)
@@ -0,0 +1,679 @@
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import main
+from optimizer.contract_book import ContractBook
+from optimizer.contract_columns import ContractColumns
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.dominance import ContractOptimizerPruned
+from service.analyses import AnalysisStore
+from service.cache import ResultCache
+from service.columnar import (
+    COLUMNS_MEDIA_TYPE,
+    PATH_MEDIA_TYPE,
+    decode_path,
+    encode_columns,
+)
+from service.executor import (
+    ExecutorOverloadedError,
+    ExecutorTimeoutError,
+    OptimizationExecutor,
+    measure_optimizer,
+)
+from service.jobs import JobQueue
+from service.profiling import PROFILE_TOKEN_HEADER, ProfileRecorder
+
+
+class Test(unittest.TestCase):
+    EXAMPLE = [
+        {"name": "Contract1", "start": 0, "duration": 5, "price": 10},
+        {"name": "Contract2", "start": 3, "duration": 7, "price": 14},
+        {"name": "Contract3", "start": 5, "duration": 9, "price": 8},
+        {"name": "Contract4", "start": 5, "duration": 9, "price": 7},
+    ]
+
+    def setUp(self) -> None:
+        self.client = TestClient(main.app)
+        for name, value in (("cache", ResultCache()), ("analyses", AnalysisStore())):
+            patcher = mock.patch.object(main, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_optimize_example(self):
+        response = self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, response.json()
+        )
+
+    def test_optimize_invalid_contract_should_return_422(self):
+        response = self.client.post(
+            "/spaceship/optimize", json=[{"name": "Contract1", "start": 0}]
+        )
+
+        self.assertEqual(422, response.status_code)
+        self.assertEqual(["body", 0, "duration"], response.json()["detail"][0]["loc"])
+
+    def test_optimize_columns_should_return_path(self):
+        payload = encode_columns(
+            ContractColumns(
+                [c["name"] for c in self.EXAMPLE],
+                [c["start"] for c in self.EXAMPLE],
+                [c["duration"] for c in self.EXAMPLE],
+                [c["price"] for c in self.EXAMPLE],
+            )
+        )
+        expected = {"income": 18, "path": ["Contract1", "Contract3"]}
+        headers = {"Content-Type": COLUMNS_MEDIA_TYPE}
+
+        response = self.client.post(
+            "/spaceship/optimize", content=payload, headers=headers
+        )
+        self.assertEqual(expected, response.json())
+
+        headers["Accept"] = PATH_MEDIA_TYPE
+        response = self.client.post(
+            "/spaceship/optimize", content=payload, headers=headers
+        )
+        self.assertEqual(PATH_MEDIA_TYPE, response.headers["Content-Type"])
+        self.assertEqual(expected, decode_path(response.content))
+
+    def test_optimize_columns_should_not_build_contracts(self):
+        columns = ContractColumns(
+            [c["name"] for c in self.EXAMPLE],
+            [c["start"] for c in self.EXAMPLE],
+            [c["duration"] for c in self.EXAMPLE],
+            [c["price"] for c in self.EXAMPLE],
+        )
+        requests = [
+            ("/spaceship/optimize", encode_columns(columns), COLUMNS_MEDIA_TYPE),
+            (
+                "/spaceship/optimize/stream",
+                "\n".join(json.dumps(c) for c in self.EXAMPLE).encode(),
+                "application/x-ndjson",
+            ),
+        ]
+        for optimizer in ("auto", "fast", "numpy", "time_axis"):
+            for prune in (False, True):
+                for url, content, content_type in requests:
+                    with self.subTest(optimizer=optimizer, prune=prune, url=url):
+                        with mock.patch.object(
+                            main, "optimizer_class", main.OPTIMIZER_CLASSES[optimizer]
+                        ), mock.patch.object(
+                            main.settings, "prune", prune
+                        ), mock.patch.object(
+                            ContractColumns, "to_contracts", side_effect=AssertionError
+                        ):
+                            response = self.client.post(
+                                url,
+                                content=content,
+                                headers={"Content-Type": content_type},
+                            )
+
+                        self.assertEqual(
+                            {"income": 18, "path": ["Contract1", "Contract3"]},
+                            response.json(),
+                        )
+                        main.cache = ResultCache()
+
+    def test_optimize_invalid_columns_should_return_422(self):
+        response = self.client.post(
+            "/spaceship/optimize",
+            content=b"SPCC",
+            headers={"Content-Type": COLUMNS_MEDIA_TYPE},
+        )
+
+        self.assertEqual(422, response.status_code)
+        self.assertEqual(["body"], response.json()["detail"][0]["loc"])
+
+    def test_optimize_binary_path_of_several_ships_should_return_406(self):
+        response = self.client.post(
+            "/spaceship/optimize?ships=2",
+            json=self.EXAMPLE,
+            headers={"Accept": PATH_MEDIA_TYPE},
+        )
+
+        self.assertEqual(406, response.status_code)
+
+    def test_metrics_should_return_phases_of_optimization(self):
+        self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+        response = self.client.get("/metrics")
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+        for phase in ("parse", "convert", "sort", "dp", "serialize"):
+            self.assertIn(
+                f'spaceship_phase_seconds_count{{handler="optimize_contracts",'
+                f'phase="{phase}",size="100"}}',
+                response.text,
+            )
+        self.assertIn(
+            'spaceship_http_requests_total{handler="optimize_contracts",status="200"}',
+            response.text,
+        )
+
+    def test_optimize_overloaded_should_return_503(self):
+        with mock.patch.object(
+            main.executor, "run", side_effect=ExecutorOverloadedError("overloaded")
+        ):
+            response = self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+
+        self.assertEqual(503, response.status_code)
+        self.assertIn("Retry-After", response.headers)
+
+    def test_optimize_timeout_should_return_504(self):
+        with mock.patch.object(
+            main.executor, "run", side_effect=ExecutorTimeoutError("timeout")
+        ):
+            response = self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+
+        self.assertEqual(504, response.status_code)
+
+    def test_optimize_profile_should_require_token(self):
+        with tempfile.TemporaryDirectory() as folder, mock.patch.object(
+            main, "profiles", ProfileRecorder(token="secret", directory=folder)
+        ):
+            response = self.client.post(
+                "/spaceship/optimize?profile=true", json=self.EXAMPLE
+            )
+            self.assertEqual(403, response.status_code)
+
+            response = self.client.post(
+                "/spaceship/optimize?profile=true",
+                json=self.EXAMPLE,
+                headers={PROFILE_TOKEN_HEADER: "secret"},
+            )
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(18, response.json()["income"])
+            self.assertIn("functions", response.json()["profile"])
+            self.assertEqual(1, len(os.listdir(folder)))
+
+    def test_optimize_sampled_should_store_profile(self):
+        with tempfile.TemporaryDirectory() as folder, mock.patch.object(
+            main, "profiles", ProfileRecorder(sample_rate=1, directory=folder)
+        ):
+            response = self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+
+            self.assertEqual(
+                {"income": 18, "path": ["Contract1", "Contract3"]}, response.json()
+            )
+            self.assertEqual(1, len(os.listdir(folder)))
+
+    def test_optimize_sampled_should_store_profile_off_event_loop(self):
+        profiles = ProfileRecorder(sample_rate=1)
+        loops = []
+
+        def save(handler, profile):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+
+        with mock.patch.object(main, "profiles", profiles), mock.patch.object(
+            profiles, "save", side_effect=save
+        ):
+            response = self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([None], loops)
+
+    def test_optimize_stream_example(self):
+        payload = "\n".join(json.dumps(c) for c in self.EXAMPLE).encode()
+
+        for headers, content in (
+            ({}, payload),
+            ({"Content-Encoding": "gzip"}, gzip.compress(payload)),
+        ):
+            with self.subTest(headers=headers):
+                response = self.client.post(
+                    "/spaceship/optimize/stream", content=content, headers=headers
+                )
+
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(
+                    {"income": 18, "path": ["Contract1", "Contract3"]},
+                    response.json(),
+                )
+
+    def test_optimize_stream_should_use_configured_optimizer(self):
+        payload = "\n".join(json.dumps(c) for c in self.EXAMPLE).encode()
+        optimizer = mock.Mock(wraps=ContractOptimizerFast)
+        with mock.patch.object(main, "optimizer_class", optimizer):
+            response = self.client.post("/spaceship/optimize/stream", content=payload)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, response.json()
+        )
+        optimizer.assert_called_once()
+
+    def test_optimize_stream_too_large_should_return_413(self):
+        payload = "\n".join(json.dumps(c) for c in self.EXAMPLE).encode()
+        with mock.patch.object(main.settings, "max_stream_bytes", len(payload) - 1):
+            response = self.client.post(
+                "/spaceship/optimize/stream",
+                content=gzip.compress(payload),
+                headers={"Content-Encoding": "gzip"},
+            )
+
+        self.assertEqual(413, response.status_code)
+
+    def test_optimize_stream_invalid_line_should_return_422_with_line(self):
+        payload = json.dumps(self.EXAMPLE[0]) + "\n" + '{"name": "Contract2"}'
+        response = self.client.post("/spaceship/optimize/stream", content=payload)
+
+        self.assertEqual(422, response.status_code)
+        self.assertEqual(["body", 2], response.json()["detail"][0]["loc"])
+
+    def test_session_edits_should_update_optimization(self):
+        response = self.client.post("/spaceship/sessions", json=self.EXAMPLE)
+        self.assertEqual(201, response.status_code)
+        session_url = f"/spaceship/sessions/{response.json()['session_id']}"
+
+        response = self.client.get(f"{session_url}/optimize")
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, response.json()
+        )
+
+        contract = {"name": "Contract2", "start": 3, "duration": 7, "price": 20}
+        response = self.client.put(f"{session_url}/contracts", json=[contract])
+        self.assertEqual(4, response.json()["contracts"])
+        response = self.client.get(f"{session_url}/optimize")
+        self.assertEqual({"income": 20, "path": ["Contract2"]}, response.json())
+
+        response = self.client.delete(f"{session_url}/contracts/Contract2")
+        self.assertEqual(3, response.json()["contracts"])
+        response = self.client.get(f"{session_url}/optimize")
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, response.json()
+        )
+
+        response = self.client.delete(f"{session_url}/contracts/Contract2")
+        self.assertEqual(404, response.status_code)
+
+        response = self.client.get(f"{session_url}/window?start=4&end=14")
+        self.assertEqual({"income": 8, "path": ["Contract3"]}, response.json())
+        response = self.client.get(f"{session_url}/window?start=14&end=4")
+        self.assertEqual(422, response.status_code)
+
+        self.assertEqual(204, self.client.delete(session_url).status_code)
+        self.assertEqual(404, self.client.get(f"{session_url}/optimize").status_code)
+
+    def test_session_optimize_should_run_off_event_loop(self):
+        loops = []
+
+        def optimize(book):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return {"income": 0, "path": []}
+
+        response = self.client.post("/spaceship/sessions", json=self.EXAMPLE)
+        session_url = f"/spaceship/sessions/{response.json()['session_id']}"
+        with mock.patch.object(ContractBook, "optimize", optimize):
+            response = self.client.get(f"{session_url}/optimize")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([None], loops)
+
+    def test_session_window_should_run_off_event_loop(self):
+        loops = []
+
+        def optimize_window(book, start, end):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return {"income": 0, "path": []}
+
+        response = self.client.post("/spaceship/sessions", json=self.EXAMPLE)
+        session_url = f"/spaceship/sessions/{response.json()['session_id']}"
+        with mock.patch.object(ContractBook, "optimize_window", optimize_window):
+            response = self.client.get(f"{session_url}/window?start=0&end=20")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([None], loops)
+
+    def test_session_duplicate_names_should_return_409(self):
+        response = self.client.post("/spaceship/sessions", json=self.EXAMPLE * 2)
+
+        self.assertEqual(409, response.status_code)
+
+    def test_optimize_reordered_payload_should_hit_cache(self):
+        self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+        response = self.client.post("/spaceship/optimize", json=self.EXAMPLE[::-1])
+
+        self.assertEqual(18, response.json()["income"])
+        stats = self.client.get("/spaceship/cache/stats").json()
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(1, stats["hits"])
+
+    def test_optimize_any_order_should_return_same_result(self):
+        # zero-duration contracts sharing their start with a longer one, in both orders
+        contracts = [
+            {"name": "a", "start": 0, "duration": 5, "price": 10},
+            {"name": "b", "start": 5, "duration": 0, "price": 3},
+            {"name": "c", "start": 5, "duration": 5, "price": 4},
+        ]
+        for cache in (ResultCache(), ResultCache(max_entries=0)):
+            with self.subTest(cache=cache.enabled), mock.patch.object(
+                main, "cache", cache
+            ):
+                for payload in (contracts[::-1], contracts):
+                    response = self.client.post("/spaceship/optimize", json=payload)
+                    self.assertEqual(
+                        {"income": 17, "path": ["a", "b", "c"]}, response.json()
+                    )
+
+    def test_analyze_reordered_payload_should_return_contracts_in_its_order(self):
+        self.client.post("/spaceship/analyze", json=self.EXAMPLE)
+        response = self.client.post("/spaceship/analyze", json=self.EXAMPLE[::-1])
+
+        self.assertEqual(
+            ["Contract4", "Contract3", "Contract2", "Contract1"],
+            [c["name"] for c in response.json()["contracts"]],
+        )
+        self.assertEqual(1, self.client.get("/spaceship/cache/stats").json()["hits"])
+
+    def test_optimize_negative_durations_should_not_use_time_axis(self):
+        contracts = [
+            {"name": f"c{i}", "start": i, "duration": -200, "price": 1}
+            for i in range(150)
+        ]
+        with mock.patch.object(main, "optimizer_class", main.select_optimizer):
+            response = self.client.post("/spaceship/optimize", json=contracts)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(150, response.json()["income"])
+
+    def test_optimize_several_ships_should_return_one_path_per_ship(self):
+        response = self.client.post("/spaceship/optimize?ships=2", json=self.EXAMPLE)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(32, response.json()["income"])
+        self.assertEqual(2, len(response.json()["paths"]))
+
+    def test_optimize_k_schedules_should_return_best_schedules(self):
+        response = self.client.post("/spaceship/optimize?k=2", json=self.EXAMPLE)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {
+                "schedules": [
+                    {"income": 18, "path": ["Contract1", "Contract3"]},
+                    {"income": 17, "path": ["Contract1", "Contract4"]},
+                ]
+            },
+            response.json(),
+        )
+
+    def test_optimize_k_schedules_of_several_ships_should_return_422(self):
+        response = self.client.post(
+            "/spaceship/optimize?k=2&ships=2", json=self.EXAMPLE
+        )
+
+        self.assertEqual(422, response.status_code)
+
+    def test_analyze_should_return_pages_of_contracts(self):
+        response = self.client.post(
+            "/spaceship/analyze?offset=1&limit=2", json=self.EXAMPLE
+        )
+
+        self.assertEqual(200, response.status_code)
+        analysis_id = response.json()["analysis_id"]
+        self.assertEqual(
+            {
+                "analysis_id": analysis_id,
+                "income": 18,
+                "total": 4,
+                "offset": 1,
+                "contracts": [
+                    {
+                        "name": "Contract2",
+                        "forced_in": 14,
+                        "forced_out": 18,
+                        "marginal_value": 0,
+                    },
+                    {
+                        "name": "Contract3",
+                        "forced_in": 18,
+                        "forced_out": 17,
+                        "marginal_value": 1,
+                    },
+                ],
+            },
+            response.json(),
+        )
+
+        response = self.client.get(f"/spaceship/analyze/{analysis_id}?offset=3")
+        self.assertEqual(
+            ["Contract4"], [c["name"] for c in response.json()["contracts"]]
+        )
+        self.assertEqual(1, self.client.get("/spaceship/cache/stats").json()["misses"])
+
+        response = self.client.post("/spaceship/analyze?offset=3", json=self.EXAMPLE)
+        self.assertEqual(1, self.client.get("/spaceship/cache/stats").json()["hits"])
+
+    def test_analyze_unknown_id_should_return_404(self):
+        response = self.client.get("/spaceship/analyze/unknown")
+
+        self.assertEqual(404, response.status_code)
+
+    def test_job_should_return_result_once_done(self):
+        # a single event loop for all requests, running jobs in the background
+        with mock.patch.multiple(
+            main,
+            executor=OptimizationExecutor("inline"),
+            job_executor=OptimizationExecutor("inline"),
+            jobs=JobQueue(),
+        ), TestClient(main.app) as client:
+            response = client.post("/spaceship/jobs?k=2", json=self.EXAMPLE)
+            self.assertEqual(202, response.status_code)
+            job_url = f"/spaceship/jobs/{response.json()['job_id']}"
+
+            for _ in range(100):
+                if client.get(job_url).json()["status"] == "done":
+                    break
+            response = client.get(f"{job_url}/result")
+            self.assertEqual(18, response.json()["schedules"][0]["income"])
+
+            session_id = client.post("/spaceship/sessions", json=self.EXAMPLE).json()[
+                "session_id"
+            ]
+            response = client.post(f"/spaceship/jobs?session_id={session_id}")
+            job_url = f"/spaceship/jobs/{response.json()['job_id']}"
+            for _ in range(100):
+                if client.get(job_url).json()["status"] == "done":
+                    break
+            self.assertEqual(18, client.get(f"{job_url}/result").json()["income"])
+
+            self.assertEqual("done", client.delete(job_url).json()["status"])
+            self.assertEqual(404, client.get("/spaceship/jobs/unknown").status_code)
+
+    def test_job_cancelled_while_running_should_not_fail_next_job(self):
+        def slow_measure_optimizer(optimizer):
+            time.sleep(0.2)
+            return measure_optimizer(optimizer)
+
+        def wait(client, job_url, statuses):
+            for _ in range(200):
+                status = client.get(job_url).json()["status"]
+                if status in statuses:
+                    return status
+                time.sleep(0.01)
+            return status
+
+        with mock.patch.multiple(
+            main,
+            executor=OptimizationExecutor("inline"),
+            job_executor=OptimizationExecutor("thread", max_workers=1, max_pending=1),
+            jobs=JobQueue(max_running=1),
+            measure_optimizer=slow_measure_optimizer,
+        ), TestClient(main.app) as client:
+            response = client.post("/spaceship/jobs", json=self.EXAMPLE)
+            first_url = f"/spaceship/jobs/{response.json()['job_id']}"
+            self.assertEqual("running", wait(client, first_url, ("running",)))
+            self.assertEqual("cancelled", client.delete(first_url).json()["status"])
+
+            response = client.post("/spaceship/jobs", json=self.EXAMPLE[:2])
+            second_url = f"/spaceship/jobs/{response.json()['job_id']}"
+            self.assertEqual(
+                "done", wait(client, second_url, ("done", "failed", "cancelled"))
+            )
+            self.assertEqual(14, client.get(f"{second_url}/result").json()["income"])
+
+    def test_job_invalid_body_should_fail(self):
+        with mock.patch.multiple(
+            main,
+            executor=OptimizationExecutor("inline"),
+            job_executor=OptimizationExecutor("inline"),
+            jobs=JobQueue(),
+        ), TestClient(main.app) as client:
+            response = client.post("/spaceship/jobs", json=[{"name": "Contract1"}])
+            self.assertEqual(202, response.status_code)
+            job_url = f"/spaceship/jobs/{response.json()['job_id']}"
+
+            for _ in range(100):
+                if client.get(job_url).json()["status"] == "failed":
+                    break
+            self.assertIn("RequestValidationError", client.get(job_url).json()["error"])
+
+    def test_optimize_pruned_should_return_best_income(self):
+        with mock.patch.object(main.settings, "prune", True):
+            response = self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, response.json()
+        )
+
+    def test_metrics_should_return_pruned_contracts(self):
+        with mock.patch.object(main.settings, "prune", True):
+            self.client.post("/spaceship/optimize", json=self.EXAMPLE)
+        response = self.client.get("/metrics")
+
+        self.assertIn(
+            'spaceship_pruned_contracts_total{handler="optimize_contracts"} 1',
+            response.text,
+        )
+
+    def test_optimize_templates_should_return_occurrences_in_path(self):
+        body = {
+            "contracts": self.EXAMPLE[1:2],
+            "templates": [
+                {
+                    "name": "Weekly",
+                    "start": 0,
+                    "duration": 5,
+                    "price": 10,
+                    "period": 7,
+                    "count": 3,
+                }
+            ],
+        }
+
+        response = self.client.post("/spaceship/optimize", json=body)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {"income": 30, "path": ["Weekly#0", "Weekly#1", "Weekly#2"]},
+            response.json(),
+        )
+
+        response = self.client.post("/spaceship/optimize?ships=2", json=body)
+        self.assertEqual(44, response.json()["income"])
+
+        body["templates"][0]["period"] = 0
+        response = self.client.post("/spaceship/optimize", json=body)
+        self.assertEqual(422, response.status_code)
+        self.assertEqual(
+            ["body", "templates", 0, "period"], response.json()["detail"][0]["loc"]
+        )
+
+    def test_optimize_templates_should_match_expanded_contracts(self):
+        contract = {"name": "A", "start": 5, "duration": 5, "price": 10}
+        template = {"name": "Z", "start": 5, "duration": 0, "price": 3}
+        body = {
+            "contracts": [contract],
+            "templates": [{**template, "period": 100, "count": 1}],
+        }
+
+        response = self.client.post("/spaceship/optimize", json=body)
+        expanded = self.client.post(
+            "/spaceship/optimize", json=[contract, {**template, "name": "Z#0"}]
+        )
+
+        self.assertEqual({"income": 13, "path": ["Z#0", "A"]}, response.json())
+        self.assertEqual(expanded.json(), response.json())
+
+    def test_optimize_too_many_occurrences_should_return_422(self):
+        template = {"name": "T", "start": 0, "duration": 1, "price": 1, "period": 1}
+        body = {"templates": [{**template, "count": 3}, {**template, "count": 2}]}
+
+        with mock.patch.object(main.settings, "max_occurrences", 4):
+            response = self.client.post("/spaceship/optimize", json=body)
+
+        self.assertEqual(422, response.status_code)
+
+    def test_optimize_no_ship_should_return_422(self):
+        response = self.client.post("/spaceship/optimize?ships=0", json=self.EXAMPLE)
+
+        self.assertEqual(422, response.status_code)
+
+    def test_optimize_batch_should_return_results_by_set(self):
+        response = self.client.post(
+            "/spaceship/optimize/batch",
+            json={
+                "set1": self.EXAMPLE,
+                "set2": [{"name": "Contract1", "start": 0}],
+                "set3": [],
+                "set4": self.EXAMPLE[1:2],
+            },
+        )
+
+        self.assertEqual(200, response.status_code)
+        results = response.json()
+        self.assertEqual(["set1", "set2", "set3", "set4"], list(results))
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, results["set1"]
+        )
+        self.assertIn("ValidationError", results["set2"]["error"])
+        self.assertEqual({"income": 0, "path": []}, results["set3"])
+        self.assertEqual({"income": 14, "path": ["Contract2"]}, results["set4"])
+
+    def test_optimize_batch_set_not_list_should_only_fail_this_set(self):
+        response = self.client.post(
+            "/spaceship/optimize/batch",
+            json={"set1": self.EXAMPLE, "set2": {"name": "Contract1"}, "set3": 3},
+        )
+
+        self.assertEqual(200, response.status_code)
+        results = response.json()
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, results["set1"]
+        )
+        self.assertIn("ValidationError", results["set2"]["error"])
+        self.assertIn("ValidationError", results["set3"]["error"])
+
+    def test_optimize_batch_pruned_should_prune_each_set(self):
+        with mock.patch.object(main.settings, "prune", True), mock.patch.object(
+            main.executor, "run_all", wraps=main.executor.run_all
+        ) as run_all:
+            response = self.client.post(
+                "/spaceship/optimize/batch", json={"set1": self.EXAMPLE}
+            )
+
+        self.assertEqual(
+            {"set1": {"income": 18, "path": ["Contract1", "Contract3"]}},
+            response.json(),
+        )
+        [(factory, _)] = run_all.call_args.args[1]
+        self.assertIs(ContractOptimizerPruned, factory.func)
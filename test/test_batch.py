@@ -0,0 +1,44 @@
+import unittest
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizerFast
+from service.batch import chunk_sets, optimize_chunk
+
+
+class _FailingOptimizer(ContractOptimizerFast):
+    def optimize(self):
+        if any(c.name == "fail" for c in self.contracts):
+            raise RuntimeError("cannot optimize")
+        return super().optimize()
+
+
+class Test(unittest.TestCase):
+    @staticmethod
+    def _make_set(set_id: str, n: int):
+        return set_id, [
+            Contract(name=f"{set_id}-c{i}", start=i, duration=1, price=1)
+            for i in range(n)
+        ]
+
+    def test_chunk_sets_should_group_small_sets(self):
+        sets = [self._make_set(f"s{i}", n) for i, n in enumerate((1, 2, 5, 1, 1, 1))]
+        chunks = chunk_sets(sets, chunk_size=3)
+
+        self.assertEqual(
+            [["s0", "s1"], ["s2"], ["s3", "s4", "s5"]],
+            [[set_id for set_id, _ in chunk] for chunk in chunks],
+        )
+
+    def test_chunk_sets_no_set_should_return_no_chunk(self):
+        self.assertEqual([], chunk_sets([], chunk_size=3))
+
+    def test_optimize_chunk_should_isolate_failures(self):
+        failing_set = ("s1", [Contract(name="fail", start=0, duration=1, price=1)])
+        results = optimize_chunk(
+            _FailingOptimizer, [self._make_set("s0", 3), failing_set]
+        )
+
+        self.assertEqual(
+            {"income": 3, "path": ["s0-c0", "s0-c1", "s0-c2"]}, results["s0"]
+        )
+        self.assertEqual({"error": "RuntimeError: cannot optimize"}, results["s1"])
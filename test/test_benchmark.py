@@ -0,0 +1,107 @@
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from optimizer.contract_optimizer import ContractOptimizerFast
+from test.benchmark import WORKLOADS, Benchmark
+from test.contract_generator import WorkloadGenerator
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+
+
+class Test(unittest.TestCase):
+    def test_workloads_should_be_reproducible(self):
+        for name, workload in WORKLOADS.items():
+            with self.subTest(workload=name):
+                contracts = workload(100, random.Random(0))
+
+                self.assertEqual(100, len(contracts))
+                self.assertEqual(contracts, workload(100, random.Random(0)))
+
+    def test_workloads_should_have_their_shape(self):
+        chains = WORKLOADS["disjoint_chains"](100, random.Random(0))
+        overlap = WORKLOADS["total_overlap"](100, random.Random(0))
+
+        self.assertEqual(100, len(ContractOptimizerFast(chains).optimize()["path"]))
+        self.assertEqual(1, len(ContractOptimizerFast(overlap).optimize()["path"]))
+
+    def test_measure_should_return_phases_and_peak_memory(self):
+        contracts = WORKLOADS["uniform"](1000, random.Random(0))
+        result = Benchmark(repetitions=1).measure(ContractOptimizerFast, contracts)
+
+        self.assertEqual(["init", "sort", "dp", "path"], list(result["phases"]))
+        self.assertGreater(result["peak_bytes"], 0)
+        self.assertEqual(
+            ContractOptimizerFast(contracts).optimize()["income"], result["income"]
+        )
+
+    def test_measure_windows_should_time_index_and_fresh_optimizations(self):
+        contracts = WORKLOADS["clustered"](1000, random.Random(0))
+        result = Benchmark().measure_windows(contracts, 10)
+
+        self.assertEqual(["build", "index", "fresh"], list(result))
+
+    def test_measure_stream_should_commit_paths_online(self):
+        result = Benchmark().measure_stream(20000, "uniform")
+        contracts = sorted(WorkloadGenerator().stream(20000), key=lambda c: c.start)
+
+        self.assertGreater(result["commits"], 0)
+        self.assertLess(result["max_pending"], 1000)
+        self.assertEqual(
+            ContractOptimizerFast(contracts).optimize()["income"], result["income"]
+        )
+
+    def test_run_should_measure_datasets(self):
+        with tempfile.TemporaryDirectory() as folder:
+            dataset = os.path.join(folder, "uniform.spcc")
+            WorkloadGenerator().save(500, dataset)
+            with contextlib.redirect_stdout(io.StringIO()):
+                current = Benchmark(repetitions=1).run(
+                    ["fast", "numpy"], [], [], [dataset]
+                )
+
+        self.assertEqual(
+            ["fast/uniform.spcc/500", "numpy/uniform.spcc/500"],
+            list(current["results"]),
+        )
+
+    def test_compare_should_flag_regressions_above_threshold(self):
+        def results(seconds, peak_bytes, income=10):
+            return {
+                "results": {
+                    "fast/uniform/1000": {
+                        "seconds": seconds,
+                        "peak_bytes": peak_bytes,
+                        "income": income,
+                    }
+                }
+            }
+
+        baseline = results(1.0, 1000)
+
+        self.assertEqual([], Benchmark.compare(baseline, results(1.1, 1100), 0.2))
+        self.assertEqual(
+            ["fast/uniform/1000 seconds: 1 -> 1.5 (+50%)"],
+            Benchmark.compare(baseline, results(1.5, 1000), 0.2),
+        )
+        self.assertEqual(2, len(Benchmark.compare(baseline, results(1, 2000, 9), 0.2)))
+        # too fast to be compared
+        self.assertEqual(
+            [], Benchmark.compare(results(1e-5, 1000), results(5e-4, 1000), 0.2)
+        )
+        # measures missing from the baseline are ignored
+        self.assertEqual([], Benchmark.compare({"results": {}}, baseline, 0.2))
+
+    def test_baseline_should_match_incomes(self):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with contextlib.redirect_stdout(io.StringIO()):
+            current = Benchmark(repetitions=1).run(["fast"], list(WORKLOADS), [1000])
+
+        self.assertEqual(len(WORKLOADS), len(current["results"]))
+        # timings depend on the machine, incomes must not
+        self.assertEqual([], Benchmark.compare(baseline, current, float("inf")))
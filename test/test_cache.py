@@ -0,0 +1,206 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from optimizer.contract import Contract, ContractTemplate
+from service.cache import ResultCache, canonical_order, contracts_key
+
+
+class Test(unittest.TestCase):
+    def setUp(self) -> None:
+        self.contracts = [
+            Contract(name="Contract1", start=0, duration=5, price=10),
+            Contract(name="Contract2", start=3, duration=7, price=14),
+            Contract(name="Contract3", start=5, duration=9, price=8),
+        ]
+        self.computations = 0
+
+    async def _compute(self):
+        self.computations += 1
+        await asyncio.sleep(0.01)
+        return {"income": self.computations, "path": ["Contract1"]}
+
+    async def _fail(self):
+        self.computations += 1
+        raise RuntimeError("failure")
+
+    def test_key_should_not_depend_on_order(self):
+        self.assertEqual(
+            contracts_key(self.contracts), contracts_key(self.contracts[::-1])
+        )
+
+    def test_canonical_order_should_not_depend_on_order(self):
+        contracts = self.contracts + [self.contracts[1]._replace(duration=0)]
+        for permutation in (contracts, contracts[::-1], contracts[2:] + contracts[:2]):
+            self.assertEqual(
+                [contracts[i] for i in canonical_order(contracts)],
+                [permutation[i] for i in canonical_order(permutation)],
+            )
+
+    def test_key_should_depend_on_every_field(self):
+        keys = {contracts_key(self.contracts)}
+        for field in ("name", "start", "duration", "price"):
+            value = "Contract" if field == "name" else 100
+            keys.add(contracts_key([self.contracts[0]._replace(**{field: value})]))
+        keys.add(contracts_key(self.contracts + self.contracts[:1]))
+
+        self.assertEqual(6, len(keys))
+
+    def test_key_should_not_be_ambiguous_on_names(self):
+        c1 = Contract(name="a:1", start=2, duration=3, price=4)
+        c2 = Contract(name="a", start=1, duration=2, price=3)
+        c3 = Contract(name="4\n1:a", start=2, duration=3, price=4)
+
+        self.assertNotEqual(contracts_key([c1, c2]), contracts_key([c3]))
+
+    def test_key_should_depend_on_templates(self):
+        template = ContractTemplate(
+            name="Weekly", start=0, duration=5, price=10, period=7, repetitions=3
+        )
+        expanded = list(template.occurrences())
+
+        keys = {
+            contracts_key(self.contracts),
+            contracts_key(self.contracts, [template]),
+            contracts_key(self.contracts, [template._replace(repetitions=4)]),
+            contracts_key(self.contracts + expanded),
+        }
+
+        self.assertEqual(4, len(keys))
+        self.assertEqual(
+            contracts_key(self.contracts), contracts_key(self.contracts, [])
+        )
+
+    def test_get_or_compute_should_compute_once(self):
+        cache = ResultCache()
+
+        async def run():
+            first = await cache.get_or_compute("key", self._compute)
+            second = await cache.get_or_compute("key", self._compute)
+            return first, second
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first, second)
+        self.assertEqual(1, self.computations)
+        self.assertEqual(1, cache.stats()["hits"])
+        self.assertEqual(1, cache.stats()["misses"])
+
+    def test_get_or_compute_concurrently_should_coalesce(self):
+        cache = ResultCache()
+
+        async def run():
+            return await asyncio.gather(
+                *(cache.get_or_compute("key", self._compute) for _ in range(5))
+            )
+
+        results = asyncio.run(run())
+        self.assertEqual([results[0]] * 5, results)
+        self.assertEqual(1, self.computations)
+        self.assertEqual(4, cache.stats()["coalesced"])
+
+    def test_get_or_compute_failure_should_not_be_cached(self):
+        cache = ResultCache()
+
+        async def run():
+            for _ in range(2):
+                with self.assertRaises(RuntimeError):
+                    await cache.get_or_compute("key", self._fail)
+
+        asyncio.run(run())
+        self.assertEqual(2, self.computations)
+        self.assertEqual(0, cache.stats()["entries"])
+
+    def test_get_or_compute_above_max_entries_should_evict_least_recently_used(self):
+        cache = ResultCache(max_entries=2)
+
+        async def run():
+            for key in ("k1", "k2", "k1", "k3", "k1", "k2"):
+                await cache.get_or_compute(key, self._compute)
+
+        asyncio.run(run())
+        # k2 evicted by k3, then k3 evicted by k2
+        self.assertEqual(4, self.computations)
+        self.assertEqual(2, cache.stats()["evictions"])
+        self.assertEqual(2, cache.stats()["entries"])
+
+    def test_get_or_compute_above_max_bytes_should_evict(self):
+        cache = ResultCache(max_bytes=500)
+
+        async def run():
+            for key in ("k1", "k2", "k3"):
+                await cache.get_or_compute(key, self._compute)
+
+        asyncio.run(run())
+        self.assertEqual(1, cache.stats()["evictions"])
+        self.assertLessEqual(cache.stats()["bytes"], 500)
+
+    def test_get_or_compute_with_directory_should_share_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first_cache = ResultCache(directory=directory)
+            second_cache = ResultCache(directory=directory)
+
+            async def run():
+                first = await first_cache.get_or_compute("key", self._compute)
+                second = await second_cache.get_or_compute("key", self._compute)
+                return first, second
+
+            first, second = asyncio.run(run())
+
+        self.assertEqual(first, second)
+        self.assertEqual(1, self.computations)
+        self.assertEqual(1, second_cache.stats()["disk_hits"])
+
+    def test_get_or_compute_with_directory_should_not_block_event_loop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(max_entries=0, directory=directory, max_files=1)
+            threads = []
+
+            def record(method):
+                def recorded(*args):
+                    threads.append(threading.get_ident())
+                    return method(*args)
+
+                return recorded
+
+            async def run():
+                for key in ("key", "key"):
+                    await cache.get_or_compute(key, self._compute)
+                return threading.get_ident()
+
+            with mock.patch.object(
+                cache, "_read", record(cache._read)
+            ), mock.patch.object(
+                cache, "_write", record(cache._write)
+            ), mock.patch.object(
+                cache, "_evict_files", record(cache._evict_files)
+            ):
+                loop_thread = asyncio.run(run())
+
+        # read, write then evict on the miss, read on the hit
+        self.assertEqual(4, len(threads))
+        self.assertNotIn(loop_thread, threads)
+        self.assertEqual(1, self.computations)
+
+    def test_put_above_max_files_should_remove_least_recently_used_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(max_entries=0, directory=directory, max_files=2)
+
+            async def run():
+                # file times are coarse, operations are spaced out
+                for key in ("key1", "key2", "key1", "key3"):
+                    await cache.get_or_compute(key, self._compute)
+                    await asyncio.sleep(0.02)
+
+            # key1 is read before key3 is written, so key2 is the least recently used one
+            asyncio.run(run())
+            files = sorted(
+                name
+                for folder in os.listdir(directory)
+                for name in os.listdir(os.path.join(directory, folder))
+            )
+
+        self.assertEqual(["key1.json", "key3.json"], files)
+        self.assertEqual(1, cache.stats()["disk_evictions"])
@@ -0,0 +1,156 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from optimizer.contract_columns import ContractColumns
+from optimizer.contract_optimizer_numpy import ContractOptimizerNumpy
+from optimizer.dominance import ContractOptimizerPruned
+from optimizer.time_axis_optimizer import ContractOptimizerTimeAxis
+from service.columnar import (
+    COLUMNS_HEADER,
+    ColumnarFormatError,
+    ColumnarNames,
+    decode_columns,
+    decode_path,
+    encode_columns,
+    encode_path,
+    read_columns,
+    write_columns,
+)
+
+
+class Test(unittest.TestCase):
+    COLUMNS = ContractColumns(
+        ["Contract1", "Contrat2é", "", "Contract4"],
+        [0, 3, 5, 5],
+        [5, 7, 9, 9],
+        [10, 14, 8, 7],
+    )
+
+    def test_decode_should_return_encoded_contracts(self):
+        columns = decode_columns(encode_columns(self.COLUMNS))
+
+        self.assertEqual(self.COLUMNS.names, list(columns.names))
+        self.assertEqual(self.COLUMNS.start.tolist(), columns.start.tolist())
+        self.assertEqual(self.COLUMNS.duration.tolist(), columns.duration.tolist())
+        self.assertEqual(self.COLUMNS.price.tolist(), columns.price.tolist())
+
+    def test_decode_should_not_copy_payload(self):
+        payload = bytearray(encode_columns(self.COLUMNS))
+        columns = decode_columns(payload)
+
+        self.assertTrue(
+            np.shares_memory(columns.start, np.frombuffer(payload, np.uint8))
+        )
+        self.assertTrue(
+            np.shares_memory(columns.price, np.frombuffer(payload, np.uint8))
+        )
+
+    def test_decode_no_contract_should_return_empty_columns(self):
+        columns = decode_columns(encode_columns(ContractColumns([], [], [], [])))
+
+        self.assertEqual(0, len(columns))
+        self.assertEqual(
+            {"income": 0, "path": []},
+            ContractOptimizerNumpy.from_columns(columns).optimize(),
+        )
+
+    def test_decoded_columns_should_be_optimized_and_pickled(self):
+        columns = pickle.loads(
+            pickle.dumps(decode_columns(encode_columns(self.COLUMNS)))
+        )
+
+        self.assertEqual(self.COLUMNS.names, list(columns.names))
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", ""]},
+            ContractOptimizerNumpy.from_columns(columns).optimize(),
+        )
+
+    def test_decoded_columns_should_be_optimized_by_all_engines(self):
+        columns = decode_columns(encode_columns(self.COLUMNS))
+        for optimizer in (
+            ContractOptimizerTimeAxis.from_columns(columns),
+            ContractOptimizerPruned.from_columns(columns),
+            ContractOptimizerPruned.from_columns(
+                columns, ContractOptimizerTimeAxis.from_columns
+            ),
+        ):
+            with self.subTest(optimizer=optimizer):
+                optimizer = pickle.loads(pickle.dumps(optimizer))
+
+                self.assertEqual(
+                    {"income": 18, "path": ["Contract1", ""]}, optimizer.optimize()
+                )
+
+    def test_take_should_return_subset(self):
+        columns = decode_columns(encode_columns(self.COLUMNS))
+
+        taken = columns.take(np.array([3, 1], dtype=np.int64))
+
+        self.assertEqual(["Contract4", "Contrat2é"], list(taken.names))
+        self.assertEqual([5, 3], taken.start.tolist())
+        self.assertEqual([9, 7], taken.duration.tolist())
+        self.assertEqual([7, 14], taken.price.tolist())
+
+    def test_decode_invalid_payload_should_raise_error(self):
+        payload = encode_columns(self.COLUMNS)
+        names_position = COLUMNS_HEADER.size + 3 * 4 * 8
+        invalid_payloads = {
+            "empty": b"",
+            "magic": b"XXXX" + payload[4:],
+            "version": payload[:4] + b"\x02" + payload[5:],
+            "truncated": payload[:-1],
+            "trailing": payload + b"x",
+            "offsets": payload[:names_position]
+            + np.array([0, 9, 5, 19, 28], "<i8").tobytes()
+            + payload[names_position + 5 * 8 :],
+            "split": payload[:names_position]
+            + np.array([0, 9, 18, 19, 28], "<i8").tobytes()
+            + payload[names_position + 5 * 8 :],
+            "utf-8": payload[:-1] + b"\xff",
+        }
+        for case, invalid_payload in invalid_payloads.items():
+            with self.subTest(case=case):
+                with self.assertRaises(ColumnarFormatError):
+                    decode_columns(invalid_payload)
+
+    def test_read_columns_should_return_chunks_written(self):
+        names = decode_columns(encode_columns(self.COLUMNS)).names
+        chunks = [
+            ContractColumns(
+                self.COLUMNS.names[:3],
+                self.COLUMNS.start[:3],
+                self.COLUMNS.duration[:3],
+                self.COLUMNS.price[:3],
+            ),
+            ContractColumns([], [], [], []),
+            # names already encoded, at the end of a blob
+            ContractColumns(
+                ColumnarNames(names._blob, names._offsets[3:]),
+                self.COLUMNS.start[3:],
+                self.COLUMNS.duration[3:],
+                self.COLUMNS.price[3:],
+            ),
+        ]
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "contracts.spcc")
+            write_columns(file_path, chunks, len(self.COLUMNS))
+            with open(file_path, "rb") as f:
+                self.assertEqual(encode_columns(self.COLUMNS), f.read())
+
+            columns = read_columns(file_path)
+            self.assertEqual(self.COLUMNS.names, list(columns.names))
+            self.assertEqual(self.COLUMNS.price.tolist(), columns.price.tolist())
+
+            write_columns(file_path, [], 0)
+            self.assertEqual(0, len(read_columns(file_path)))
+            with self.assertRaises(ValueError):
+                write_columns(file_path, chunks, 3)
+
+    def test_decode_path_should_return_encoded_path(self):
+        result = {"income": 18, "path": ["Contract1", "Contrat2é"]}
+
+        self.assertEqual(result, decode_path(encode_path(result)))
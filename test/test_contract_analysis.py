@@ -0,0 +1,98 @@
+import random
+import unittest
+
+import numpy as np
+
+from optimizer.contract import Contract
+from optimizer.contract_analysis import ContractAnalysis, range_max
+from optimizer.contract_optimizer import ContractOptimizerFast
+from test.contract_generator import ContractGenerator
+from test.tools import brute_force_schedules
+
+
+class Test(unittest.TestCase):
+    EXAMPLE = [
+        Contract(name="Contract1", start=0, duration=5, price=10),
+        Contract(name="Contract2", start=3, duration=7, price=14),
+        Contract(name="Contract3", start=5, duration=9, price=8),
+        Contract(name="Contract4", start=5, duration=9, price=7),
+    ]
+
+    def test_range_max(self):
+        rng = np.random.default_rng(0)
+        values = rng.integers(-100, 100, 50)
+        lefts = rng.integers(0, 49, 200)
+        rights = lefts + 1 + (rng.integers(0, 50, 200) % (50 - lefts))
+
+        result = range_max(values, lefts, rights)
+
+        expected = [values[l:r].max() for l, r in zip(lefts, rights)]
+        self.assertEqual(expected, result.tolist())
+
+    def test_analyze_no_contract(self):
+        self.assertEqual({"income": 0, "contracts": []}, ContractAnalysis([]).analyze())
+
+    def test_analyze_example(self):
+        result = ContractAnalysis(self.EXAMPLE).analyze()
+
+        self.assertEqual(18, result["income"])
+        self.assertEqual(
+            [
+                ("Contract1", 18, 14, 4),
+                ("Contract2", 14, 18, 0),
+                ("Contract3", 18, 17, 1),
+                ("Contract4", 17, 18, 0),
+            ],
+            [
+                (c["name"], c["forced_in"], c["forced_out"], c["marginal_value"])
+                for c in result["contracts"]
+            ],
+        )
+
+    def test_analyze_should_match_brute_force(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            contracts = [
+                Contract(
+                    name=f"c{i}",
+                    start=rng.randint(0, 10),
+                    duration=rng.randint(0, 5),
+                    price=rng.randint(-2, 10),
+                )
+                for i in range(rng.randint(1, 8))
+            ]
+            schedules = brute_force_schedules(contracts)
+
+            result = ContractAnalysis(contracts).analyze()
+
+            self.assertEqual(max(income for _, income in schedules), result["income"])
+            for i, analysis in enumerate(result["contracts"]):
+                self.assertEqual(
+                    max(income for subset, income in schedules if i in subset),
+                    analysis["forced_in"],
+                )
+                self.assertEqual(
+                    max(income for subset, income in schedules if i not in subset),
+                    analysis["forced_out"],
+                )
+
+    def test_analyze_should_match_fast_optimizer(self):
+        contracts = ContractGenerator().generate(200)
+        result = ContractAnalysis(contracts).analyze()
+        best_income = ContractOptimizerFast(contracts).optimize()["income"]
+
+        self.assertEqual(best_income, result["income"])
+        for i in random.Random(0).sample(range(len(contracts)), 10):
+            others = contracts[:i] + contracts[i + 1 :]
+            forced_out = ContractOptimizerFast(others).optimize()["income"]
+            self.assertEqual(forced_out, result["contracts"][i]["forced_out"])
+            self.assertEqual(
+                best_income - forced_out, result["contracts"][i]["marginal_value"]
+            )
+            self.assertEqual(
+                best_income, max(forced_out, result["contracts"][i]["forced_in"])
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import random
+import unittest
+
+from optimizer.contract import Contract
+from optimizer.contract_book import ContractBook
+from optimizer.contract_optimizer import ContractOptimizerFast
+from test.contract_generator import ContractGenerator
+
+
+class Test(unittest.TestCase):
+    def setUp(self) -> None:
+        self.contracts = [
+            Contract(name="Contract1", start=0, duration=5, price=10),
+            Contract(name="Contract2", start=3, duration=7, price=14),
+            Contract(name="Contract3", start=5, duration=9, price=8),
+            Contract(name="Contract4", start=5, duration=9, price=7),
+        ]
+
+    def test_optimize_example(self):
+        result = ContractBook(self.contracts).optimize()
+
+        self.assertEqual(18, result["income"])
+        self.assertEqual(["Contract1", "Contract3"], result["path"])
+
+    def test_optimize_empty_book_should_return_empty_path(self):
+        self.assertEqual({"income": 0, "path": []}, ContractBook().optimize())
+
+    def test_add_duplicate_name_should_raise_error(self):
+        book = ContractBook(self.contracts)
+
+        with self.assertRaises(ValueError):
+            book.add(self.contracts[0])
+        with self.assertRaises(ValueError):
+            ContractBook(self.contracts + self.contracts[:1])
+
+    def test_remove_unknown_name_should_raise_error(self):
+        with self.assertRaises(KeyError):
+            ContractBook(self.contracts).remove("Contract5")
+
+    def test_update_should_replace_contract(self):
+        book = ContractBook(self.contracts)
+        book.optimize()
+        book.update(Contract(name="Contract2", start=3, duration=7, price=20))
+
+        self.assertEqual({"income": 20, "path": ["Contract2"]}, book.optimize())
+        self.assertEqual(4, len(book))
+
+    def test_optimize_window_should_follow_edits(self):
+        book = ContractBook(self.contracts)
+
+        self.assertEqual(
+            {"income": 14, "path": ["Contract2"]}, book.optimize_window(0, 13)
+        )
+        book.remove("Contract2")
+        self.assertEqual(
+            {"income": 10, "path": ["Contract1"]}, book.optimize_window(0, 13)
+        )
+
+    def test_remove_last_contract_before_optimizing_should_optimize(self):
+        book = ContractBook(self.contracts)
+        book.update(Contract(name="Contract4", start=0, duration=5, price=7))
+
+        self.assertEqual(18, book.optimize()["income"])
+
+    def test_edit_should_only_recompute_contracts_starting_before(self):
+        contracts = [
+            Contract(name=f"c{i}", start=i, duration=2, price=1) for i in range(100)
+        ]
+        book = ContractBook(contracts)
+        book.optimize()
+
+        book.recomputed = 0
+        book.add(Contract(name="c100", start=90, duration=1, price=1))
+        book.remove("c95")
+        book.optimize()
+
+        # positions of contracts starting at or before 95
+        self.assertEqual(96, book.recomputed)
+
+    def test_random_edits_should_match_full_optimization(self):
+        random.seed(42)
+        generator = ContractGenerator()
+        contracts = {c.name: c for c in generator.generate(500)}
+        book = ContractBook(contracts.values())
+
+        for _ in range(200):
+            operation = random.random()
+            if operation < 0.4:
+                contract = generator.generate(1)[0]
+                contracts[contract.name] = contract
+                book.add(contract)
+            elif operation < 0.7:
+                name = random.choice(list(contracts))
+                book.remove(name)
+                del contracts[name]
+            else:
+                name = random.choice(list(contracts))
+                contract = generator.generate(1)[0]._replace(name=name)
+                contracts[name] = contract
+                book.update(contract)
+
+            if random.random() < 0.3:
+                result = book.optimize()
+                expected = ContractOptimizerFast(list(contracts.values())).optimize()
+                self.assertEqual(expected["income"], result["income"])
+                self.assertEqual(
+                    result["income"], sum(contracts[n].price for n in result["path"])
+                )
+                path = [contracts[n] for n in result["path"]]
+                for previous, contract in zip(path, path[1:]):
+                    self.assertLessEqual(previous.end, contract.start)
+
+    def test_zero_durations_in_any_order_should_match_fast_optimizer(self):
+        random.seed(7)
+        for _ in range(200):
+            contracts = [
+                Contract(
+                    name=f"c{i}",
+                    start=random.randint(0, 5),
+                    duration=random.randint(0, 2),
+                    price=random.randint(1, 10),
+                )
+                for i in range(8)
+            ]
+            book = ContractBook(contracts[:4])
+            for contract in contracts[4:]:
+                book.add(contract)
+            book.update(contracts[0]._replace(duration=0))
+            contracts[0] = contracts[0]._replace(duration=0)
+            random.shuffle(contracts)
+
+            expected = ContractOptimizerFast(contracts).optimize()
+            self.assertEqual(expected["income"], book.optimize()["income"])
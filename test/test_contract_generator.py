@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from optimizer.contract_optimizer import ContractOptimizerFast
+from test.contract_generator import WorkloadGenerator
+
+
+class Test(unittest.TestCase):
+    def test_chunks_should_be_reproducible(self):
+        for distribution in WorkloadGenerator.DISTRIBUTIONS:
+            with self.subTest(distribution=distribution):
+                generator = WorkloadGenerator(distribution, seed=1, chunk_size=300)
+                chunks = list(generator.chunks(1000))
+                again = list(generator.chunks(1000))
+
+                self.assertEqual([300, 300, 300, 100], [len(c) for c in chunks])
+                for chunk, same in zip(chunks, again):
+                    self.assertEqual(chunk.start.tolist(), same.start.tolist())
+                    self.assertEqual(chunk.duration.tolist(), same.duration.tolist())
+                    self.assertEqual(chunk.price.tolist(), same.price.tolist())
+                self.assertEqual(["c0", "c1"], list(chunks[0].names[:2]))
+                self.assertEqual("c999", chunks[-1].names[-1])
+                self.assertTrue(all(np.all(c.duration >= 1) for c in chunks))
+
+                other = next(WorkloadGenerator(distribution, seed=2).chunks(1000))
+                self.assertNotEqual(
+                    chunks[0].start.tolist(), other.start[:300].tolist()
+                )
+
+    def test_dense_overlap_should_keep_a_single_contract(self):
+        contracts = list(WorkloadGenerator("dense_overlap").generate(500))
+
+        self.assertEqual(500, len(contracts))
+        self.assertEqual(1, len(ContractOptimizerFast(contracts).optimize()["path"]))
+
+    def test_stream_should_be_ordered_by_start(self):
+        for distribution in WorkloadGenerator.DISTRIBUTIONS:
+            with self.subTest(distribution=distribution):
+                generator = WorkloadGenerator(distribution, seed=1, chunk_size=300)
+                contracts = list(generator.stream(1000))
+
+                self.assertEqual(1000, len(contracts))
+                self.assertEqual(contracts, list(generator.stream(1000)))
+                starts = [c.start for c in contracts]
+                self.assertEqual(sorted(starts), starts)
+                self.assertEqual(
+                    [f"c{i}" for i in range(1000)], [c.name for c in contracts]
+                )
+
+    def test_unknown_distribution_should_raise_error(self):
+        with self.assertRaises(ValueError):
+            WorkloadGenerator("normal")
+
+    def test_load_should_return_contracts_saved(self):
+        generator = WorkloadGenerator("clustered", seed=3, chunk_size=256)
+        contracts = list(generator.generate(1000))
+
+        with tempfile.TemporaryDirectory() as folder:
+            binary_file = os.path.join(folder, "contracts.spcc")
+            generator.save(1000, binary_file)
+            self.assertEqual(
+                contracts, WorkloadGenerator.load(binary_file).to_contracts()
+            )
+
+            json_file = os.path.join(folder, "contracts.json")
+            generator.save_json(1000, json_file)
+            with open(json_file, encoding="utf-8") as f:
+                self.assertEqual([c._asdict() for c in contracts], json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
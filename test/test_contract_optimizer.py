@@ -1,3 +1,4 @@
+import tracemalloc
 import unittest
 
 from optimizer.contract import Contract
@@ -6,6 +7,8 @@ from optimizer.contract_optimizer import (
     ContractOptimizerNaive,
     ContractOptimizerNaiveImproved,
 )
+from optimizer.contract_optimizer_numpy import ContractOptimizerNumpy
+from test.contract_generator import ContractGenerator
 from test.tools import multitest
 
 
@@ -66,6 +69,31 @@ class Test(unittest.TestCase):
         self.assertEqual(contracts[-1].price, result["income"])
         self.assertEqual([contracts[-1].name], result["path"])
 
+    def test_optimize_contracts_with_duplicate_names_should_keep_all_contracts(self):
+        contracts = [
+            self._make_contract("c1", start=0, duration=2, price=10),
+            self._make_contract("c2", start=1, duration=1, price=1),
+            self._make_contract("c2", start=2, duration=1, price=1),
+        ]
+        result = self.optimizer_class(contracts).optimize()
+
+        self.assertEqual(11, result["income"])
+        self.assertEqual(["c1", "c2"], result["path"])
+
+    def test_optimize_n_contracts_disjointed_should_use_linear_memory(self):
+        def peak_memory(n: int) -> int:
+            contracts = [
+                self._make_contract(f"c{i}", start=i, duration=1) for i in range(n)
+            ]
+            tracemalloc.start()
+            self.optimizer_class(contracts).optimize()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak
+
+        # a quadratic growth would multiply peak memory by 16
+        self.assertLess(peak_memory(20000), 6 * peak_memory(5000))
+
     def test_optimize_example(self):
         contracts = [
             self._make_contract("Contract1", start=0, duration=5, price=10),
@@ -77,3 +105,32 @@ class Test(unittest.TestCase):
 
         self.assertEqual(18, result["income"])
         self.assertEqual(["Contract1", "Contract3"], result["path"])
+
+
+class TestNumpy(Test):
+    def setUp(self) -> None:
+        self.optimizer_class = ContractOptimizerNumpy
+
+    def test_optimize_no_contract_should_return_empty_path(self):
+        result = self.optimizer_class([]).optimize()
+
+        self.assertEqual(0, result["income"])
+        self.assertEqual([], result["path"])
+
+    @multitest(
+        [
+            {"__description__": "1 contract", "n": 1},
+            {"__description__": "10 contracts", "n": 10},
+            {"__description__": "100 contracts", "n": 100},
+            {"__description__": "1000 contracts", "n": 1000},
+        ]
+    )
+    def test_optimize_n_random_contracts_should_match_existing_optimizers(self, n):
+        contracts = ContractGenerator().generate(n)
+        result = self.optimizer_class(contracts).optimize()
+
+        self.assertEqual(ContractOptimizerFast(contracts).optimize(), result)
+        self.assertEqual(
+            ContractOptimizerNaiveImproved(contracts).optimize()["income"],
+            result["income"],
+        )
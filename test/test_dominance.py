@@ -0,0 +1,131 @@
+import random
+import unittest
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.contract_optimizer_numpy import ContractOptimizerNumpy
+from optimizer.dominance import ContractOptimizerPruned, prune_dominated
+from test.benchmark import WORKLOADS
+from test.tools import brute_force_income
+
+
+class Test(unittest.TestCase):
+    EXAMPLE = [
+        Contract(name="Contract1", start=0, duration=5, price=10),
+        Contract(name="Contract2", start=3, duration=7, price=14),
+        Contract(name="Contract3", start=5, duration=9, price=8),
+        Contract(name="Contract4", start=5, duration=9, price=7),
+    ]
+
+    def test_prune_example_should_remove_cheaper_duplicate(self):
+        self.assertEqual(self.EXAMPLE[:3], prune_dominated(self.EXAMPLE))
+
+    def test_prune_should_remove_dominated_contracts(self):
+        contracts = [
+            Contract(name="outer", start=0, duration=10, price=5),
+            Contract(name="inner", start=2, duration=3, price=1),
+            Contract(name="free", start=4, duration=1, price=0),
+            Contract(name="nested", start=1, duration=8, price=6),
+            Contract(name="point", start=7, duration=0, price=4),
+            Contract(name="edge", start=20, duration=0, price=9),
+            Contract(name="long", start=20, duration=5, price=3),
+        ]
+
+        kept = prune_dominated(contracts)
+
+        # outer only contains cheaper minimal contracts, but is dominated by nested
+        self.assertEqual(
+            ["inner", "nested", "point", "edge", "long"], [c.name for c in kept]
+        )
+
+        contracts[4] = contracts[4]._replace(price=6)
+        self.assertEqual(
+            ["inner", "point", "edge", "long"],
+            [c.name for c in prune_dominated(contracts)],
+        )
+
+    def test_prune_should_preserve_brute_force_income(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            contracts = [
+                Contract(
+                    name=f"c{i}",
+                    start=rng.randint(0, 12),
+                    duration=rng.randint(0, 6),
+                    price=rng.randint(-2, 10),
+                )
+                for i in range(rng.randint(0, 9))
+            ]
+
+            kept = prune_dominated(contracts)
+
+            self.assertEqual(brute_force_income(contracts), brute_force_income(kept))
+            for c in kept:
+                others = [d for d in kept if d is not c and d.price >= c.price]
+                self.assertFalse(
+                    any(
+                        c.start <= d.start
+                        and d.end <= c.end
+                        and (d.duration > 0 or c.start < d.start < c.end)
+                        for d in others
+                    ),
+                    c,
+                )
+
+    def test_optimize_should_match_income_without_pruning(self):
+        for workload in ("dense_overlap", "uniform", "duplicate_starts"):
+            with self.subTest(workload=workload):
+                contracts = WORKLOADS[workload](2000, random.Random(0))
+                optimizer = ContractOptimizerPruned(contracts)
+
+                result = optimizer.optimize()
+
+                self.assertEqual(
+                    ContractOptimizerFast(contracts).optimize()["income"],
+                    result["income"],
+                )
+                self.assertGreater(optimizer.pruned, 0)
+                self.assertEqual(
+                    ["prune", "sort", "dp", "path"], list(optimizer.phases)
+                )
+
+        optimizer = ContractOptimizerPruned(self.EXAMPLE, ContractOptimizerNumpy)
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, optimizer.optimize()
+        )
+        self.assertEqual(1, optimizer.pruned)
+
+    def test_optimize_shuffled_zero_durations_should_match_fast_optimizer(self):
+        examples = [
+            [
+                (2, 1, 4),
+                (4, 2, -1),
+                (6, 2, 6),
+                (4, 5, 3),
+                (6, 1, 3),
+                (2, 0, 6),
+                (2, 2, 1),
+            ],
+            [(4, 1, 6), (4, 3, 2), (5, 5, 4), (5, 0, 1), (7, 1, -1), (5, 5, 4)],
+        ]
+        rng = random.Random(0)
+        examples += [
+            [
+                (rng.randint(0, 10), rng.choice([0, 0, 1, 2, 5]), rng.randint(-1, 8))
+                for _ in range(rng.randint(0, 9))
+            ]
+            for _ in range(500)
+        ]
+        for example in examples:
+            contracts = [Contract(f"c{i}", *values) for i, values in enumerate(example)]
+            for _ in range(3):
+                rng.shuffle(contracts)
+                with self.subTest(contracts=contracts):
+                    self.assertEqual(
+                        ContractOptimizerFast(contracts).optimize()["income"],
+                        ContractOptimizerPruned(contracts).optimize()["income"],
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizerFast
+from service.executor import (
+    ExecutorOverloadedError,
+    ExecutorTimeoutError,
+    OptimizationExecutor,
+    run_optimizer,
+)
+
+
+def _fail() -> None:
+    raise RuntimeError("failure")
+
+
+def _sleep(duration: float) -> int:
+    time.sleep(duration)
+    return threading.get_ident()
+
+
+class Test(unittest.TestCase):
+    def _run(self, executor: OptimizationExecutor, *jobs):
+        async def run_all():
+            return await asyncio.gather(
+                *(executor.run(fn, *args, size=size) for fn, args, size in jobs),
+                return_exceptions=True,
+            )
+
+        try:
+            return asyncio.run(run_all())
+        finally:
+            executor.shutdown()
+
+    def test_run_unknown_mode_should_raise_error(self):
+        with self.assertRaises(ValueError):
+            OptimizationExecutor("cluster")
+
+    def test_run_inline_should_run_in_event_loop_thread(self):
+        executor = OptimizationExecutor("inline")
+        [result] = self._run(executor, (_sleep, (0,), 10**6))
+
+        self.assertEqual(threading.get_ident(), result)
+
+    def test_run_small_job_should_run_inline(self):
+        executor = OptimizationExecutor("thread", inline_threshold=100)
+        small, large = self._run(executor, (_sleep, (0,), 99), (_sleep, (0,), 100))
+
+        self.assertEqual(threading.get_ident(), small)
+        self.assertNotEqual(threading.get_ident(), large)
+
+    def test_run_process_should_return_optimization(self):
+        contracts = [
+            Contract(name="Contract1", start=0, duration=5, price=10),
+            Contract(name="Contract2", start=3, duration=7, price=14),
+            Contract(name="Contract3", start=5, duration=9, price=8),
+        ]
+        executor = OptimizationExecutor("process", max_workers=1)
+        [result] = self._run(
+            executor, (run_optimizer, (ContractOptimizerFast(contracts),), 3)
+        )
+
+        self.assertEqual({"income": 18, "path": ["Contract1", "Contract3"]}, result)
+
+    def test_run_too_many_jobs_should_raise_overloaded_error(self):
+        executor = OptimizationExecutor("thread", max_workers=1, max_pending=2)
+        results = self._run(executor, *[(_sleep, (0.1,), 1)] * 3)
+
+        self.assertIsInstance(results[0], int)
+        self.assertIsInstance(results[1], int)
+        self.assertIsInstance(results[2], ExecutorOverloadedError)
+        self.assertEqual(0, executor.pending)
+
+    def test_run_slow_job_should_raise_timeout_error(self):
+        executor = OptimizationExecutor("thread", timeout=0.01)
+        [result] = self._run(executor, (_sleep, (0.2,), 1))
+
+        self.assertIsInstance(result, ExecutorTimeoutError)
+
+    def test_run_timed_out_job_should_stay_pending_until_done(self):
+        executor = OptimizationExecutor(
+            "thread", max_workers=1, max_pending=1, timeout=0.05
+        )
+
+        async def run():
+            with self.assertRaises(ExecutorTimeoutError):
+                await executor.run(_sleep, 0.3, size=1)
+            # the worker is still busy with the job timed out
+            self.assertEqual(1, executor.pending)
+            with self.assertRaises(ExecutorOverloadedError):
+                await executor.run(_sleep, 0, size=1)
+            await asyncio.sleep(0.4)
+            self.assertEqual(0, executor.pending)
+            return await executor.run(_sleep, 0, size=1)
+
+        try:
+            self.assertIsInstance(asyncio.run(run()), int)
+        finally:
+            executor.shutdown()
+
+    def test_run_all_should_return_results_and_exceptions(self):
+        for mode in ("inline", "thread"):
+            with self.subTest(mode=mode):
+                executor = OptimizationExecutor(mode, max_workers=2)
+
+                async def run():
+                    return await executor.run_all(
+                        _sleep, [(0,), (0,)], size=2
+                    ) + await executor.run_all(_fail, [()], size=1)
+
+                try:
+                    first, second, failure = asyncio.run(run())
+                finally:
+                    executor.shutdown()
+
+                self.assertIsInstance(first, int)
+                self.assertIsInstance(second, int)
+                self.assertIsInstance(failure, RuntimeError)
+
+    def test_run_all_slow_jobs_should_return_timeout_error(self):
+        executor = OptimizationExecutor("thread", max_workers=2, timeout=0.05)
+
+        async def run():
+            return await executor.run_all(_sleep, [(0.5,), (0,)], size=2)
+
+        try:
+            slow, fast = asyncio.run(run())
+        finally:
+            executor.shutdown()
+
+        self.assertIsInstance(slow, ExecutorTimeoutError)
+        self.assertIsInstance(fast, int)
@@ -0,0 +1,109 @@
+import itertools
+import random
+import unittest
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.fleet_optimizer import ContractFleetOptimizer
+from test.contract_generator import ContractGenerator
+from test.tools import multitest
+
+
+class Test(unittest.TestCase):
+    @staticmethod
+    def _brute_force_income(contracts, ships):
+        # a set of contracts fits on k ships if at most k of them overlap at any time,
+        # and less than k cross the time of a contract with zero duration
+        best_income = 0
+        for r in range(len(contracts) + 1):
+            for subset in itertools.combinations(contracts, r):
+                if all(
+                    sum(1 for c in subset if c.start <= t < c.end) <= ships
+                    for t in {c.start for c in subset}
+                ) and all(
+                    sum(1 for c in subset if c.start < t < c.end) < ships
+                    for t in {c.start for c in subset if c.duration == 0}
+                ):
+                    best_income = max(best_income, sum(c.price for c in subset))
+        return best_income
+
+    def _assert_valid_paths(self, contracts, result):
+        contracts_by_name = {c.name: c for c in contracts}
+        income = 0
+        for path in result["paths"]:
+            ship_contracts = [contracts_by_name[name] for name in path]
+            income += sum(c.price for c in ship_contracts)
+            for previous, contract in zip(ship_contracts, ship_contracts[1:]):
+                self.assertLessEqual(previous.end, contract.start)
+        self.assertEqual(result["income"], income)
+
+    def test_optimize_invalid_ships_should_raise_error(self):
+        with self.assertRaises(ValueError):
+            ContractFleetOptimizer([], 0)
+
+    def test_optimize_no_contract_should_return_empty_paths(self):
+        result = ContractFleetOptimizer([], 3).optimize()
+
+        self.assertEqual({"income": 0, "paths": [[], [], []]}, result)
+
+    def test_optimize_example(self):
+        contracts = [
+            Contract(name="Contract1", start=0, duration=5, price=10),
+            Contract(name="Contract2", start=3, duration=7, price=14),
+            Contract(name="Contract3", start=5, duration=9, price=8),
+            Contract(name="Contract4", start=5, duration=9, price=7),
+        ]
+        result = ContractFleetOptimizer(contracts, 2).optimize()
+
+        self.assertEqual(32, result["income"])
+        self._assert_valid_paths(contracts, result)
+
+    def test_optimize_zero_duration_should_be_compatible_at_its_time(self):
+        contracts = [
+            Contract(name="a", start=0, duration=0, price=5),
+            Contract(name="b", start=0, duration=10, price=3),
+        ]
+        for ships in (1, 2):
+            with self.subTest(ships=ships):
+                result = ContractFleetOptimizer(contracts, ships).optimize()
+
+                self.assertEqual(
+                    ContractOptimizerFast(contracts).optimize()["income"],
+                    result["income"],
+                )
+                self._assert_valid_paths(contracts, result)
+
+    @multitest(
+        [
+            {"__description__": "1 ship", "ships": 1},
+            {"__description__": "2 ships", "ships": 2},
+            {"__description__": "3 ships", "ships": 3},
+        ]
+    )
+    def test_optimize_random_contracts_should_match_brute_force(self, ships):
+        random.seed(ships)
+        for _ in range(50):
+            contracts = [
+                Contract(
+                    name=f"c{i}",
+                    start=random.randint(0, 10),
+                    duration=random.randint(0, 6),
+                    price=random.randint(0, 20),
+                )
+                for i in range(random.randint(0, 8))
+            ]
+            result = ContractFleetOptimizer(contracts, ships).optimize()
+
+            self.assertEqual(
+                self._brute_force_income(contracts, ships), result["income"]
+            )
+            self._assert_valid_paths(contracts, result)
+
+    def test_optimize_single_ship_should_match_single_ship_optimizer(self):
+        contracts = ContractGenerator().generate(1000)
+        result = ContractFleetOptimizer(contracts, 1).optimize()
+
+        self.assertEqual(
+            ContractOptimizerFast(contracts).optimize()["income"], result["income"]
+        )
+        self._assert_valid_paths(contracts, result)
@@ -0,0 +1,120 @@
+import asyncio
+import unittest
+
+from service.jobs import JobLimitError, JobNotDoneError, JobNotFoundError, JobQueue
+
+
+class Test(unittest.TestCase):
+    def setUp(self) -> None:
+        self.started = []
+
+    def _work(self, name, seconds=0.01, fail=False):
+        async def work():
+            self.started.append(name)
+            await asyncio.sleep(seconds)
+            if fail:
+                raise RuntimeError("failure")
+            return {"income": len(name), "path": [name]}
+
+        return work
+
+    @staticmethod
+    async def _wait(queue, job_id):
+        while not queue.get(job_id).finished:
+            await asyncio.sleep(0.001)
+
+    def test_job_should_return_result_once_done(self):
+        async def run():
+            queue = JobQueue()
+            job_id = queue.submit(self._work("first"), size=10)
+            self.assertEqual("running", queue.status(job_id)["status"])
+            with self.assertRaises(JobNotDoneError):
+                queue.result(job_id)
+
+            await self._wait(queue, job_id)
+            return queue.status(job_id), queue.result(job_id)
+
+        status, result = asyncio.run(run())
+
+        self.assertEqual("done", status["status"])
+        self.assertEqual({"income": 5, "path": ["first"]}, result)
+
+    def test_failed_job_should_report_error(self):
+        async def run():
+            queue = JobQueue()
+            job_id = queue.submit(self._work("first", fail=True), size=10)
+            await self._wait(queue, job_id)
+            with self.assertRaises(JobNotDoneError):
+                queue.result(job_id)
+            return queue.status(job_id)
+
+        status = asyncio.run(run())
+
+        self.assertEqual("failed", status["status"])
+        self.assertEqual("RuntimeError: failure", status["error"])
+
+    def test_small_jobs_should_overtake_huge_ones(self):
+        async def run():
+            queue = JobQueue(max_running=1)
+            job_ids = [
+                queue.submit(self._work("running"), size=10),
+                queue.submit(self._work("huge"), size=10**7),
+                queue.submit(self._work("small"), size=10),
+                queue.submit(self._work("small_later"), size=10),
+            ]
+            self.assertEqual(2, queue.status(job_ids[1])["position"])
+            self.assertEqual(0, queue.status(job_ids[2])["position"])
+            for job_id in job_ids:
+                await self._wait(queue, job_id)
+
+        asyncio.run(run())
+
+        self.assertEqual(["running", "small", "small_later", "huge"], self.started)
+
+    def test_cancel_should_stop_queued_and_running_jobs(self):
+        async def run():
+            queue = JobQueue(max_running=1)
+            running = queue.submit(self._work("running", seconds=0.05), size=10)
+            queued = queue.submit(self._work("queued"), size=10)
+            await asyncio.sleep(0.001)
+
+            self.assertEqual("cancelled", queue.cancel(queued)["status"])
+            self.assertEqual("cancelled", queue.cancel(running)["status"])
+            # the slot of the running job is only released once its work is done
+            self.assertEqual(1, queue.running)
+            last = queue.submit(self._work("last"), size=10)
+            self.assertEqual("queued", queue.status(last)["status"])
+            await self._wait(queue, last)
+            return queue.status(running)
+
+        status = asyncio.run(run())
+
+        self.assertEqual("cancelled", status["status"])
+        self.assertEqual(["running", "last"], self.started)
+
+    def test_submit_above_limit_should_raise_error(self):
+        async def run():
+            queue = JobQueue(max_running=1, max_jobs=2)
+            queue.submit(self._work("first"), size=10)
+            queue.submit(self._work("second"), size=10)
+            with self.assertRaises(JobLimitError):
+                queue.submit(self._work("third"), size=10)
+
+        asyncio.run(run())
+
+    def test_finished_jobs_should_expire_after_ttl(self):
+        async def run():
+            queue = JobQueue(ttl=0)
+            job_id = queue.submit(self._work("first"), size=10)
+            job = queue.get(job_id)
+            while not job.finished:
+                await asyncio.sleep(0.001)
+            with self.assertRaises(JobNotFoundError):
+                queue.get(job_id)
+            return len(queue)
+
+        self.assertEqual(0, asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    unittest.main()
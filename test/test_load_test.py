@@ -0,0 +1,112 @@
+import asyncio
+import contextlib
+import io
+import random
+import time
+import unittest
+
+import httpx
+
+from test.load_test import LoadTest, ServerProcess
+
+
+class Test(unittest.TestCase):
+    @staticmethod
+    def _report(p50, requests_per_second, error_rate=0.0, peak=100):
+        return {
+            "results": {
+                "latency": {"p50": p50, "p90": p50 * 2, "p99": p50 * 4},
+                "requests_per_second": requests_per_second,
+                "error_rate": error_rate,
+                "server_rss_bytes": {"peak": peak, "end": peak},
+            }
+        }
+
+    def test_summarize_should_return_percentiles_and_error_rate(self):
+        samples = [(10, i / 1000, 200) for i in range(1, 101)]
+        samples += [(100, 1.0, 503), (100, 2.0, 0)]
+
+        results = LoadTest.summarize(samples, duration=2.0, rss_samples=[300, 500, 400])
+
+        self.assertEqual(102, results["requests"])
+        self.assertEqual(2, results["errors"])
+        self.assertAlmostEqual(2 / 102, results["error_rate"])
+        self.assertEqual(51.0, results["requests_per_second"])
+        self.assertEqual({"200": 100, "503": 1, "0": 1}, results["status_codes"])
+        self.assertAlmostEqual(0.0505, results["latency_by_size"]["10"]["p50"])
+        self.assertEqual(2, results["latency_by_size"]["100"]["requests"])
+        self.assertEqual(2.0, results["latency"]["max"])
+        self.assertEqual({"peak": 500, "end": 400}, results["server_rss_bytes"])
+
+    def test_compare_should_flag_regressions_above_threshold(self):
+        baseline = self._report(0.010, 100.0)
+
+        self.assertEqual([], LoadTest.compare(baseline, self._report(0.011, 90.0), 0.2))
+        regressions = LoadTest.compare(
+            baseline, self._report(0.020, 50.0, error_rate=0.1, peak=200), 0.2
+        )
+        self.assertEqual(
+            [
+                "latency p50",
+                "latency p90",
+                "latency p99",
+                "requests_per_second",
+                "server_rss_bytes peak",
+                "error_rate",
+            ],
+            [regression.split(":")[0] for regression in regressions],
+        )
+
+    def test_payloads_should_not_change_global_random_state(self):
+        state = random.getstate()
+        load_test = LoadTest("http://test", seed=3, payloads_per_size=2)
+
+        self.assertEqual(state, random.getstate())
+        self.assertEqual(
+            load_test.payloads,
+            LoadTest("http://test", seed=3, payloads_per_size=2).payloads,
+        )
+
+    def test_client_should_measure_requests_in_flight_at_the_end(self):
+        async def slow_handler(request):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, json={})
+
+        load_test = LoadTest("http://test", payloads_per_size=1)
+
+        async def run_client():
+            async with httpx.AsyncClient(
+                base_url="http://test", transport=httpx.MockTransport(slow_handler)
+            ) as client:
+                now = time.perf_counter()
+                await load_test._client(client, random.Random(0), now, now + 0.1)
+
+        asyncio.run(run_client())
+
+        self.assertEqual(1, len(load_test.samples))
+        self.assertGreaterEqual(load_test.samples[0][1], 0.2)
+        self.assertEqual(200, load_test.samples[0][2])
+
+    def test_run_should_measure_local_server(self):
+        with ServerProcess(workers=1) as server:
+            load_test = LoadTest(
+                server.url,
+                concurrency=2,
+                duration=1.0,
+                warmup=0.2,
+                payloads_per_size=2,
+                server=server,
+            )
+            with contextlib.redirect_stdout(io.StringIO()):
+                report = load_test.run()
+
+        results = report["results"]
+        self.assertGreater(results["requests"], 0)
+        self.assertEqual(0, results["errors"])
+        self.assertEqual({"10", "100"}, set(results["latency_by_size"]))
+        self.assertGreater(results["server_rss_bytes"]["peak"], 0)
+        self.assertEqual(1, report["config"]["workers"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from service.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    Metric,
+    MetricsRegistry,
+    size_bucket,
+)
+
+
+class Test(unittest.TestCase):
+    def test_size_bucket_should_return_upper_bound(self):
+        for nb_contracts, expected in (
+            (0, "100"),
+            (100, "100"),
+            (101, "1k"),
+            (10**6, "1M"),
+            (10**6 + 1, "+Inf"),
+        ):
+            with self.subTest(nb_contracts=nb_contracts):
+                self.assertEqual(expected, size_bucket(nb_contracts))
+
+    def test_render_should_return_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        counter = registry.register(
+            Counter("requests_total", "Requests.", ["handler", "status"])
+        )
+        gauge = registry.register(Gauge("pending", "Pending jobs.", function=lambda: 3))
+        counter.inc(handler="optimize", status="200")
+        counter.inc(2, handler='say "hi"', status="500")
+
+        self.assertEqual(
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{handler="optimize",status="200"} 1\n'
+            'requests_total{handler="say \\"hi\\"",status="500"} 2\n'
+            "# HELP pending Pending jobs.\n"
+            "# TYPE pending gauge\n"
+            "pending 3\n",
+            registry.render(),
+        )
+        self.assertIs(gauge, registry.metrics["pending"])
+
+    def test_histogram_should_render_cumulative_buckets(self):
+        histogram = Histogram("duration", "Duration.", ["phase"], buckets=[1, 2])
+        for value in (0.5, 1, 1.5, 3):
+            histogram.observe(value, phase="dp")
+
+        self.assertEqual(
+            [
+                'duration_bucket{phase="dp",le="1"} 2',
+                'duration_bucket{phase="dp",le="2"} 3',
+                'duration_bucket{phase="dp",le="+Inf"} 4',
+                'duration_sum{phase="dp"} 6.0',
+                'duration_count{phase="dp"} 4',
+            ],
+            histogram.samples(),
+        )
+
+    def test_gauge_should_go_up_and_down(self):
+        gauge = Gauge("in_flight", "In flight.")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        self.assertEqual(["in_flight 1"], gauge.samples())
+
+    def test_metric_without_samples_should_not_be_instantiated(self):
+        with self.assertRaises(TypeError):
+            Metric("requests_total", "Requests.")  # type: ignore[abstract]
+
+    def test_wrong_labels_should_raise_error(self):
+        counter = Counter("requests_total", "Requests.", ["handler"])
+
+        with self.assertRaises(ValueError):
+            counter.inc(status="200")
+        with self.assertRaises(ValueError):
+            registry = MetricsRegistry()
+            registry.register(counter)
+            registry.register(counter)
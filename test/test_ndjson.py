@@ -0,0 +1,109 @@
+import gzip
+import json
+import unittest
+
+from service.ndjson import (
+    ContractParseError,
+    NdjsonContractReader,
+    PayloadTooLargeError,
+)
+
+
+class Test(unittest.TestCase):
+    CONTRACTS = [
+        {"name": "Contract1", "start": 0, "duration": 5, "price": 10},
+        {"name": "Contract2", "start": 3, "duration": 7, "price": 14},
+        {"name": "Contract3", "start": 5, "duration": 9, "price": 8},
+    ]
+
+    @staticmethod
+    def _read(payload: bytes, chunk_size: int, gzipped: bool = False, max_size=None):
+        reader = NdjsonContractReader(gzipped=gzipped, max_size=max_size)
+        for i in range(0, len(payload), chunk_size):
+            reader.feed(payload[i : i + chunk_size])
+        return reader.close()
+
+    def _payload(self) -> bytes:
+        return "\n".join(json.dumps(c) for c in self.CONTRACTS).encode()
+
+    def _assert_columns(self, columns):
+        self.assertEqual([c["name"] for c in self.CONTRACTS], columns.names)
+        self.assertEqual([c["start"] for c in self.CONTRACTS], columns.start.tolist())
+        self.assertEqual(
+            [c["duration"] for c in self.CONTRACTS], columns.duration.tolist()
+        )
+        self.assertEqual([c["price"] for c in self.CONTRACTS], columns.price.tolist())
+
+    def test_read_chunks_of_any_size_should_return_all_contracts(self):
+        for chunk_size in (1, 7, 10**6):
+            with self.subTest(chunk_size=chunk_size):
+                self._assert_columns(self._read(self._payload(), chunk_size))
+
+    def test_read_long_line_in_small_chunks_should_return_contract(self):
+        contract = {"name": "x" * 10**6, "start": 0, "duration": 5, "price": 10}
+        payload = (json.dumps(contract) + "\n").encode() * 2
+
+        columns = self._read(payload, 16)
+
+        self.assertEqual([contract["name"]] * 2, columns.names)
+        self.assertEqual([10, 10], columns.price.tolist())
+
+    def test_read_gzip_should_return_all_contracts(self):
+        self._assert_columns(self._read(gzip.compress(self._payload()), 5, True))
+
+    def test_read_payload_of_max_size_should_return_all_contracts(self):
+        payload = self._payload()
+        for gzipped, content in ((False, payload), (True, gzip.compress(payload))):
+            with self.subTest(gzipped=gzipped):
+                self._assert_columns(self._read(content, 5, gzipped, len(payload)))
+
+    def test_read_payload_larger_than_max_size_should_raise_error(self):
+        payload = self._payload()
+        for gzipped, content in ((False, payload), (True, gzip.compress(payload))):
+            for chunk_size in (5, 10**6):
+                with self.subTest(gzipped=gzipped, chunk_size=chunk_size):
+                    with self.assertRaises(PayloadTooLargeError):
+                        self._read(content, chunk_size, gzipped, len(payload) - 1)
+
+    def test_read_gzip_bomb_should_raise_error_without_decompressing_it(self):
+        reader = NdjsonContractReader(gzipped=True, max_size=1000)
+        with self.assertRaises(PayloadTooLargeError):
+            reader.feed(gzip.compress(b"\n" * 10**8))
+        self.assertLessEqual(len(reader._buffer), 1001)
+
+    def test_read_empty_lines_should_be_ignored(self):
+        payload = b"\n" + self._payload().replace(b"\n", b"\n\r\n") + b"\n\n"
+        self._assert_columns(self._read(payload, 3))
+
+    def test_read_empty_payload_should_return_no_contract(self):
+        self.assertEqual(0, len(self._read(b"", 1)))
+
+    def test_read_invalid_line_should_raise_error_with_line_number(self):
+        for line, message in (
+            (b"{", "invalid JSON"),
+            (b"[]", "JSON object"),
+            (
+                b'{"name": "c", "start": 0, "duration": 1, "price": 1}, {}',
+                "invalid JSON",
+            ),
+            (b'{"name": 1, "start": 0, "duration": 1, "price": 1}', "'name'"),
+            (b'{"name": "c", "start": 0, "duration": "1", "price": 1}', "'duration'"),
+            (b'{"name": "c", "start": 0, "duration": 1, "price": true}', "'price'"),
+            (b'{"name": "c", "start": 0, "duration": 1, "price": 1e100}', "'price'"),
+            (
+                b'{"name": "c", "start": 0, "duration": 1, "price": 1'
+                + b"0" * 20
+                + b"}",
+                "64-bit",
+            ),
+        ):
+            with self.subTest(line=line):
+                with self.assertRaises(ContractParseError) as context:
+                    self._read(self._payload() + b"\n\n" + line, 4)
+
+                self.assertEqual(5, context.exception.line)
+                self.assertIn(message, context.exception.message)
+
+    def test_read_truncated_gzip_should_raise_error(self):
+        with self.assertRaises(ContractParseError):
+            self._read(gzip.compress(self._payload())[:-10], 5, True)
@@ -1,8 +1,14 @@
 import cProfile
 import pstats
+import time
 import timeit
+import tracemalloc
+from typing import Callable, List
 
-from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizer, ContractOptimizerFast
+from optimizer.contract_optimizer_numpy import ContractOptimizerNumpy
+from optimizer.timeline_decomposition import ContractOptimizerDecomposed
 from test.contract_generator import ContractGenerator
 
 
@@ -13,10 +19,21 @@ class Profiler:
 
     MEASURE_REPETITIONS = 5
 
-    def __init__(self, contract_generator: ContractGenerator):
+    def __init__(
+        self,
+        contract_generator: ContractGenerator,
+        optimizer_class: Callable[
+            [List[Contract]], ContractOptimizer
+        ] = ContractOptimizerFast,
+    ):
+        """
+        Initializes the profiler.
+        :param contract_generator: generator of the contracts to be optimized.
+        :param optimizer_class: optimizer to be profiled (defaults to ContractOptimizerFast).
+        """
         self.profiler = cProfile.Profile()
         self.contract_generator = contract_generator
-        self.optimizer_class = ContractOptimizerFast
+        self.optimizer_class = optimizer_class
 
     def profile_stats(self, nb_contracts: int) -> None:
         """
@@ -63,10 +80,67 @@ class Profiler:
         contracts = self.contract_generator.generate(nb_contracts)
         self.optimizer_class(contracts).optimize()
 
+    def profile_peak_memory(self, nb_contracts: int) -> None:
+        """
+        Runs optimization on a set of contracts randomly generated
+        and prints the peak memory allocated during optimization (based on tracemalloc library).
+        Unlike profile_memory, it does not require any decorator.
+        :param nb_contracts: number of contracts to be optimized.
+        """
+        print(
+            f"Measuring peak memory of contract optimization for {nb_contracts} contracts"
+        )
+        contracts = self.contract_generator.generate(nb_contracts)
+        optimizer = self.optimizer_class(contracts)
+        tracemalloc.start()
+        optimizer.optimize()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f" => peak memory: {peak / 2**20:.1f}MB\n")
+
+    def profile_decomposition(
+        self, nb_contracts: int, nb_seasons: int, max_workers: int
+    ) -> None:
+        """
+        Runs optimization on seasons of contracts randomly generated, separated by gaps,
+        and prints the time of each segment and the speedup of the decomposition.
+        :param nb_contracts: number of contracts to be optimized, spread over the seasons.
+        :param nb_seasons: number of seasons, i.e. minimum number of segments.
+        :param max_workers: number of worker processes of the decomposition.
+        """
+        print(
+            f"Measuring decomposition of {nb_contracts} contracts in {nb_seasons} seasons"
+        )
+        # generated contracts start within 1000 and last at most 1000
+        contracts = [
+            c._replace(start=c.start + 3000 * season)
+            for season in range(nb_seasons)
+            for c in self.contract_generator.generate(nb_contracts // nb_seasons)
+        ]
+
+        start_time = time.perf_counter()
+        ContractOptimizerFast(contracts).optimize()
+        fast_time = time.perf_counter() - start_time
+
+        optimizer = ContractOptimizerDecomposed(contracts, max_workers)
+        start_time = time.perf_counter()
+        optimizer.optimize()
+        decomposed_time = time.perf_counter() - start_time
+
+        for segment in optimizer.segments:
+            print(
+                f" segment [{segment['start']}, {segment['end']}]: "
+                f"{segment['contracts']} contracts in {segment['seconds']:.3f}s"
+            )
+        print(f" => segments: {len(optimizer.segments)}")
+        print(f" => time: {decomposed_time:.3f}s (fast: {fast_time:.3f}s)")
+        print(f" => speedup: {fast_time / decomposed_time:.2f}\n")
+
 
 if __name__ == "__main__":
     contract_generator = ContractGenerator(from_file=True)
     profiler = Profiler(contract_generator)
+    # profiler = Profiler(contract_generator, optimizer_class=ContractOptimizerNumpy)
 
     # profiler.profile_stats(nb_contracts=10000)
 
@@ -74,6 +148,16 @@ if __name__ == "__main__":
     for n in (10, 100, 1000, 10000, 20000, 50000, 100000, 500000):
         profiler.profile_time(nb_contracts=n)
 
+    # profile peak memory
+    # for n in (10, 100, 1000, 10000, 20000, 50000, 100000, 500000):
+    #     profiler.profile_peak_memory(nb_contracts=n)
+
+    # profile decomposition in segments solved in parallel
+    # for workers in (1, 2, 4, 8):
+    #     profiler.profile_decomposition(
+    #         nb_contracts=1000000, nb_seasons=100, max_workers=workers
+    #     )
+
     # profile memory
     # WARNING: requires the decorator @profile to the method being profiled
     # for n in (10, 100, 1000, 10000, 20000, 50000, 100000, 500000):
@@ -0,0 +1,125 @@
+import itertools
+import random
+import unittest
+
+from optimizer.contract import Contract, ContractTemplate
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.dominance import ContractOptimizerPruned
+from optimizer.time_axis_optimizer import ContractOptimizerTimeAxis
+from optimizer.recurrence import (
+    ContractOptimizerRecurring,
+    count_occurrences,
+    merge_occurrences,
+)
+
+
+class Test(unittest.TestCase):
+    CONTRACTS = [
+        Contract(name="Contract1", start=9, duration=5, price=12),
+        Contract(name="Contract2", start=3, duration=7, price=14),
+    ]
+    TEMPLATES = [
+        ContractTemplate(
+            name="Weekly", start=0, duration=5, price=6, period=7, repetitions=3
+        ),
+        ContractTemplate(
+            name="Daily", start=2, duration=1, price=1, period=1, repetitions=4
+        ),
+    ]
+
+    def test_occurrences_should_be_numbered_from_zero(self):
+        self.assertEqual(
+            [
+                Contract(name="Weekly#0", start=0, duration=5, price=6),
+                Contract(name="Weekly#1", start=7, duration=5, price=6),
+                Contract(name="Weekly#2", start=14, duration=5, price=6),
+            ],
+            list(self.TEMPLATES[0].occurrences()),
+        )
+        self.assertEqual(7, count_occurrences(self.TEMPLATES))
+
+    def test_merge_should_sort_contracts_and_occurrences_by_start_then_duration(self):
+        merged = list(merge_occurrences(self.CONTRACTS, self.TEMPLATES))
+
+        self.assertEqual(
+            [
+                ("Weekly#0", 0),
+                ("Daily#0", 2),
+                ("Daily#1", 3),
+                ("Contract2", 3),
+                ("Daily#2", 4),
+                ("Daily#3", 5),
+                ("Weekly#1", 7),
+                ("Contract1", 9),
+                ("Weekly#2", 14),
+            ],
+            [(c.name, c.start) for c in merged],
+        )
+
+    def test_merge_should_expand_templates_lazily(self):
+        template = self.TEMPLATES[1]._replace(repetitions=10**12)
+
+        merged = merge_occurrences(self.CONTRACTS, [template])
+
+        self.assertEqual(
+            ["Daily#0", "Daily#1", "Contract2"],
+            [c.name for c in itertools.islice(merged, 3)],
+        )
+
+    def test_optimize_should_match_expanded_contracts(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            contracts = [
+                Contract(
+                    name=f"c{i}",
+                    start=rng.randint(0, 100),
+                    duration=rng.randint(0, 10),
+                    price=rng.randint(1, 20),
+                )
+                for i in range(rng.randint(0, 20))
+            ]
+            templates = [
+                ContractTemplate(
+                    name=f"t{i}",
+                    start=rng.randint(0, 50),
+                    duration=rng.randint(1, 10),
+                    price=rng.randint(1, 20),
+                    period=rng.randint(1, 10),
+                    repetitions=rng.randint(1, 20),
+                )
+                for i in range(rng.randint(0, 4))
+            ]
+            expanded = contracts + [c for t in templates for c in t.occurrences()]
+
+            optimizer = ContractOptimizerRecurring(
+                contracts, templates, ContractOptimizerTimeAxis
+            )
+
+            self.assertEqual(
+                ContractOptimizerTimeAxis(expanded).optimize()["income"],
+                optimizer.optimize()["income"],
+            )
+
+        optimizer = ContractOptimizerRecurring(self.CONTRACTS, self.TEMPLATES)
+        self.assertEqual(
+            {"income": 25, "path": ["Weekly#0", "Daily#3", "Contract1", "Weekly#2"]},
+            optimizer.optimize(),
+        )
+        self.assertEqual(["merge", "sort", "dp", "path"], list(optimizer.phases))
+        self.assertIs(ContractOptimizerFast, optimizer.optimizer_class)
+
+    def test_optimize_pruned_should_return_pruned_contracts(self):
+        # the long contract contains more expensive ones
+        contracts = self.CONTRACTS + [
+            Contract(name="Long", start=0, duration=20, price=3)
+        ]
+        optimizer = ContractOptimizerRecurring(
+            contracts, self.TEMPLATES, ContractOptimizerPruned
+        )
+
+        self.assertEqual(25, optimizer.optimize()["income"])
+        self.assertEqual(1, optimizer.pruned)
+
+
+if __name__ == "__main__":
+    unittest.main()
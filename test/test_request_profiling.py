@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.stopwatch import Stopwatch
+from service.profiling import ProfileRecorder, profile_optimizer
+from test.contract_generator import ContractGenerator
+
+
+class Test(unittest.TestCase):
+    def test_profile_optimizer_should_return_top_functions_and_allocations(self):
+        contracts = ContractGenerator().generate(1000)
+
+        result, phases, profile = profile_optimizer(
+            ContractOptimizerFast(contracts), top=5
+        )
+
+        self.assertEqual(ContractOptimizerFast(contracts).optimize(), result)
+        self.assertEqual(["sort", "dp", "path"], list(phases))
+        self.assertEqual(5, len(profile["functions"]))
+        self.assertIn("find_nearest_successor", str(profile["functions"]))
+        cumulative_times = [f["cumtime"] for f in profile["functions"]]
+        self.assertEqual(sorted(cumulative_times, reverse=True), cumulative_times)
+        self.assertIn(profile["allocations_phase"], phases)
+        self.assertIn("contract_optimizer.py", profile["allocations"][0]["location"])
+        self.assertGreater(profile["peak_bytes"], 0)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIsNone(Stopwatch.listener())
+
+    def test_profile_optimizer_concurrent_threads_should_not_interfere(self):
+        contracts = ContractGenerator().generate(2000)
+        expected = ContractOptimizerFast(contracts).optimize()
+
+        def profile():
+            return profile_optimizer(ContractOptimizerFast(contracts))[0]
+
+        def optimize():
+            # never profiled, though its stopwatch laps while others are profiled
+            result = ContractOptimizerFast(contracts).optimize()
+            return result, sys.getprofile()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            profiles = [pool.submit(profile) for _ in range(2)]
+            optimizations = [pool.submit(optimize) for _ in range(4)]
+
+            for future in profiles:
+                self.assertEqual(expected, future.result())
+            for future in optimizations:
+                self.assertEqual((expected, None), future.result())
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_authorized_should_compare_tokens(self):
+        recorder = ProfileRecorder(token="secret")
+
+        self.assertTrue(recorder.authorized("secret"))
+        self.assertFalse(recorder.authorized("wrong"))
+        self.assertFalse(recorder.authorized(None))
+        self.assertFalse(ProfileRecorder().authorized("secret"))
+
+    def test_sample_should_return_true_one_call_in_sample_rate(self):
+        recorder = ProfileRecorder(sample_rate=3)
+
+        self.assertEqual(
+            [False, False, True, False, False, True],
+            [recorder.sample() for _ in range(6)],
+        )
+        self.assertFalse(any(ProfileRecorder().sample() for _ in range(10)))
+
+    def test_save_should_keep_the_latest_profiles(self):
+        with tempfile.TemporaryDirectory() as folder:
+            recorder = ProfileRecorder(directory=folder, max_files=2)
+
+            paths = [recorder.save("optimize", {"seconds": i}) for i in range(4)]
+
+            self.assertEqual(
+                sorted(os.path.basename(path) for path in paths[2:]),
+                sorted(os.listdir(folder)),
+            )
+        self.assertIsNone(ProfileRecorder().save("optimize", {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
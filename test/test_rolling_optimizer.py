@@ -0,0 +1,104 @@
+import random
+import unittest
+from unittest import mock
+
+from optimizer.contract import Contract
+from optimizer.rolling_optimizer import ContractOptimizerRolling
+from optimizer.time_axis_optimizer import ContractOptimizerTimeAxis
+from test.contract_generator import WorkloadGenerator
+
+
+class Test(unittest.TestCase):
+    EXAMPLE = [
+        Contract(name="Contract1", start=0, duration=5, price=10),
+        Contract(name="Contract2", start=3, duration=7, price=14),
+        Contract(name="Contract3", start=5, duration=9, price=8),
+        Contract(name="Contract4", start=5, duration=9, price=7),
+    ]
+
+    def test_optimize_example(self):
+        optimizer = ContractOptimizerRolling(self.EXAMPLE)
+
+        self.assertEqual(
+            {"income": 18, "path": ["Contract1", "Contract3"]}, optimizer.optimize()
+        )
+        self.assertEqual(["dp"], list(optimizer.phases))
+        self.assertEqual(3, optimizer.max_pending)
+
+    def test_optimize_should_match_time_axis_optimizer(self):
+        rng = random.Random(0)
+        for interval in (0, 2, ContractOptimizerRolling.CHECK_INTERVAL):
+            with mock.patch.object(
+                ContractOptimizerRolling, "CHECK_INTERVAL", interval
+            ):
+                for _ in range(300):
+                    contracts = sorted(
+                        (
+                            Contract(
+                                name=f"c{i}",
+                                start=rng.randint(0, 50),
+                                duration=rng.randint(0, 8),
+                                price=rng.randint(-2, 10),
+                            )
+                            for i in range(rng.randint(0, 30))
+                        ),
+                        key=lambda c: c.start,
+                    )
+
+                    result = ContractOptimizerRolling(contracts).optimize()
+
+                    self.assertEqual(
+                        ContractOptimizerTimeAxis(contracts).optimize()["income"],
+                        result["income"],
+                    )
+                    by_name = {c.name: c for c in contracts}
+                    path = [by_name[name] for name in result["path"]]
+                    self.assertEqual(result["income"], sum(c.price for c in path))
+                    self.assertTrue(
+                        all(a.end <= b.start for a, b in zip(path, path[1:]))
+                    )
+
+    def test_push_should_commit_path_when_no_contract_crosses_time(self):
+        optimizer = ContractOptimizerRolling()
+
+        self.assertEqual([], optimizer.push(self.EXAMPLE[0]))
+        self.assertEqual([], optimizer.push(self.EXAMPLE[1]))
+        self.assertEqual([], optimizer.push(self.EXAMPLE[2]))
+        self.assertEqual(14, optimizer.best_income)
+        self.assertEqual(
+            [],
+            optimizer.push(Contract(name="Contract5", start=20, duration=1, price=1)),
+        )
+        self.assertEqual(18, optimizer.best_income)
+        # nothing crosses 20: the best path up to it is final
+        self.assertEqual(
+            ["Contract1", "Contract3"],
+            optimizer.push(Contract(name="Contract6", start=21, duration=1, price=2)),
+        )
+        self.assertEqual(18, optimizer.committed_income)
+        self.assertEqual(["Contract5", "Contract6"], optimizer.close())
+        self.assertEqual(21, optimizer.committed_income)
+
+    def test_push_should_commit_common_prefix_of_long_feeds(self):
+        optimizer = ContractOptimizerRolling()
+        path = []
+        for contract in WorkloadGenerator().stream(20000):
+            path += optimizer.push(contract)
+        committed = len(path)
+        path += optimizer.close()
+
+        # contracts always overlap, but paths converge
+        self.assertGreater(committed, len(path) / 2)
+        self.assertLess(optimizer.max_pending, 1000)
+        self.assertEqual(len(path), len(set(path)))
+
+    def test_push_before_previous_start_should_raise_error(self):
+        optimizer = ContractOptimizerRolling()
+        optimizer.push(self.EXAMPLE[1])
+
+        with self.assertRaises(ValueError):
+            optimizer.push(self.EXAMPLE[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import random
+import unittest
+
+import numpy as np
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.contract_optimizer_numpy import ContractOptimizerNumpy
+from optimizer.time_axis_optimizer import (
+    ContractOptimizerTimeAxis,
+    counting_argsort,
+    select_optimizer,
+)
+from test.contract_generator import ContractGenerator
+from test.tools import brute_force_income
+
+
+class Test(unittest.TestCase):
+    EXAMPLE = [
+        Contract(name="Contract1", start=0, duration=5, price=10),
+        Contract(name="Contract2", start=3, duration=7, price=14),
+        Contract(name="Contract3", start=5, duration=9, price=8),
+        Contract(name="Contract4", start=5, duration=9, price=7),
+    ]
+
+    def test_counting_argsort_should_be_stable(self):
+        rng = np.random.default_rng(0)
+        for nb_keys in (1, 100, 2**16, 2**20):
+            keys = rng.integers(0, nb_keys, 1000)
+
+            order = counting_argsort(keys, nb_keys)
+
+            self.assertEqual(np.argsort(keys, kind="stable").tolist(), order.tolist())
+
+    def test_optimize_no_contract_should_return_empty_path(self):
+        result = ContractOptimizerTimeAxis([]).optimize()
+
+        self.assertEqual({"income": 0, "path": []}, result)
+
+    def test_optimize_example(self):
+        result = ContractOptimizerTimeAxis(self.EXAMPLE).optimize()
+
+        self.assertEqual({"income": 18, "path": ["Contract1", "Contract3"]}, result)
+
+    def test_optimize_should_match_brute_force(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            contracts = [
+                Contract(
+                    name=f"c{i}",
+                    start=rng.randint(-5, 20),
+                    duration=rng.choice([0, 1, 2, 3, 5]),
+                    price=rng.randint(-2, 10),
+                )
+                for i in range(rng.randint(1, 8))
+            ]
+
+            result = ContractOptimizerTimeAxis(contracts).optimize()
+
+            self.assertEqual(brute_force_income(contracts), result["income"])
+            contracts_by_name = {c.name: c for c in contracts}
+            path = [contracts_by_name[name] for name in result["path"]]
+            self.assertEqual(result["income"], sum(c.price for c in path))
+            for previous, contract in zip(path, path[1:]):
+                self.assertLessEqual(previous.end, contract.start)
+
+    def test_optimize_should_match_fast_optimizer(self):
+        contracts = ContractGenerator().generate(10000)
+        optimizer = ContractOptimizerTimeAxis(contracts)
+
+        result = optimizer.optimize()
+
+        self.assertEqual(
+            ContractOptimizerFast(contracts).optimize()["income"], result["income"]
+        )
+        self.assertEqual(["compress", "sort", "dp", "path"], list(optimizer.phases))
+
+    def test_select_optimizer_should_depend_on_time_span(self):
+        dense = ContractGenerator().generate(1000)
+        sparse = [c._replace(start=c.start * 10**6) for c in dense]
+
+        self.assertIsInstance(select_optimizer(dense), ContractOptimizerTimeAxis)
+        self.assertIsInstance(select_optimizer(sparse), ContractOptimizerFast)
+        self.assertIsInstance(select_optimizer(self.EXAMPLE), ContractOptimizerFast)
+
+    def test_select_optimizer_negative_duration_should_return_fast_optimizer(self):
+        contracts = ContractGenerator().generate(1000)
+        contracts[0] = contracts[0]._replace(duration=-200)
+
+        optimizer = select_optimizer(contracts)
+
+        self.assertIsInstance(optimizer, ContractOptimizerFast)
+        self.assertEqual(
+            ContractOptimizerFast(contracts).optimize(), optimizer.optimize()
+        )
+
+    def test_optimize_negative_duration_or_large_span_should_match_fast_optimizer(self):
+        for contracts in (
+            self.EXAMPLE + [Contract(name="Negative", start=10, duration=-3, price=5)],
+            [
+                Contract(name="First", start=0, duration=5, price=10),
+                Contract(name="Last", start=10**13, duration=5, price=8),
+            ],
+        ):
+            optimizer = ContractOptimizerTimeAxis(contracts)
+
+            self.assertEqual(
+                ContractOptimizerFast(contracts).optimize(), optimizer.optimize()
+            )
+            self.assertEqual(["sort", "dp", "path"], list(optimizer.phases))
+
+    def test_engines_should_agree_on_zero_durations_in_any_order(self):
+        rng = random.Random(0)
+        for n in (99, 100):
+            contracts = [
+                Contract(name="B", start=5, duration=5, price=10),
+                Contract(name="Z", start=5, duration=0, price=3),
+            ]
+            contracts += [
+                Contract(name=f"u{i}", start=10 + i, duration=1, price=1)
+                for i in range(n - 2)
+            ]
+            for _ in range(5):
+                with self.subTest(n=n):
+                    incomes = {
+                        engine(contracts).optimize()["income"]
+                        for engine in (
+                            select_optimizer,
+                            ContractOptimizerFast,
+                            ContractOptimizerNumpy,
+                            ContractOptimizerTimeAxis,
+                        )
+                    }
+
+                    self.assertEqual({n + 11}, incomes)
+                rng.shuffle(contracts)
+
+
+if __name__ == "__main__":
+    unittest.main()
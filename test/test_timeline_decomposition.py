@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.timeline_decomposition import ContractOptimizerDecomposed, split_timeline
+from test.contract_generator import ContractGenerator
+
+
+class Test(unittest.TestCase):
+    @staticmethod
+    def _make_seasons(nb_seasons: int, nb_contracts: int):
+        # contracts of a season start within 1000 and last at most 1000, seasons are 3000 apart
+        generator = ContractGenerator()
+        contracts = []
+        for season in range(nb_seasons):
+            contracts += [
+                c._replace(start=c.start + 3000 * season)
+                for c in generator.generate(nb_contracts)
+            ]
+        random.shuffle(contracts)
+        return contracts
+
+    def test_split_timeline_should_split_where_no_contract_crosses(self):
+        contracts = [
+            Contract(name="c1", start=0, duration=5, price=1),
+            Contract(name="c2", start=1, duration=2, price=1),
+            Contract(name="c3", start=5, duration=1, price=1),
+            Contract(name="c4", start=8, duration=4, price=1),
+            Contract(name="c5", start=6, duration=3, price=1),
+        ]
+        segments = split_timeline(contracts)
+
+        self.assertEqual(
+            [["c1", "c2"], ["c3"], ["c5", "c4"]],
+            [[c.name for c in segment] for segment in segments],
+        )
+
+    def test_split_timeline_no_contract_should_return_no_segment(self):
+        self.assertEqual([], split_timeline([]))
+
+    def test_optimize_seasons_should_match_optimizer_fast(self):
+        contracts = self._make_seasons(nb_seasons=10, nb_contracts=100)
+
+        for max_workers in (1, 2):
+            with self.subTest(max_workers=max_workers):
+                optimizer = ContractOptimizerDecomposed(contracts, max_workers)
+
+                self.assertEqual(
+                    ContractOptimizerFast(contracts).optimize(), optimizer.optimize()
+                )
+                # seasons may also be split within, at their own natural cut points
+                self.assertGreaterEqual(len(optimizer.segments), 10)
+                self.assertEqual(1000, sum(s["contracts"] for s in optimizer.segments))
+                for previous, segment in zip(
+                    optimizer.segments, optimizer.segments[1:]
+                ):
+                    self.assertLessEqual(previous["end"], segment["start"])
+
+    def test_optimize_random_contracts_should_match_optimizer_fast(self):
+        contracts = [
+            Contract(
+                name=f"c{i}",
+                start=random.randint(0, 2000),
+                duration=random.randint(1, 20),
+                price=random.randint(0, 100),
+            )
+            for i in range(500)
+        ]
+
+        self.assertEqual(
+            ContractOptimizerFast(contracts).optimize(),
+            ContractOptimizerDecomposed(contracts, max_workers=1).optimize(),
+        )
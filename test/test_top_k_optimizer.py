@@ -0,0 +1,88 @@
+import random
+import unittest
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.top_k_optimizer import ContractOptimizerTopK
+from test.contract_generator import ContractGenerator
+from test.tools import brute_force_schedules
+
+
+class Test(unittest.TestCase):
+    EXAMPLE = [
+        Contract(name="Contract1", start=0, duration=5, price=10),
+        Contract(name="Contract2", start=3, duration=7, price=14),
+        Contract(name="Contract3", start=5, duration=9, price=8),
+        Contract(name="Contract4", start=5, duration=9, price=7),
+    ]
+
+    @staticmethod
+    def _brute_force_incomes(contracts):
+        positive_contracts = [c for c in contracts if c.price > 0]
+        incomes = [income for _, income in brute_force_schedules(positive_contracts)]
+        return sorted(incomes, reverse=True)
+
+    def _assert_valid_schedules(self, contracts, schedules):
+        contracts_by_name = {c.name: c for c in contracts}
+        paths = set()
+        for schedule in schedules:
+            path = [contracts_by_name[name] for name in schedule["path"]]
+            self.assertEqual(schedule["income"], sum(c.price for c in path))
+            for previous, contract in zip(path, path[1:]):
+                self.assertLessEqual(previous.end, contract.start)
+            paths.add(frozenset(schedule["path"]))
+        self.assertEqual(len(schedules), len(paths))
+
+    def test_optimize_invalid_k_should_raise_error(self):
+        with self.assertRaises(ValueError):
+            ContractOptimizerTopK([], 0)
+
+    def test_optimize_no_contract_should_return_empty_schedule(self):
+        result = ContractOptimizerTopK([], 3).optimize()
+
+        self.assertEqual({"schedules": [{"income": 0, "path": []}]}, result)
+
+    def test_optimize_example(self):
+        result = ContractOptimizerTopK(self.EXAMPLE, 4).optimize()
+
+        self.assertEqual(
+            [
+                {"income": 18, "path": ["Contract1", "Contract3"]},
+                {"income": 17, "path": ["Contract1", "Contract4"]},
+                {"income": 14, "path": ["Contract2"]},
+                {"income": 10, "path": ["Contract1"]},
+            ],
+            result["schedules"],
+        )
+
+    def test_schedules_random_contracts_should_match_brute_force(self):
+        random.seed(0)
+        for _ in range(200):
+            contracts = [
+                Contract(
+                    name=f"c{i}",
+                    start=random.randint(0, 10),
+                    duration=random.randint(0, 5),
+                    price=random.randint(-1, 10),
+                )
+                for i in range(random.randint(0, 9))
+            ]
+            schedules = list(ContractOptimizerTopK(contracts, 1).schedules())
+
+            self.assertEqual(
+                self._brute_force_incomes(contracts),
+                [s["income"] for s in schedules],
+            )
+            self._assert_valid_schedules(contracts, schedules)
+
+    def test_optimize_first_schedule_should_match_optimizer_fast(self):
+        contracts = ContractGenerator().generate(1000)
+        schedules = ContractOptimizerTopK(contracts, 20).optimize()["schedules"]
+
+        self.assertEqual(20, len(schedules))
+        self.assertEqual(ContractOptimizerFast(contracts).optimize(), schedules[0])
+        self.assertEqual(
+            sorted((s["income"] for s in schedules), reverse=True),
+            [s["income"] for s in schedules],
+        )
+        self._assert_valid_schedules(contracts, schedules)
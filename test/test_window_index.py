@@ -0,0 +1,95 @@
+import random
+import unittest
+
+from optimizer.contract import Contract
+from optimizer.contract_optimizer import ContractOptimizerFast
+from optimizer.window_index import ContractWindowIndex
+from test.benchmark import WORKLOADS
+from test.contract_generator import ContractGenerator
+from test.tools import brute_force_income
+
+
+class Test(unittest.TestCase):
+    EXAMPLE = [
+        Contract(name="Contract1", start=0, duration=5, price=10),
+        Contract(name="Contract2", start=3, duration=7, price=14),
+        Contract(name="Contract3", start=5, duration=9, price=8),
+        Contract(name="Contract4", start=5, duration=9, price=7),
+        Contract(name="Contract5", start=20, duration=5, price=3),
+    ]
+
+    def _assert_valid_path(self, contracts, result, start, end):
+        contracts_by_name = {c.name: c for c in contracts}
+        path = [contracts_by_name[name] for name in result["path"]]
+        self.assertEqual(result["income"], sum(c.price for c in path))
+        for contract in path:
+            self.assertGreaterEqual(contract.start, start)
+            self.assertLessEqual(contract.end, end)
+        for previous, contract in zip(path, path[1:]):
+            self.assertLessEqual(previous.end, contract.start)
+
+    def test_query_invalid_window_should_raise_error(self):
+        with self.assertRaises(ValueError):
+            ContractWindowIndex(self.EXAMPLE).query(10, 5)
+
+    def test_query_example(self):
+        index = ContractWindowIndex(self.EXAMPLE)
+
+        self.assertEqual(
+            {"income": 21, "path": ["Contract1", "Contract3", "Contract5"]},
+            index.query(0, 25),
+        )
+        self.assertEqual({"income": 14, "path": ["Contract2"]}, index.query(0, 13))
+        self.assertEqual(
+            {"income": 11, "path": ["Contract3", "Contract5"]}, index.query(4, 30)
+        )
+        self.assertEqual({"income": 0, "path": []}, index.query(30, 40))
+        self.assertEqual({"income": 0, "path": []}, ContractWindowIndex([]).query(0, 1))
+
+    def test_query_should_match_brute_force(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            contracts = [
+                Contract(
+                    name=f"c{i}",
+                    start=rng.randint(0, 30),
+                    duration=rng.choice([0, 1, 2, 3, 5, 10]),
+                    price=rng.randint(-1, 10),
+                )
+                for i in range(rng.randint(0, 8))
+            ]
+            index = ContractWindowIndex(contracts)
+            for _ in range(5):
+                start = rng.randint(-2, 35)
+                end = rng.randint(start, 45)
+                window = [c for c in contracts if c.start >= start and c.end <= end]
+
+                result = index.query(start, end)
+
+                self.assertEqual(brute_force_income(window), result["income"])
+                self._assert_valid_path(contracts, result, start, end)
+
+    def test_query_should_match_fast_optimizer(self):
+        # uniform contracts make a single segment, where no window contains a cut point
+        for contracts, span in (
+            (ContractGenerator().generate(1000), 2000),
+            (WORKLOADS["uniform"](1000, random.Random(0)), 11000),
+        ):
+            index = ContractWindowIndex(contracts)
+            rng = random.Random(0)
+            for _ in range(20):
+                start = rng.randint(0, span)
+                end = rng.randint(start, span)
+                window = [c for c in contracts if c.start >= start and c.end <= end]
+
+                result = index.query(start, end)
+
+                self.assertEqual(
+                    ContractOptimizerFast(window).optimize()["income"],
+                    result["income"],
+                )
+                self._assert_valid_path(contracts, result, start, end)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
 import functools
-from typing import Iterable, Dict, Any
+import itertools
+from typing import Iterable, Dict, Any, List, Sequence, Tuple
+
+from optimizer.contract import Contract
 
 
 DESCRIPTION_KEY = "__description__"
@@ -27,3 +30,28 @@ def multitest(inputs: Iterable[Dict[str, Any]]):
         return decorated
 
     return multitest_decorator
+
+
+def brute_force_schedules(
+    contracts: Sequence[Contract],
+) -> List[Tuple[Tuple[int, ...], int]]:
+    """
+    Returns all schedules of a single ship, checked against all subsets of the contracts:
+    the positions of their contracts and their income. Contracts of a schedule must not overlap,
+    zero-duration ones being compatible with all contracts ending or starting at their time.
+    """
+    schedules = []
+    for r in range(len(contracts) + 1):
+        for subset in itertools.combinations(range(len(contracts)), r):
+            chosen = [contracts[i] for i in subset]
+            if all(
+                a.end <= b.start or b.end <= a.start
+                for a, b in itertools.combinations(chosen, 2)
+            ):
+                schedules.append((subset, sum(c.price for c in chosen)))
+    return schedules
+
+
+def brute_force_income(contracts: Sequence[Contract]) -> int:
+    """Returns the best income of a single ship, checked against all subsets of the contracts."""
+    return max(income for _, income in brute_force_schedules(contracts))